@@ -0,0 +1,56 @@
+"""
+Débit et latence sous 500 clients concurrents : lectures du catalogue et des
+statistiques, plus quelques envois de temps de jeu.
+
+    python bench/bench_concurrent_clients.py [--clients 500] [--think 0.5] [--duration 20] [--before REV] [--after REV]
+
+Par défaut : révision précédant la session SQLAlchemy asynchrone contre l'arbre courant.
+Chaque client attend --think secondes entre deux requêtes (utilisateur qui navigue).
+"""
+import argparse
+import itertools
+
+from bench_mixed_rw import GAMES, seed, token_headers
+from server import run_load, running_server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=500)
+    parser.add_argument("--think", type=float, default=0.5, help="pause between two requests of a client")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--before", default="0c1f07d~1")
+    parser.add_argument("--after", default=None, help="git revision (default: working tree)")
+    args = parser.parse_args()
+
+    headers = token_headers()
+    games = itertools.cycle(range(1, GAMES + 1))
+
+    async def list_games(client):
+        return await client.get("/games/")
+
+    async def stats(client):
+        return await client.get("/users/me/stats", headers=next(headers))
+
+    async def add_playtime(client):
+        return await client.post(f"/games/{next(games)}/playtime", headers=next(headers), json={"seconds": 60})
+
+    # 45 % catalogue, 45 % statistiques, 10 % écritures
+    readers = args.clients * 45 // 100
+    writers = args.clients - 2 * readers
+    for label, rev in (("before", args.before), ("after", args.after)):
+        with running_server(rev, seed=seed) as base_url:
+            print(f"--- {label}: {rev or 'working tree'}")
+            results = run_load(base_url, [
+                (f"GET /games/ x{readers}", list_games, readers, args.think),
+                (f"GET /users/me/stats x{readers}", stats, readers, args.think),
+                (f"POST /games/{{id}}/playtime x{writers}", add_playtime, writers, args.think),
+            ], args.duration)
+            for result in results:
+                result.report()
+            ok = sum(result.statuses.get(200, 0) for result in results)
+            print(f"total {ok / results[0].elapsed:.1f} ok/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Dernière save d'un couple (user, game) sur une grosse table `saves`.
+
+    python bench/bench_latest_save.py [--rows 1000000] [--lookups 2000]
+
+Compare trois chemins sur les mêmes données :
+  - avant : WHERE user_id AND game_id ORDER BY created_at DESC LIMIT 1, sans index composite
+  - index : même requête avec ix_saves_user_game_created
+  - pointeur : jointure save_heads -> saves par clé primaire (chemin actuel)
+"""
+import argparse
+import random
+import sqlite3
+from datetime import datetime, timedelta
+
+from common import prepare_database, report, timed
+
+
+def seed(db_path, rows, users, games):
+    conn = sqlite3.connect(db_path)
+    versions = max(1, rows // (users * games))
+    base = datetime(2024, 1, 1)
+
+    def saves():
+        save_id = 0
+        for user_id in range(1, users + 1):
+            for game_id in range(1, games + 1):
+                for version in range(versions):
+                    save_id += 1
+                    yield (save_id, f"saves/{save_id:064x}.sav", user_id, game_id,
+                           (base + timedelta(minutes=save_id)).isoformat(" "))
+
+    conn.executemany("INSERT INTO saves (id, file_path, user_id, game_id, created_at) VALUES (?, ?, ?, ?, ?)", saves())
+    conn.execute("""
+        INSERT INTO save_heads (user_id, game_id, latest_save_id)
+        SELECT user_id, game_id, MAX(id) FROM saves GROUP BY user_id, game_id
+    """)
+    conn.commit()
+    conn.close()
+    return users * games * versions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--games", type=int, default=50)
+    parser.add_argument("--lookups", type=int, default=2000)
+    args = parser.parse_args()
+
+    db_path = prepare_database()
+    total = seed(db_path, args.rows, args.users, args.games)
+    print(f"{total} saves, {args.users} users x {args.games} games")
+
+    from sqlalchemy import create_engine, select
+
+    import models
+
+    engine = create_engine(f"sqlite:///{db_path}")
+    pairs = [(random.randint(1, args.users), random.randint(1, args.games)) for _ in range(args.lookups)]
+    picks = iter(pairs * 3)
+
+    def latest_by_sort(conn):
+        user_id, game_id = next(picks)
+        return conn.execute(
+            select(models.Save.id)
+            .where(models.Save.user_id == user_id, models.Save.game_id == game_id)
+            .order_by(models.Save.created_at.desc())
+            .limit(1)
+        ).scalar()
+
+    def latest_by_pointer(conn):
+        user_id, game_id = next(picks)
+        return conn.execute(
+            select(models.Save.id)
+            .join(models.SaveHead, models.SaveHead.latest_save_id == models.Save.id)
+            .where(models.SaveHead.user_id == user_id, models.SaveHead.game_id == game_id)
+        ).scalar()
+
+    with engine.connect() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_saves_user_game_created")
+        # Sans index composite, une requête coûte un parcours de table : on en mesure moins
+        report("before: scan + sort (no index)", timed(lambda: latest_by_sort(conn), max(20, args.lookups // 100)))
+        conn.exec_driver_sql("CREATE INDEX ix_saves_user_game_created ON saves (user_id, game_id, created_at)")
+        conn.exec_driver_sql("ANALYZE")
+        report("index (user, game, created_at)", timed(lambda: latest_by_sort(conn), args.lookups))
+        report("save_heads pointer (current)", timed(lambda: latest_by_pointer(conn), args.lookups))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+Tempête de connexions : débit de /token et latence des autres endpoints pendant ce temps.
+
+    python bench/bench_login_storm.py [--logins 64] [--duration 20] [--before REV] [--after REV]
+
+Par défaut : révision précédant le pool Argon2 (hachage dans le threadpool) contre l'arbre courant.
+"""
+import argparse
+
+import httpx
+
+from server import run_load, running_server
+
+USER = {"username": "bench", "password": "correct horse battery staple"}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=64, help="concurrent login clients")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--before", default="2a08fac~1")
+    parser.add_argument("--after", default=None, help="git revision (default: working tree)")
+    args = parser.parse_args()
+
+    async def login(client):
+        return await client.post("/token", data=USER)
+
+    async def probe(client):
+        return await client.get("/platforms/")
+
+    for label, rev in (("before", args.before), ("after", args.after)):
+        with running_server(rev) as base_url:
+            httpx.post(f"{base_url}/register", json=USER, timeout=60).raise_for_status()
+            print(f"--- {label}: {rev or 'working tree'}")
+            for result in run_load(base_url, [
+                (f"POST /token x{args.logins}", login, args.logins, 0),
+                ("GET /platforms/ probe", probe, 1, 0.05),
+            ], args.duration):
+                result.report()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Débit de /media selon MEDIA_SERVE_MODE : téléchargements complets concurrents d'une ROM.
+
+    python bench/bench_media_modes.py [--size-mb 32] [--clients 8] [--duration 15] [--modes python,sendfile,x-accel]
+
+En x-accel, l'application ne renvoie que l'en-tête X-Accel-Redirect ; les octets sont
+envoyés par nginx, absent de ce banc : on mesure alors le coût côté application.
+sendfile (expérimental) sert de témoin : uvicorn n'annonçant pas http.response.zerocopysend,
+il doit donner les mêmes chiffres que python.
+"""
+import argparse
+import hashlib
+import os
+
+from server import run_load, running_server
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=32)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--modes", default="python,sendfile,x-accel")
+    args = parser.parse_args()
+
+    data = os.urandom(int(args.size_mb * 1024 * 1024))
+    digest = hashlib.sha256(data).hexdigest()
+    key = f"roms/{digest[:2]}/{digest[2:4]}/{digest}.sfc"
+
+    def seed(db_path):
+        path = os.path.join(os.path.dirname(db_path), "media", key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+
+    async def download(client):
+        # identity : pas de variante précompressée, on mesure le transfert du fichier lui-même
+        response = await client.get(f"/media/{key}", headers={"Accept-Encoding": "identity"})
+        if response.status_code == 200 and "x-accel-redirect" not in response.headers:
+            assert len(response.content) == len(data)
+        return response
+
+    print(f"{len(data) / 1e6:.1f} MB file, {args.clients} concurrent clients")
+    for mode in args.modes.split(","):
+        with running_server(None, env={"MEDIA_SERVE_MODE": mode}, seed=seed) as base_url:
+            (result,) = run_load(base_url, [(f"{mode}", download, args.clients, 0)], args.duration)
+            ok = result.statuses.get(200, 0)
+            result.report()
+            if mode in ("x-accel", "x-sendfile"):
+                print(f"{'':<36} app side only: {ok / result.elapsed:.0f} responses/s (bytes served by nginx)")
+            else:
+                print(f"{'':<36} {ok * len(data) / result.elapsed / 1e6:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Charge mixte lecture/écriture : uploads de saves et envois de temps de jeu en
+parallèle de lectures du catalogue et des statistiques.
+
+    python bench/bench_mixed_rw.py [--writers 16] [--readers 32] [--duration 20] [--before REV] [--after REV]
+
+Par défaut : révision précédant le profil SQLite de production (WAL, writer unique)
+contre l'arbre courant. Les utilisateurs, la plateforme et les jeux sont insérés
+directement en base ; les tokens sont signés avec la SECRET_KEY du serveur de bench.
+"""
+import argparse
+import itertools
+import os
+import sqlite3
+
+from jose import jwt
+
+from server import run_load, running_server
+
+USERS = 16
+GAMES = 200
+SAVE_SIZE = 64 * 1024
+
+
+def seed(db_path):
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT INTO users (id, username, hashed_password) VALUES (?, ?, 'unused')",
+                         [(i, f"bench{i}") for i in range(1, USERS + 1)])
+        conn.execute("INSERT INTO platforms (id, name) VALUES (1, 'SNES')")
+        conn.executemany("INSERT INTO games (id, title, rom_path, platform_id) VALUES (?, ?, ?, 1)",
+                         [(i, f"Game {i:04d}", f"roms/game{i}.sfc") for i in range(1, GAMES + 1)])
+
+
+def token_headers():
+    for i in itertools.cycle(range(1, USERS + 1)):
+        token = jwt.encode({"sub": f"bench{i}", "id": i}, "bench", algorithm="HS256")
+        yield {"Authorization": f"Bearer {token}"}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=16, help="concurrent clients per write scenario")
+    parser.add_argument("--readers", type=int, default=32, help="concurrent clients per read scenario")
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--before", default="f2959c5~1")
+    parser.add_argument("--after", default=None, help="git revision (default: working tree)")
+    args = parser.parse_args()
+
+    headers = token_headers()
+    games = itertools.cycle(range(1, GAMES + 1))
+
+    async def upload_save(client):
+        data = os.urandom(SAVE_SIZE)
+        return await client.post(f"/games/{next(games)}/save", headers=next(headers),
+                                  files={"file": ("game.sav", data)})
+
+    async def add_playtime(client):
+        return await client.post(f"/games/{next(games)}/playtime", headers=next(headers), json={"seconds": 60})
+
+    async def list_games(client):
+        return await client.get("/games/")
+
+    async def stats(client):
+        return await client.get("/users/me/stats", headers=next(headers))
+
+    for label, rev in (("before", args.before), ("after", args.after)):
+        with running_server(rev, seed=seed) as base_url:
+            print(f"--- {label}: {rev or 'working tree'}")
+            for result in run_load(base_url, [
+                (f"POST /games/{{id}}/save x{args.writers}", upload_save, args.writers, 0),
+                (f"POST /games/{{id}}/playtime x{args.writers}", add_playtime, args.writers, 0),
+                (f"GET /games/ x{args.readers}", list_games, args.readers, 0),
+                (f"GET /users/me/stats x{args.readers}", stats, args.readers, 0),
+            ], args.duration):
+                result.report()
+
+
+if __name__ == "__main__":
+    main()
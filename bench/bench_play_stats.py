@@ -0,0 +1,139 @@
+"""
+Statistiques de temps de jeu sur un gros journal `play_sessions` : rollups journaliers
+(chemin actuel) contre agrégation des sessions brutes.
+
+    python bench/bench_play_stats.py [--sessions 10000000] [--users 1000] [--games 500] [--lookups 200]
+
+Les sessions sont générées par SQLite (CTE récursive) sur les 365 derniers jours, puis
+les rollups sont calculés en une passe GROUP BY. Pour chaque statistique :
+  - endpoint : requête HTTP in-process (TestClient) sur l'endpoint, qui lit les rollups
+  - rollup : la requête SQL des rollups seule
+  - raw : la même statistique agrégée depuis play_sessions (index user_id, ended_at)
+"""
+import argparse
+import random
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+from common import prepare_database, report, timed
+
+DAYS = 365
+
+
+def seed(db_path, sessions, users, games):
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO users (id, username, hashed_password) VALUES (?, ?, 'unused')",
+                     [(i, f"bench{i}") for i in range(1, users + 1)])
+    conn.executemany("INSERT INTO games (id, title, rom_path) VALUES (?, ?, ?)",
+                     [(i, f"Game {i:04d}", f"roms/game{i}.sfc") for i in range(1, games + 1)])
+
+    # Popularité inégale : le carré d'un tirage uniforme favorise les petits identifiants
+    conn.execute("""
+        INSERT INTO play_sessions (user_id, game_id, seconds, started_at, ended_at)
+        WITH RECURSIVE seq(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM seq WHERE i < :sessions),
+        draws AS (
+            SELECT 1 + abs(random()) % :users AS user_id,
+                   1 + CAST(:games * ((abs(random()) % 1000000) / 1000000.0)
+                             * ((abs(random()) % 1000000) / 1000000.0) AS INTEGER) AS game_id,
+                   60 + abs(random()) % 7140 AS seconds,
+                   :now - abs(random()) % (:days * 86400) AS ended
+            FROM seq
+        )
+        SELECT user_id, game_id, seconds, datetime(ended - seconds, 'unixepoch'), datetime(ended, 'unixepoch')
+        FROM draws
+    """, {"sessions": sessions, "users": users, "games": games, "days": DAYS, "now": int(time.time())})
+
+    # Rollups tels que les maintient play_stats.record_sessions (session comptée le jour de sa fin)
+    conn.execute("""
+        INSERT INTO playtime_daily (user_id, game_id, day, seconds, sessions)
+        SELECT user_id, game_id, date(ended_at), SUM(seconds), COUNT(*)
+        FROM play_sessions GROUP BY user_id, game_id, date(ended_at)
+    """)
+    conn.execute("""
+        INSERT INTO game_playtime_daily (day, game_id, seconds, sessions)
+        SELECT date(ended_at), game_id, SUM(seconds), COUNT(*)
+        FROM play_sessions GROUP BY date(ended_at), game_id
+    """)
+    conn.execute("ANALYZE")
+    conn.commit()
+    rollups = conn.execute("SELECT COUNT(*) FROM playtime_daily").fetchone()[0]
+    conn.close()
+    return rollups
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=10_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--games", type=int, default=500)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    db_path = prepare_database(SECRET_KEY="bench")
+    start = time.perf_counter()
+    rollups = seed(db_path, args.sessions, args.users, args.games)
+    print(f"{args.sessions} sessions, {rollups} playtime_daily rows, seeded in {time.perf_counter() - start:.0f} s")
+
+    from fastapi.testclient import TestClient
+
+    import auth
+    import main as server
+    import play_stats
+
+    client = TestClient(server.app)
+    tokens = {
+        user_id: {"Authorization": f"Bearer {auth.create_access_token({'sub': f'bench{user_id}', 'id': user_id})}"}
+        for user_id in range(1, args.users + 1)
+    }
+    conn = sqlite3.connect(db_path)
+
+    today = datetime.utcnow().date()
+    week = play_stats.week_start(today).isoformat()
+    history_since = (today - timedelta(days=89)).isoformat()
+    ranking_since = (today - timedelta(days=6)).isoformat()
+
+    def user():
+        return random.randint(1, args.users)
+
+    def game():
+        # Jeux populaires : ceux pour lesquels un historique a du contenu
+        return random.randint(1, max(1, args.games // 10))
+
+    def query(sql, *params):
+        return lambda: conn.execute(sql, params).fetchall()
+
+    print("--- week (GET /users/me/stats/week)")
+    report("endpoint (rollups)", timed(lambda: client.get("/users/me/stats/week", headers=tokens[user()]),
+                                       args.lookups))
+    report("rollup query", timed(lambda: query(
+        "SELECT game_id, day, seconds FROM playtime_daily WHERE user_id = ? AND day >= ?", user(), week)(),
+        args.lookups))
+    report("raw aggregation", timed(lambda: query(
+        "SELECT game_id, date(ended_at), SUM(seconds) FROM play_sessions"
+        " WHERE user_id = ? AND ended_at >= ? GROUP BY 1, 2", user(), week)(), args.lookups))
+
+    print("--- history, 90 days (GET /users/me/games/{id}/history)")
+    report("endpoint (rollups)", timed(lambda: client.get(f"/users/me/games/{game()}/history?days=90",
+                                                          headers=tokens[user()]), args.lookups))
+    report("rollup query", timed(lambda: query(
+        "SELECT day, seconds, sessions FROM playtime_daily WHERE user_id = ? AND game_id = ? AND day >= ?"
+        " ORDER BY day", user(), game(), history_since)(), args.lookups))
+    report("raw aggregation", timed(lambda: query(
+        "SELECT date(ended_at), SUM(seconds), COUNT(*) FROM play_sessions"
+        " WHERE user_id = ? AND game_id = ? AND ended_at >= ? GROUP BY 1 ORDER BY 1",
+        user(), game(), history_since)(), args.lookups))
+
+    # Classement serveur : sans rollup, chaque appel parcourt toutes les sessions de la fenêtre
+    print("--- most played, 7 days (GET /stats/most-played)")
+    report("endpoint (rollups)", timed(lambda: client.get("/stats/most-played?days=7"), args.lookups))
+    report("rollup query", timed(query(
+        "SELECT game_id, SUM(seconds), SUM(sessions) FROM game_playtime_daily WHERE day >= ?"
+        " GROUP BY game_id ORDER BY 2 DESC LIMIT 10", ranking_since), args.lookups))
+    report("raw aggregation", timed(query(
+        "SELECT game_id, SUM(seconds), COUNT(*) FROM play_sessions WHERE ended_at >= ?"
+        " GROUP BY game_id ORDER BY 2 DESC LIMIT 10", ranking_since), max(5, args.lookups // 20)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Temps d'installation d'une ROM sur un lien lent : octets bruts contre variantes
+précompressées (Content-Encoding), téléchargées par client/downloader.py.
+
+    python bench/bench_rom_install.py [--size-mb 16] [--mbps 20] [--rom chemin]
+
+Le serveur (arbre courant) tourne sous uvicorn derrière un proxy TCP qui limite le
+débit descendant à --mbps. "identity" correspond au comportement d'avant les
+variantes précompressées : la ROM brute, octet pour octet.
+"""
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+from common import ROOT, SERVER_DIR
+from server import _free_port, running_server
+
+sys.path.insert(0, SERVER_DIR)
+# Après le serveur : le client a lui aussi un module storage
+sys.path.append(os.path.join(ROOT, "client"))
+
+import downloader  # noqa: E402  (client)
+import rom_store  # noqa: E402
+import storage  # noqa: E402
+
+
+def synthetic_rom(size, seed=7):
+    """
+    Contenu proche d'une ROM de cartouche : code et données compressées (aléatoire),
+    tuiles graphiques répétitives, et remplissage 0xFF jusqu'à la taille de la puce.
+    """
+    rng = random.Random(seed)
+    tiles = [bytes(rng.choice(b"\x00\x11\x22\x33\x44") for _ in range(32)) for _ in range(64)]
+    out = bytearray()
+    while len(out) < size * 3 // 4:
+        kind = rng.random()
+        if kind < 0.45:
+            out += rng.randbytes(4096)
+        elif kind < 0.9:
+            out += b"".join(rng.choice(tiles) for _ in range(128))
+        else:
+            out += bytes(4096)
+    out += b"\xff" * (size - len(out))
+    return bytes(out[:size])
+
+
+class ThrottledProxy:
+    """Proxy TCP (thread dédié) qui limite le débit serveur -> client et compte les octets transmis."""
+
+    def __init__(self, target_port, bytes_per_second):
+        self.target_port = target_port
+        self.rate = bytes_per_second
+        self.port = _free_port()
+        self.downstream = 0
+        self._ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(asyncio.start_server(self._handle, "127.0.0.1", self.port))
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _pipe(self, reader, writer, throttle):
+        try:
+            while data := await reader.read(16384):
+                if throttle:
+                    self.downstream += len(data)
+                    await asyncio.sleep(len(data) / self.rate)
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _handle(self, client_reader, client_writer):
+        server_reader, server_writer = await asyncio.open_connection("127.0.0.1", self.target_port)
+        await asyncio.gather(self._pipe(client_reader, server_writer, False),
+                             self._pipe(server_reader, client_writer, True))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=16)
+    parser.add_argument("--mbps", type=float, default=20, help="downstream link speed in Mbit/s")
+    parser.add_argument("--rom", default=None, help="use a real ROM file instead of synthetic content")
+    args = parser.parse_args()
+
+    if args.rom:
+        with open(args.rom, "rb") as f:
+            data = f.read()
+    else:
+        data = synthetic_rom(int(args.size_mb * 1024 * 1024))
+    sha256 = hashlib.sha256(data).hexdigest()
+    key = storage.sharded_key("roms", sha256, ".sfc")
+
+    def seed(db_path):
+        blob_path = os.path.join(os.path.dirname(db_path), "media", key)
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        with open(blob_path, "wb") as f:
+            f.write(data)
+        start = time.perf_counter()
+        kept = rom_store.write_sidecars(blob_path)
+        print(f"sidecars {kept} written in {time.perf_counter() - start:.1f} s")
+        for encoding, suffix in rom_store.SIDECAR_ENCODINGS:
+            if os.path.exists(blob_path + suffix):
+                ratio = os.path.getsize(blob_path + suffix) / len(data)
+                print(f"  {encoding:<8} {os.path.getsize(blob_path + suffix) / 1e6:8.2f} MB ({ratio:.0%})")
+
+    encodings = ["identity", "gzip"]
+    if "zstd" in downloader.ACCEPT_ENCODING:
+        encodings.append("zstd")
+    else:
+        print("zstd skipped: this urllib3 cannot decode it (client falls back to gzip)")
+
+    print(f"ROM {len(data) / 1e6:.2f} MB, link {args.mbps} Mbit/s")
+    with running_server(None, seed=seed) as base_url:
+        proxy = ThrottledProxy(int(base_url.rsplit(":", 1)[1]), args.mbps * 1e6 / 8)
+        workdir = tempfile.mkdtemp(prefix="neutron-install-")
+        try:
+            for encoding in encodings:
+                target = os.path.join(workdir, f"{encoding}.sfc")
+                before = proxy.downstream
+                start = time.perf_counter()
+                downloader.download_file(f"http://127.0.0.1:{proxy.port}/media/{key}", target,
+                                         expected_sha256=sha256, headers={"Accept-Encoding": encoding})
+                elapsed = time.perf_counter() - start
+                print(f"{encoding:<10} install {elapsed:7.2f} s  on the wire {(proxy.downstream - before) / 1e6:8.2f} MB")
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+Recherche de jeux par titre sur un gros catalogue.
+
+    python bench/bench_title_search.py [--titles 200000] [--lookups 200]
+
+Compare sur les mêmes données :
+  - avant : title ILIKE '%terme%' trié par titre (parcours de table)
+  - FTS5 : index trigram games_fts, trié par bm25 (chemin actuel de /games/?search=)
+et, pour la saisie semi-automatique, LIKE 'préfixe%' sur games contre games_fts.
+"""
+import argparse
+import random
+import sqlite3
+
+from common import prepare_database, report, timed
+
+WORDS = ("super", "mario", "zelda", "metroid", "kirby", "donkey", "kong", "fire", "emblem", "star", "fox",
+         "final", "fantasy", "dragon", "quest", "mega", "man", "sonic", "street", "fighter", "castle",
+         "vania", "chrono", "trigger", "secret", "mana", "pokemon", "tetris", "pilot", "wings", "racing",
+         "kart", "party", "golf", "tennis", "soccer", "world", "island", "land", "adventure", "legend")
+PAGE_SIZE = 100
+
+
+def title(rng):
+    return " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(2, 4))) + f" {rng.randint(1, 9999)}"
+
+
+def seed(db_path, titles):
+    rng = random.Random(42)
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO platforms (id, name) VALUES (1, 'SNES')")
+    # Les triggers de la migration FTS5 alimentent games_fts au fil des INSERT
+    conn.executemany("INSERT INTO games (title, rom_path, platform_id) VALUES (?, ?, 1)",
+                     ((title(rng), f"roms/{i}.sfc") for i in range(titles)))
+    conn.commit()
+    conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--titles", type=int, default=200_000)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args()
+
+    db_path = prepare_database()
+    seed(db_path, args.titles)
+    print(f"{args.titles} titles")
+
+    from sqlalchemy import create_engine, select
+
+    import models
+    import search_index
+
+    engine = create_engine(f"sqlite:///{db_path}")
+
+    def ilike(conn, term):
+        return conn.execute(
+            select(models.Game.id).where(models.Game.title.ilike(f"%{term}%"))
+            .order_by(models.Game.title, models.Game.id).limit(PAGE_SIZE)
+        ).all()
+
+    def fts(conn, term):
+        matches = search_index.ranked_matches(term)
+        return conn.execute(
+            select(models.Game.id).join(matches, matches.c.game_id == models.Game.id)
+            .order_by(matches.c.score, models.Game.id).limit(PAGE_SIZE)
+        ).all()
+
+    def prefix_scan(conn, term):
+        return conn.execute(select(models.Game.id).where(models.Game.title.ilike(f"{term}%")).limit(20)).all()
+
+    def prefix_fts(conn, term):
+        matches = search_index.prefix_matches(term)
+        return conn.execute(
+            select(models.Game.id).join(matches, matches.c.game_id == models.Game.id).limit(20)
+        ).all()
+
+    # Terme fréquent (beaucoup de résultats à classer), terme rare (titre + numéro), terme absent
+    terms = {"frequent 'mario'": "mario", "rare 'zelda quest 12'": "zelda quest 12", "no match 'xyzzy'": "xyzzy"}
+    with engine.connect() as conn:
+        for label, term in terms.items():
+            report(f"before: ILIKE {label}", timed(lambda: ilike(conn, term), args.lookups))
+            report(f"FTS5 trigram {label}", timed(lambda: fts(conn, term), args.lookups))
+        report("typeahead before: ILIKE 'sup%'", timed(lambda: prefix_scan(conn, "Sup"), args.lookups))
+        report("typeahead FTS5: LIKE 'sup%'", timed(lambda: prefix_fts(conn, "Sup"), args.lookups))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Uploads concurrents : ROMs (POST /games/) et saves (POST /games/{id}/save) envoyées en
+parallèle, avec un lecteur qui mesure la latence d'un endpoint léger pendant ce temps.
+
+    python bench/bench_uploads.py [--rom-mb 8] [--rom-clients 8] [--save-clients 16] [--duration 15]
+
+Par défaut : révision précédant le pipeline d'upload en streaming (handlers synchrones,
+copie du spool Starlette vers media/) contre l'arbre courant. Chaque ROM a un contenu
+distinct : la déduplication par empreinte ne court-circuite aucune écriture.
+
+Les révisions récentes compressent chaque ROM en tâche de fond (variantes .gz/.zst) :
+--no-jobs (JOB_WORKERS=0) mesure l'ingestion seule, sans ce travail concurrent.
+"""
+import argparse
+import itertools
+import os
+
+from bench_mixed_rw import GAMES, seed as seed_catalog, token_headers
+from server import run_load, running_server
+
+SAVE_SIZE = 256 * 1024
+
+
+def seed(db_path):
+    seed_catalog(db_path)
+    # Les anciennes révisions écrivent les saves dans ./saves sans créer le dossier
+    os.makedirs(os.path.join(os.path.dirname(db_path), "saves"), exist_ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rom-mb", type=int, default=8, help="size of each uploaded ROM")
+    parser.add_argument("--rom-clients", type=int, default=8)
+    parser.add_argument("--save-clients", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=4, help="clients polling GET /platforms/1 meanwhile")
+    parser.add_argument("--duration", type=float, default=15)
+    parser.add_argument("--no-jobs", action="store_true", help="run the servers without background job workers")
+    parser.add_argument("--before", default="88c7b3f~1")
+    parser.add_argument("--after", default=None, help="git revision (default: working tree)")
+    args = parser.parse_args()
+
+    # Un seul gros tampon aléatoire, préfixé d'octets uniques par requête
+    rom_body = os.urandom(args.rom_mb * 1024 * 1024)
+    headers = token_headers()
+    games = itertools.cycle(range(1, GAMES + 1))
+    counter = itertools.count()
+
+    async def upload_rom(client):
+        data = os.urandom(16) + rom_body
+        return await client.post("/games/", data={"title": f"Upload {next(counter)}", "platform_id": "1"},
+                                  files={"rom": ("upload.sfc", data)})
+
+    async def upload_save(client):
+        return await client.post(f"/games/{next(games)}/save", headers=next(headers),
+                                  files={"file": ("game.sav", os.urandom(SAVE_SIZE))})
+
+    async def read_platform(client):
+        return await client.get("/platforms/1")
+
+    for label, rev in (("before", args.before), ("after", args.after)):
+        env = {"JOB_WORKERS": 0} if args.no_jobs else None
+        with running_server(rev, env=env, seed=seed) as base_url:
+            print(f"--- {label}: {rev or 'working tree'}")
+            results = run_load(base_url, [
+                (f"POST /games/ {args.rom_mb} MB x{args.rom_clients}", upload_rom, args.rom_clients, 0),
+                (f"POST /games/{{id}}/save x{args.save_clients}", upload_save, args.save_clients, 0),
+                (f"GET /platforms/1 x{args.readers}", read_platform, args.readers, 0.05),
+            ], args.duration)
+            for result in results:
+                result.report()
+            uploaded = results[0].statuses.get(200, 0) * args.rom_mb
+            print(f"{'ROM ingest':<36} {uploaded / results[0].elapsed:8.1f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
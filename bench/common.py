@@ -0,0 +1,51 @@
+"""
+Outils communs aux benchmarks : base SQLite temporaire migrée (alembic upgrade head)
+et mesures de latence. À importer avant tout module du serveur : les réglages
+(DATABASE_URL, MEDIA_ROOT...) sont lus à l'import.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_DIR = os.path.join(ROOT, "server")
+
+
+def prepare_database(workdir=None, **env):
+    """Crée une base migrée dans un dossier temporaire et y pointe le serveur ; renvoie son chemin."""
+    workdir = workdir or tempfile.mkdtemp(prefix="neutron-bench-")
+    db_path = os.path.join(workdir, "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("MEDIA_ROOT", os.path.join(workdir, "media"))
+    os.environ.update({key: str(value) for key, value in env.items()})
+    if SERVER_DIR not in sys.path:
+        sys.path.insert(0, SERVER_DIR)
+
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(SERVER_DIR, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(SERVER_DIR, "alembic"))
+    command.upgrade(config, "head")
+    return db_path
+
+
+def timed(func, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def percentile(durations, pct):
+    ordered = sorted(durations)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def report(label, durations):
+    print(f"{label:<40} n={len(durations):<6} mean={statistics.mean(durations) * 1000:9.3f} ms  "
+          f"p50={percentile(durations, 50) * 1000:9.3f} ms  p99={percentile(durations, 99) * 1000:9.3f} ms")
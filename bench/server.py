@@ -0,0 +1,144 @@
+"""
+Lance le serveur d'une révision git sous uvicorn (base et médias dans un dossier
+temporaire) et génère de la charge HTTP concurrente avec httpx. Sert aux
+comparaisons avant/après : même scénario, même machine, deux révisions.
+"""
+import asyncio
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+from contextlib import contextmanager
+from io import BytesIO
+
+import httpx
+
+from common import ROOT, SERVER_DIR, percentile
+
+
+def _extract(rev, target):
+    if rev is None:
+        # Arbre de travail courant (modifications non commitées comprises)
+        shutil.copytree(SERVER_DIR, os.path.join(target, "server"),
+                        ignore=shutil.ignore_patterns("__pycache__", "*.db", "media", "saves", ".env"))
+        return
+    archive = subprocess.run(["git", "-C", ROOT, "archive", "--format=tar", rev, "server"],
+                             check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=BytesIO(archive)) as tar:
+        tar.extractall(target)
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def running_server(rev=None, env=None, workers=1, seed=None):
+    """
+    Contexte qui renvoie l'URL d'un uvicorn servant `rev` (None = arbre courant).
+    seed(chemin de la base) est appelé après les migrations, avant le démarrage.
+    """
+    workdir = tempfile.mkdtemp(prefix="neutron-bench-")
+    _extract(rev, workdir)
+    server_dir = os.path.join(workdir, "server")
+
+    # Chemins relatifs : les anciennes révisions ont "./app.db" et "media" en dur
+    process_env = dict(os.environ, DATABASE_URL="sqlite:///./app.db", SECRET_KEY="bench", PYTHONDONTWRITEBYTECODE="1")
+    process_env.update({key: str(value) for key, value in (env or {}).items()})
+    subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=server_dir, env=process_env,
+                   check=True, capture_output=True)
+    if seed is not None:
+        seed(os.path.join(server_dir, "app.db"))
+
+    port = _free_port()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--workers", str(workers),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=server_dir, env=process_env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        deadline = time.time() + 60
+        while True:
+            try:
+                if httpx.get(f"{base_url}/docs", timeout=1).status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            if time.time() > deadline or proc.poll() is not None:
+                raise RuntimeError(f"server for {rev or 'working tree'} did not start")
+            time.sleep(0.2)
+        yield base_url
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(15)
+        except subprocess.TimeoutExpired:
+            # Requêtes encore en vol (charge interrompue) : on n'attend pas l'arrêt propre
+            proc.kill()
+            proc.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+class LoadResult:
+    def __init__(self, label):
+        self.label = label
+        self.latencies = []
+        self.statuses = {}
+        self.errors = 0
+        self.elapsed = 0.0
+
+    def record(self, status, latency):
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.latencies.append(latency)
+
+    def report(self):
+        ok = self.statuses.get(200, 0)
+        line = f"{self.label:<36} {ok / self.elapsed:8.1f} ok/s"
+        if self.latencies:
+            line += (f"  p50={percentile(self.latencies, 50) * 1000:8.1f} ms"
+                     f"  p99={percentile(self.latencies, 99) * 1000:8.1f} ms")
+        line += f"  statuses={dict(sorted(self.statuses.items()))}"
+        if self.errors:
+            line += f" errors={self.errors}"
+        print(line)
+
+
+async def _worker(client, request, result, stop_at, pause):
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        try:
+            response = await request(client)
+            result.record(response.status_code, time.perf_counter() - start)
+        except httpx.HTTPError:
+            result.errors += 1
+        if pause:
+            await asyncio.sleep(pause)
+
+
+async def _run(base_url, scenarios, duration):
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120, limits=limits) as client:
+        stop_at = time.perf_counter() + duration
+        tasks = []
+        results = []
+        for label, request, concurrency, pause in scenarios:
+            result = LoadResult(label)
+            results.append(result)
+            tasks += [_worker(client, request, result, stop_at, pause) for _ in range(concurrency)]
+        start = time.perf_counter()
+        await asyncio.gather(*tasks)
+        for result in results:
+            result.elapsed = time.perf_counter() - start
+    return results
+
+
+def run_load(base_url, scenarios, duration):
+    """scenarios : [(libellé, coroutine(client) -> réponse, nb de clients, pause entre requêtes)]."""
+    return asyncio.run(_run(base_url, scenarios, duration))
@@ -6,6 +6,8 @@ DOCUMENTS_DIR = os.path.join(os.path.expanduser('~'), 'Documents', 'NeutronGames
 LIBRARY_FILE = 'local_library.json'
 CONFIG_FILE = 'local_config.json'
 AUTH_FILE = 'local_auth.json'
+UPLOADS_FILE = 'local_uploads.json'
+PLAYTIME_QUEUE_FILE = 'local_playtime_queue.json'
 
 if not os.path.exists(DOCUMENTS_DIR):
     os.makedirs(DOCUMENTS_DIR)
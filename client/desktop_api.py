@@ -1,3 +1,4 @@
+import hashlib
 import threading
 import requests
 import webview
@@ -6,8 +7,24 @@ import os
 import storage
 import config
 import time
+import uuid
+from datetime import datetime, timezone
+
+PLAYTIME_BATCH_SIZE = 500
+# Même borne que le serveur : au-delà, l'émulateur est resté ouvert sans personne devant
+PLAYTIME_MAX_SESSION = 86400 * 7
+# Intervalle de rafraîchissement du manifeste des saves cloud (secondes)
+SAVE_MANIFEST_REFRESH = 300
 
 class JSApi:
+    def __init__(self):
+        # État des saves cloud de toute la bibliothèque : {game_id: {save_id, sha256, ...}}
+        self._save_manifest = {}
+        self._manifest_cursor = None
+        self._manifest_lock = threading.Lock()
+        # Sessions de jeu en attente d'envoi (fichier local partagé entre threads)
+        self._playtime_lock = threading.Lock()
+
     def pick_file(self):
         if len(webview.windows) > 0:
             window = webview.windows[0]
@@ -111,53 +128,134 @@ class JSApi:
         if duration_seconds < 5:
             print("[Playtime] Session trop courte (<5s), ignorée.")
             return
+        if duration_seconds > PLAYTIME_MAX_SESSION:
+            print("[Playtime] Session de plus de 7 jours, ignorée.")
+            return
+
+        # La session est d'abord mise en file : rien n'est perdu si le serveur est injoignable
+        with self._playtime_lock:
+            queue = storage.load_playtime_queue()
+            queue.append({
+                "game_id": int(game_id),
+                "seconds": duration_seconds,
+                "ended_at": datetime.now(timezone.utc).isoformat(),
+                # Le serveur ignore une session déjà reçue : renvoyer un lot après un timeout est sans risque
+                "session_id": str(uuid.uuid4())
+            })
+            storage.save_playtime_queue(queue)
 
-        print(f"[Playtime] Envoi de {duration_seconds}s au serveur...")
-        url = f"{config.API_BASE_URL}/games/{game_id}/playtime"
+        self._flush_playtime()
+
+    def _flush_playtime(self):
+        """Envoie toutes les sessions en attente en une seule requête."""
         headers = self._get_auth_headers()
-        
         if not headers:
             print("[Playtime] Échec : Pas de token d'authentification.")
             return
 
-        resp = requests.post(url, json={"seconds": duration_seconds}, headers=headers)
-        if resp.status_code == 200:
-            print(f"[Playtime] Succès ! Nouveau total reçu du serveur.")
-        else:
-            print(f"[Playtime] Erreur serveur : {resp.status_code}")
+        with self._playtime_lock:
+            queue = storage.load_playtime_queue()
+            if not queue:
+                return
+
+            batch = queue[:PLAYTIME_BATCH_SIZE]
+            print(f"[Playtime] Envoi de {len(batch)} session(s) au serveur...")
+            try:
+                resp = requests.post(
+                    f"{config.API_BASE_URL}/users/me/playtime/batch",
+                    json={"sessions": batch}, headers=headers, timeout=10
+                )
+            except requests.exceptions.RequestException as e:
+                print(f"[Playtime] Serveur injoignable, sessions conservées ({e})")
+                return
+
+            if resp.status_code == 200:
+                # Les sessions invalides (durée hors bornes, horloge très en avance) sont écartées
+                # une par une par le serveur : les renvoyer ne changerait rien
+                data = resp.json()
+                storage.save_playtime_queue(queue[len(batch):])
+                print(f"[Playtime] Succès ! {data['accepted']} session(s) enregistrée(s).")
+                if data.get('rejected'):
+                    print(f"[Playtime] {len(data['rejected'])} session(s) invalide(s) abandonnée(s).")
+            else:
+                print(f"[Playtime] Erreur serveur : {resp.status_code}")
+
+    def _file_sha256(self, path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _refresh_save_manifest(self):
+        """Récupère (ou met à jour via le curseur since) le manifeste des saves cloud."""
+        headers = self._get_auth_headers()
+        if not headers:
+            return False
+
+        params = {'since': self._manifest_cursor} if self._manifest_cursor else {}
+        try:
+            resp = requests.get(f"{config.API_BASE_URL}/users/me/saves/manifest", params=params, headers=headers)
+        except requests.exceptions.RequestException as e:
+            print(f"[Sync] Manifeste indisponible: {e}")
+            return False
+
+        if resp.status_code != 200:
+            print(f"[Sync] Manifeste refusé: {resp.status_code}")
+            return False
+
+        data = resp.json()
+        with self._manifest_lock:
+            for entry in data['saves']:
+                self._save_manifest[str(entry['game_id'])] = entry
+            self._manifest_cursor = data.get('cursor') or self._manifest_cursor
+        print(f"[Sync] Manifeste cloud: {len(data['saves'])} save(s) mise(s) à jour.")
+        return True
+
+    def _watch_save_manifest(self):
+        """Rafraîchit le manifeste au démarrage puis à intervalle régulier (thread de fond)."""
+        while True:
+            self._refresh_save_manifest()
+            time.sleep(SAVE_MANIFEST_REFRESH)
 
     def _sync_down(self, game_id, save_path):
         print(f"[Sync] Checking Cloud for Game {game_id}...")
         try:
+            local_sha256 = self._file_sha256(save_path) if os.path.exists(save_path) else None
+
             headers = self._get_auth_headers()
-            info_resp = requests.get(f"{config.API_BASE_URL}/games/{game_id}/save/latest/info", headers=headers)
-            
-            if info_resp.status_code == 200:
-                server_data = info_resp.json()
-                from datetime import datetime
-                server_dt = datetime.fromisoformat(server_data['created_at'])
-                server_timestamp = server_dt.timestamp()
-
-                should_download = False
-                if not os.path.exists(save_path):
-                    print("[Sync] Pas de sauvegarde locale. Téléchargement...")
-                    should_download = True
+
+            # Une seule requête conditionnelle : le serveur répond 304 si la save
+            # locale a la même empreinte que la dernière save du cloud. Le manifeste,
+            # rafraîchi en arrière-plan, ne sert qu'à l'état de toute la bibliothèque.
+            if local_sha256:
+                headers["If-None-Match"] = f'"{local_sha256}"'
+
+            file_resp = requests.get(f"{config.API_BASE_URL}/games/{game_id}/save/latest", headers=headers)
+
+            if file_resp.status_code == 304:
+                print("[Sync] La sauvegarde locale est à jour.")
+            elif file_resp.status_code == 200:
+                if os.path.exists(save_path):
+                    # Ne pas écraser une progression locale plus récente qui n'a pas encore été envoyée.
+                    # Comparée à la date de la save elle-même (pas du blob, partagé entre saves identiques) ;
+                    # sur un stockage S3 l'en-tête est porté par la redirection vers le bucket.
+                    created_at = next((r.headers['X-Save-Created-At'] for r in [file_resp, *file_resp.history]
+                                       if 'X-Save-Created-At' in r.headers), None)
+                    if created_at and os.path.getmtime(save_path) > datetime.fromisoformat(created_at).timestamp():
+                        print("[Sync] Sauvegarde locale plus récente que le cloud, conservée.")
+                        return False
+                    print(f"[Sync] Serveur différent. Mise à jour...")
                 else:
-                    local_timestamp = os.path.getmtime(save_path)
-                    if server_timestamp > local_timestamp:
-                        print(f"[Sync] Serveur plus récent. Mise à jour...")
-                        should_download = True
-                    else:
-                        print("[Sync] La sauvegarde locale est à jour.")
-
-                if should_download:
-                    file_resp = requests.get(f"{config.API_BASE_URL}/games/{game_id}/save/latest", headers=headers)
-                    if file_resp.status_code == 200:
-                        with open(save_path, 'wb') as f:
-                            f.write(file_resp.content)
-                        print("[Sync] Succès : Fichier .sav mis à jour !")
-                        os.utime(save_path, (time.time(), time.time()))
-                        return True
+                    print("[Sync] Pas de sauvegarde locale. Téléchargement...")
+
+                tmp_path = f"{save_path}.download"
+                with open(tmp_path, 'wb') as f:
+                    f.write(file_resp.content)
+                os.replace(tmp_path, save_path)
+                print("[Sync] Succès : Fichier .sav mis à jour !")
+                os.utime(save_path, (time.time(), time.time()))
+                return True
             else:
                 print("[Sync] Aucune sauvegarde sur le cloud ou User inconnu.")
 
@@ -180,6 +278,12 @@ class JSApi:
             if resp.status_code == 200:
                 data = resp.json()
                 print(f"[Sync] Upload réussi ! Save ID: {data.get('save_id')}")
+                with self._manifest_lock:
+                    self._save_manifest[str(game_id)] = {
+                        'game_id': game_id,
+                        'save_id': data.get('save_id'),
+                        'sha256': data.get('sha256')
+                    }
             else:
                 print(f"[Sync] Erreur upload: {resp.status_code}")
         except Exception as e:
@@ -0,0 +1,106 @@
+import hashlib
+import os
+import time
+import requests
+
+CHUNK_SIZE = 1024 * 1024
+MAX_ATTEMPTS = 5
+
+# gzip/deflate (+ zstd/br si urllib3 sait les décoder) : le serveur envoie une ROM
+# précompressée et iter_content() la décompresse au fil de l'écriture sur disque
+ACCEPT_ENCODING = requests.utils.DEFAULT_ACCEPT_ENCODING
+
+
+class DownloadError(Exception):
+    pass
+
+
+def _hash_existing(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest
+
+
+def download_file(url, local_path, expected_sha256=None, headers=None):
+    """
+    Télécharge url vers local_path en passant par un fichier .part.
+    En cas de coupure, le téléchargement reprend là où il s'est arrêté
+    (Range + If-Range sur l'ETag reçue), puis l'empreinte finale est vérifiée.
+    Le transfert complet accepte une variante compressée ; une reprise porte
+    toujours sur les octets bruts (identity).
+    """
+    part_path = f"{local_path}.part"
+    etag_path = f"{part_path}.etag"
+    digest = None
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        etag = None
+        if offset and os.path.exists(etag_path):
+            with open(etag_path, 'r') as f:
+                etag = f.read().strip() or None
+
+        request_headers = dict(headers or {})
+        if offset and etag:
+            request_headers['Range'] = f"bytes={offset}-"
+            request_headers['If-Range'] = etag
+            request_headers['Accept-Encoding'] = 'identity'
+        else:
+            request_headers.setdefault('Accept-Encoding', ACCEPT_ENCODING)
+
+        try:
+            with requests.get(url, headers=request_headers, stream=True, timeout=30) as r:
+                if r.status_code == 416:
+                    # Le .part est déjà complet (ou invalide) : on laisse la vérification trancher
+                    break
+                r.raise_for_status()
+
+                if r.status_code == 206:
+                    mode = 'ab'
+                    digest = _hash_existing(part_path)
+                    print(f"[Download] Reprise à {offset} octets...")
+                else:
+                    mode = 'wb'
+                    digest = hashlib.sha256()
+
+                new_etag = r.headers.get('ETag')
+                if r.headers.get('Content-Encoding') and r.status_code == 200:
+                    # L'ETag reçue est celle de la variante compressée, inutilisable pour
+                    # reprendre sur les octets bruts ; celle du blob brut est son SHA-256.
+                    new_etag = f'"{expected_sha256}"' if expected_sha256 else None
+                    if new_etag is None and os.path.exists(etag_path):
+                        os.remove(etag_path)
+                if new_etag and not new_etag.startswith('W/'):
+                    with open(etag_path, 'w') as f:
+                        f.write(new_etag)
+
+                with open(part_path, mode) as f:
+                    for chunk in r.iter_content(CHUNK_SIZE):
+                        f.write(chunk)
+                        digest.update(chunk)
+            break
+        except (requests.exceptions.ConnectionError, requests.exceptions.ChunkedEncodingError,
+                requests.exceptions.Timeout) as e:
+            if attempt == MAX_ATTEMPTS:
+                raise DownloadError(f"Téléchargement interrompu: {e}")
+            print(f"[Download] Connexion perdue ({e}), nouvelle tentative {attempt + 1}/{MAX_ATTEMPTS}...")
+            digest = None
+            time.sleep(min(2 ** attempt, 30))
+
+    if not os.path.exists(part_path):
+        raise DownloadError("Téléchargement vide.")
+
+    if expected_sha256:
+        actual = (digest or _hash_existing(part_path)).hexdigest()
+        if actual != expected_sha256:
+            os.remove(part_path)
+            if os.path.exists(etag_path):
+                os.remove(etag_path)
+            raise DownloadError("Empreinte SHA-256 invalide, fichier supprimé.")
+
+    os.replace(part_path, local_path)
+    if os.path.exists(etag_path):
+        os.remove(etag_path)
+    return local_path
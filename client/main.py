@@ -14,6 +14,17 @@ if __name__ == '__main__':
 
     js_api = JSApi()
 
+    # État des saves cloud de toute la bibliothèque : une requête au démarrage, puis
+    # rafraîchissement incrémental périodique (le lancement d'un jeu n'en dépend pas)
+    manifest_thread = threading.Thread(target=js_api._watch_save_manifest)
+    manifest_thread.daemon = True
+    manifest_thread.start()
+
+    # Sessions de jeu restées en file (serveur injoignable lors d'une partie précédente)
+    playtime_thread = threading.Thread(target=js_api._flush_playtime)
+    playtime_thread.daemon = True
+    playtime_thread.start()
+
     local_config = storage.load_local_config()
     start_fullscreen = local_config.get('fullscreen', False)
 
@@ -1,9 +1,11 @@
+import copy
 import os
-import shutil
 import requests
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
 import config
 import storage
+import downloader
+import uploader
 from functools import wraps
 
 app = Flask(__name__)
@@ -150,46 +152,74 @@ def logout():
     flash("You have been logged out.", "success")
     return redirect(url_for('login_page'))
 
-@app.route('/')
-@login_required
-def list_games():
-    filter_platform_id = request.args.get('platform_id')
-    search_query = request.args.get('q')
-
-    games = []
+GAMES_PAGE_SIZE = 48
+CATALOG_CACHE_MAX_ENTRIES = 256
+
+# Dernière réponse reçue par URL du catalogue, revalidée par ETag (304 = rien à retransférer)
+_catalog_responses = {}
+
+def get_catalog(path, params):
+    key = (path, tuple(sorted(params.items())))
+    cached = _catalog_responses.get(key)
+    headers = {'If-None-Match': cached[0]} if cached else {}
+
+    resp = requests.get(f"{config.API_BASE_URL}{path}", params=params, headers=headers)
+    if resp.status_code == 304 and cached:
+        return copy.deepcopy(cached[1])
+    if resp.status_code != 200:
+        return None
+
+    data = resp.json()
+    etag = resp.headers.get('ETag')
+    if etag:
+        if len(_catalog_responses) >= CATALOG_CACHE_MAX_ENTRIES:
+            _catalog_responses.clear()
+        _catalog_responses[key] = (etag, copy.deepcopy(data))
+    return data
+
+def fetch_all_platforms():
+    """Parcourt toutes les pages de /platforms/ (pagination par curseur)."""
     platforms = []
-    
-    try:
-        platforms_resp = requests.get(f"{config.API_BASE_URL}/platforms/")
-        if platforms_resp.status_code == 200:
-            platforms = platforms_resp.json()
-
-        api_params = {}
-        
-        if filter_platform_id:
-            api_params['platform_id'] = filter_platform_id
-            
-        if search_query:
-            api_params['search'] = search_query
-
-        games_resp = requests.get(f"{config.API_BASE_URL}/games/", params=api_params)
-        
-        if games_resp.status_code == 200:
-            games = games_resp.json()
-            
-    except requests.exceptions.ConnectionError:
-        flash("API offline.", "error")
-
-    user_stats = {}
+    params = {'limit': 200}
+    while True:
+        data = get_catalog("/platforms/", params)
+        if data is None:
+            break
+        platforms.extend(data['items'])
+        if not data.get('next_cursor'):
+            break
+        params['cursor'] = data['next_cursor']
+    return platforms
+
+def fetch_games_page(platform_id=None, search=None, cursor=None):
+    api_params = {'limit': GAMES_PAGE_SIZE}
+
+    if platform_id:
+        api_params['platform_id'] = platform_id
+
+    if search:
+        api_params['search'] = search
+
+    if cursor:
+        api_params['cursor'] = cursor
+
+    data = get_catalog("/games/", api_params)
+    if data is not None:
+        return data['items'], data.get('next_cursor')
+    return [], None
+
+def fetch_user_stats():
     try:
         # On utilise le token de session pour s'auth auprès de l'API
         headers = {"Authorization": f"Bearer {session.get('user_token')}"}
         stats_resp = requests.get(f"{config.API_BASE_URL}/users/me/stats", headers=headers)
         if stats_resp.status_code == 200:
-            user_stats = stats_resp.json() # { "1": 500, "2": 30... }
+            return stats_resp.json() # { "1": 500, "2": 30... }
     except:
         pass
+    return {}
 
+def annotate_games(games, user_stats):
     local_library = storage.load_local_library()
     for game in games:
         game_id_str = str(game['id'])
@@ -199,6 +229,25 @@ def list_games():
             game['playtime_seconds'] = user_stats.get(game_id_str, 0)
         else:
             game['is_installed'] = False
+    return games
+
+@app.route('/')
+@login_required
+def list_games():
+    filter_platform_id = request.args.get('platform_id')
+    search_query = request.args.get('q')
+
+    games = []
+    platforms = []
+    next_cursor = None
+    
+    try:
+        platforms = fetch_all_platforms()
+        games, next_cursor = fetch_games_page(filter_platform_id, search_query)
+    except requests.exceptions.ConnectionError:
+        flash("API offline.", "error")
+
+    annotate_games(games, fetch_user_stats())
 
     return render_template(
         'games_list.html', 
@@ -206,9 +255,47 @@ def list_games():
         platforms=platforms, 
         active_filter=filter_platform_id,
         active_search=search_query,
+        next_cursor=next_cursor,
         api_base_url=config.API_BASE_URL
     )
 
+@app.route('/games/suggest')
+@login_required
+def games_suggest():
+    """Relais de /games/typeahead pour la barre de recherche."""
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify([])
+
+    params = {'q': q}
+    if request.args.get('platform_id'):
+        params['platform_id'] = request.args.get('platform_id')
+
+    try:
+        resp = requests.get(f"{config.API_BASE_URL}/games/typeahead", params=params, timeout=5)
+        if resp.status_code == 200:
+            return jsonify(resp.json())
+    except requests.exceptions.RequestException:
+        pass
+    return jsonify([])
+
+@app.route('/games/page')
+@login_required
+def games_page():
+    """Page suivante de la grille (défilement infini) : fragment HTML + curseur en en-tête."""
+    try:
+        games, next_cursor = fetch_games_page(
+            request.args.get('platform_id'),
+            request.args.get('q'),
+            request.args.get('cursor')
+        )
+    except requests.exceptions.ConnectionError:
+        return "", 503
+
+    annotate_games(games, fetch_user_stats())
+    html = render_template('_game_cards.html', games=games, api_base_url=config.API_BASE_URL)
+    return html, 200, {'X-Next-Cursor': next_cursor or ''}
+
 @app.route('/platforms/new', methods=['GET'])
 @login_required
 def new_platform_form():
@@ -242,9 +329,7 @@ def create_platform_logic():
 def new_game_form():
     platforms = []
     try:
-        response = requests.get(f"{config.API_BASE_URL}/platforms/")
-        if response.status_code == 200:
-            platforms = response.json()
+        platforms = fetch_all_platforms()
     except:
         flash("Erreur chargement plateformes.", "error")
     return render_template('create_game.html', platforms=platforms)
@@ -261,18 +346,18 @@ def create_game_logic():
         flash("Fichier ROM obligatoire.", "error")
         return redirect(url_for('new_game_form'))
 
-    payload = {'title': title, 'platform_id': platform_id}
-    files = {'rom': (rom_file.filename, rom_file.read(), rom_file.content_type)}
-    
+    cover = None
     if cover_file and cover_file.filename != '':
-        files['cover'] = (cover_file.filename, cover_file.read(), cover_file.content_type)
+        cover = (cover_file.filename, cover_file.read(), cover_file.content_type)
 
     try:
-        response = requests.post(f"{config.API_BASE_URL}/games/", data=payload, files=files)
-        if response.status_code == 200:
-            flash("Jeu ajouté avec succès !", "success")
-        else:
-            flash("Erreur lors de l'ajout.", "error")
+        # La ROM est lue morceau par morceau depuis le fichier temporaire de Flask
+        uploader.upload_game(rom_file.stream, rom_file.filename, title, platform_id, cover=cover)
+        flash("Jeu ajouté avec succès !", "success")
+    except uploader.UploadError as e:
+        flash(f"Erreur lors de l'ajout: {e}", "error")
+    except requests.exceptions.HTTPError:
+        flash("Erreur lors de l'ajout.", "error")
     except:
         flash("Erreur connexion API.", "error")
 
@@ -282,8 +367,8 @@ def create_game_logic():
 @login_required
 def install_game(game_id):
     try:
-        all_games = requests.get(f"{config.API_BASE_URL}/games/").json()
-        game_info = next((g for g in all_games if g['id'] == game_id), None)
+        game_resp = requests.get(f"{config.API_BASE_URL}/games/{game_id}")
+        game_info = game_resp.json() if game_resp.status_code == 200 else None
 
         if not game_info:
             flash("Jeu introuvable.", "error")
@@ -295,10 +380,7 @@ def install_game(game_id):
         local_filename = f"{safe_title}{ext}"
         local_path = os.path.join(config.DOCUMENTS_DIR, local_filename)
 
-        with requests.get(rom_url, stream=True) as r:
-            r.raise_for_status()
-            with open(local_path, 'wb') as f:
-                shutil.copyfileobj(r.raw, f)
+        downloader.download_file(rom_url, local_path, expected_sha256=game_info.get('rom_sha256'))
 
         library = storage.load_local_library()
         library[str(game_id)] = local_path
@@ -315,9 +397,7 @@ def install_game(game_id):
 def settings_page():
     platforms = []
     try:
-        response = requests.get(f"{config.API_BASE_URL}/platforms/")
-        if response.status_code == 200:
-            platforms = response.json()
+        platforms = fetch_all_platforms()
     except:
         flash("API Offline.", "error")
 
@@ -1,7 +1,7 @@
 import json
 import os
 import re
-from config import LIBRARY_FILE, CONFIG_FILE, AUTH_FILE
+from config import LIBRARY_FILE, CONFIG_FILE, AUTH_FILE, UPLOADS_FILE, PLAYTIME_QUEUE_FILE
 
 def load_json(filename):
     if not os.path.exists(filename):
@@ -32,6 +32,18 @@ def load_local_config():
 def save_local_config(data):
     save_json(CONFIG_FILE, data)
 
+def load_pending_uploads():
+    return load_json(UPLOADS_FILE)
+
+def save_pending_uploads(data):
+    save_json(UPLOADS_FILE, data)
+
+def load_playtime_queue():
+    return load_json(PLAYTIME_QUEUE_FILE).get('sessions', [])
+
+def save_playtime_queue(sessions):
+    save_json(PLAYTIME_QUEUE_FILE, {'sessions': sessions})
+
 def sanitize_filename(name):
     return re.sub(r'[\\/*?:"<>|]', "", name)
 
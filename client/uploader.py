@@ -0,0 +1,103 @@
+import hashlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import requests
+import config
+import storage
+
+CHUNK_SIZE = 8 * 1024 * 1024
+PARALLEL_UPLOADS = 4
+MAX_CHUNK_ATTEMPTS = 5
+
+
+class UploadError(Exception):
+    pass
+
+
+def _hash_stream(fileobj):
+    digest = hashlib.sha256()
+    size = 0
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest(), size
+
+
+def _resume_session(upload_id):
+    try:
+        resp = requests.get(f"{config.API_BASE_URL}/uploads/{upload_id}")
+        if resp.status_code == 200 and resp.json()['status'] == 'open':
+            return resp.json()
+    except requests.exceptions.RequestException:
+        pass
+    return None
+
+
+def upload_game(fileobj, filename, title, platform_id, cover=None):
+    """
+    Envoie une ROM via le protocole d'upload par morceaux du serveur.
+    Les morceaux partent en parallèle sur plusieurs connexions ; une session
+    interrompue est reprise (même fichier = même SHA-256) en n'envoyant que
+    les morceaux manquants.
+    """
+    sha256, size = _hash_stream(fileobj)
+
+    pending = storage.load_pending_uploads()
+    status = _resume_session(pending[sha256]) if sha256 in pending else None
+
+    if status is None:
+        resp = requests.post(f"{config.API_BASE_URL}/uploads/", json={
+            "title": title,
+            "platform_id": int(platform_id),
+            "filename": filename,
+            "size": size,
+            "sha256": sha256,
+            "chunk_size": CHUNK_SIZE
+        })
+        resp.raise_for_status()
+        status = resp.json()
+        pending[sha256] = status['id']
+        storage.save_pending_uploads(pending)
+    else:
+        print(f"[Upload] Reprise de la session {status['id']} ({status['offset']} octets déjà envoyés)")
+
+    upload_id = status['id']
+    chunk_size = status['chunk_size']
+    received = set(status['received_chunks'])
+    missing = [] if status.get('duplicate') else [i for i in range(status['total_chunks']) if i not in received]
+
+    read_lock = threading.Lock()
+
+    def send_chunk(index):
+        with read_lock:
+            fileobj.seek(index * chunk_size)
+            data = fileobj.read(chunk_size)
+        headers = {"X-Chunk-SHA256": hashlib.sha256(data).hexdigest()}
+        url = f"{config.API_BASE_URL}/uploads/{upload_id}/chunks/{index}"
+
+        for attempt in range(1, MAX_CHUNK_ATTEMPTS + 1):
+            try:
+                resp = requests.put(url, data=data, headers=headers)
+                if resp.status_code == 200:
+                    return
+                print(f"[Upload] Morceau {index} refusé ({resp.status_code}), tentative {attempt}/{MAX_CHUNK_ATTEMPTS}")
+            except requests.exceptions.RequestException as e:
+                print(f"[Upload] Morceau {index} interrompu ({e}), tentative {attempt}/{MAX_CHUNK_ATTEMPTS}")
+            time.sleep(min(2 ** attempt, 30))
+        raise UploadError(f"Impossible d'envoyer le morceau {index}.")
+
+    with ThreadPoolExecutor(max_workers=PARALLEL_UPLOADS) as pool:
+        list(pool.map(send_chunk, missing))
+
+    files = {'cover': cover} if cover else None
+    resp = requests.post(f"{config.API_BASE_URL}/uploads/{upload_id}/finalize", files=files)
+    if resp.status_code != 200:
+        raise UploadError(f"Finalisation refusée ({resp.status_code}).")
+
+    pending = storage.load_pending_uploads()
+    pending.pop(sha256, None)
+    storage.save_pending_uploads(pending)
+    return resp.json()
@@ -0,0 +1,30 @@
+"""Add upload session activity timestamp
+
+Revision ID: 0ba8d9102b7f
+Revises: 2b6b93012658
+Create Date: 2026-10-18 19:12:44.105237
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0ba8d9102b7f'
+down_revision: Union[str, Sequence[str], None] = '2b6b93012658'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('upload_sessions', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
@@ -0,0 +1,52 @@
+"""Add composite save index and latest save pointer
+
+Revision ID: 213573b64c7b
+Revises: a689d6a42d81
+Create Date: 2026-10-18 10:41:55.873120
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '213573b64c7b'
+down_revision: Union[str, Sequence[str], None] = 'a689d6a42d81'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_saves_user_game_created', 'saves', ['user_id', 'game_id', 'created_at'], unique=False)
+    op.create_table('save_heads',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('latest_save_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['game_id'], ['games.id'], ),
+    sa.ForeignKeyConstraint(['latest_save_id'], ['saves.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'game_id')
+    )
+
+    # Initialise les pointeurs à partir de l'historique existant
+    op.execute("""
+        INSERT INTO save_heads (user_id, game_id, latest_save_id)
+        SELECT s.user_id, s.game_id, (
+            SELECT s2.id FROM saves s2
+            WHERE s2.user_id = s.user_id AND s2.game_id = s.game_id
+            ORDER BY s2.created_at DESC, s2.id DESC
+            LIMIT 1
+        )
+        FROM saves s
+        WHERE s.user_id IS NOT NULL AND s.game_id IS NOT NULL
+        GROUP BY s.user_id, s.game_id
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('save_heads')
+    op.drop_index('ix_saves_user_game_created', table_name='saves')
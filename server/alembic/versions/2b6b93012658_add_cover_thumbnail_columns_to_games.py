@@ -0,0 +1,34 @@
+"""Add cover thumbnail columns to games
+
+Revision ID: 2b6b93012658
+Revises: bcc45be871a1
+Create Date: 2026-10-18 17:31:08.270419
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2b6b93012658'
+down_revision: Union[str, Sequence[str], None] = 'bcc45be871a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cover_thumb_path', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('cover_bg_path', sa.String(), nullable=True))
+        batch_op.add_column(sa.Column('cover_placeholder', sa.Text(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.drop_column('cover_placeholder')
+        batch_op.drop_column('cover_bg_path')
+        batch_op.drop_column('cover_thumb_path')
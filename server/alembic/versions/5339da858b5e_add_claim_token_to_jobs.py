@@ -0,0 +1,30 @@
+"""Add claim token to jobs
+
+Revision ID: 5339da858b5e
+Revises: ddc419f9aed0
+Create Date: 2026-10-18 21:48:16.330574
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5339da858b5e'
+down_revision: Union[str, Sequence[str], None] = 'ddc419f9aed0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('claim_token', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('jobs', schema=None) as batch_op:
+        batch_op.drop_column('claim_token')
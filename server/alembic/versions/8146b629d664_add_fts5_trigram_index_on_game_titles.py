@@ -0,0 +1,60 @@
+"""Add FTS5 trigram index on game titles
+
+Revision ID: 8146b629d664
+Revises: a9defcbbbab4
+Create Date: 2026-10-18 14:02:17.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8146b629d664'
+down_revision: Union[str, Sequence[str], None] = 'a9defcbbbab4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    # Table à contenu externe : seul l'index est stocké, le texte reste dans games
+    op.execute(
+        "CREATE VIRTUAL TABLE games_fts USING fts5("
+        "title, content='games', content_rowid='id', tokenize='trigram')"
+    )
+
+    op.execute(
+        "CREATE TRIGGER games_fts_ai AFTER INSERT ON games BEGIN "
+        "INSERT INTO games_fts(rowid, title) VALUES (new.id, new.title); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER games_fts_ad AFTER DELETE ON games BEGIN "
+        "INSERT INTO games_fts(games_fts, rowid, title) VALUES ('delete', old.id, old.title); "
+        "END"
+    )
+    op.execute(
+        "CREATE TRIGGER games_fts_au AFTER UPDATE OF title ON games BEGIN "
+        "INSERT INTO games_fts(games_fts, rowid, title) VALUES ('delete', old.id, old.title); "
+        "INSERT INTO games_fts(rowid, title) VALUES (new.id, new.title); "
+        "END"
+    )
+
+    op.execute("INSERT INTO games_fts(games_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+
+    op.execute("DROP TRIGGER IF EXISTS games_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS games_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS games_fts_ai")
+    op.execute("DROP TABLE IF EXISTS games_fts")
@@ -0,0 +1,34 @@
+"""Add ROM digest and size to Game
+
+Revision ID: 81c148c70f63
+Revises: 8c74f33f410e
+Create Date: 2026-10-18 09:12:40.114205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '81c148c70f63'
+down_revision: Union[str, Sequence[str], None] = '8c74f33f410e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('rom_sha256', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('rom_size', sa.BigInteger(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_games_rom_sha256'), ['rom_sha256'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('games', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_games_rom_sha256'))
+        batch_op.drop_column('rom_size')
+        batch_op.drop_column('rom_sha256')
@@ -0,0 +1,32 @@
+"""Add content hash and size to Save
+
+Revision ID: 93f7922c6043
+Revises: 213573b64c7b
+Create Date: 2026-10-18 11:20:08.341976
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '93f7922c6043'
+down_revision: Union[str, Sequence[str], None] = '213573b64c7b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('saves', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('sha256', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('size', sa.BigInteger(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('saves', schema=None) as batch_op:
+        batch_op.drop_column('size')
+        batch_op.drop_column('sha256')
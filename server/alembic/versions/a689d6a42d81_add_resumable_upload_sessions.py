@@ -0,0 +1,51 @@
+"""Add resumable upload sessions
+
+Revision ID: a689d6a42d81
+Revises: 81c148c70f63
+Create Date: 2026-10-18 10:03:17.502381
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a689d6a42d81'
+down_revision: Union[str, Sequence[str], None] = '81c148c70f63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('upload_sessions',
+    sa.Column('id', sa.String(length=32), nullable=False),
+    sa.Column('title', sa.String(), nullable=False),
+    sa.Column('platform_id', sa.Integer(), nullable=True),
+    sa.Column('filename', sa.String(), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('chunk_size', sa.Integer(), nullable=False),
+    sa.Column('expected_sha256', sa.String(length=64), nullable=True),
+    sa.Column('status', sa.String(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('game_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['game_id'], ['games.id'], ),
+    sa.ForeignKeyConstraint(['platform_id'], ['platforms.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('upload_chunks',
+    sa.Column('upload_id', sa.String(length=32), nullable=False),
+    sa.Column('index', sa.Integer(), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.ForeignKeyConstraint(['upload_id'], ['upload_sessions.id'], ),
+    sa.PrimaryKeyConstraint('upload_id', 'index')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('upload_chunks')
+    op.drop_table('upload_sessions')
@@ -0,0 +1,28 @@
+"""Add (platform_id, title) index to games for keyset pagination
+
+Revision ID: a9defcbbbab4
+Revises: 93f7922c6043
+Create Date: 2026-10-18 12:34:51.207733
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9defcbbbab4'
+down_revision: Union[str, Sequence[str], None] = '93f7922c6043'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_games_platform_title', 'games', ['platform_id', 'title'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_games_platform_title', table_name='games')
@@ -0,0 +1,41 @@
+"""Add IGDB lookup cache and shared token tables
+
+Revision ID: bcc45be871a1
+Revises: 6b941a638303
+Create Date: 2026-10-18 16:48:26.553017
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'bcc45be871a1'
+down_revision: Union[str, Sequence[str], None] = '6b941a638303'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('igdb_cache',
+    sa.Column('query', sa.String(), nullable=False),
+    sa.Column('cover_url', sa.String(), nullable=True),
+    sa.Column('fetched_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('query')
+    )
+    op.create_table('igdb_tokens',
+    sa.Column('client_id', sa.String(), nullable=False),
+    sa.Column('access_token', sa.String(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('client_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('igdb_tokens')
+    op.drop_table('igdb_cache')
@@ -0,0 +1,62 @@
+"""Add play sessions log and daily playtime rollups
+
+Revision ID: c29cdcaeb213
+Revises: 86d1c05e8637
+Create Date: 2026-10-18 15:20:44.905116
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c29cdcaeb213'
+down_revision: Union[str, Sequence[str], None] = '86d1c05e8637'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('play_sessions',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('seconds', sa.Integer(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.Column('ended_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['game_id'], ['games.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_play_sessions_user_ended', 'play_sessions', ['user_id', 'ended_at'], unique=False)
+    op.create_table('playtime_daily',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('seconds', sa.Integer(), nullable=False),
+    sa.Column('sessions', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['game_id'], ['games.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'game_id', 'day')
+    )
+    op.create_index('ix_playtime_daily_user_day', 'playtime_daily', ['user_id', 'day'], unique=False)
+    op.create_table('game_playtime_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('game_id', sa.Integer(), nullable=False),
+    sa.Column('seconds', sa.Integer(), nullable=False),
+    sa.Column('sessions', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['game_id'], ['games.id'], ),
+    sa.PrimaryKeyConstraint('day', 'game_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('game_playtime_daily')
+    op.drop_index('ix_playtime_daily_user_day', table_name='playtime_daily')
+    op.drop_table('playtime_daily')
+    op.drop_index('ix_play_sessions_user_ended', table_name='play_sessions')
+    op.drop_table('play_sessions')
@@ -0,0 +1,32 @@
+"""Add client session id to play sessions
+
+Revision ID: ddc419f9aed0
+Revises: 0ba8d9102b7f
+Create Date: 2026-10-18 21:05:37.512906
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ddc419f9aed0'
+down_revision: Union[str, Sequence[str], None] = '0ba8d9102b7f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('play_sessions', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('session_id', sa.String(length=36), nullable=True))
+        batch_op.create_index('ux_play_sessions_user_session', ['user_id', 'session_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('play_sessions', schema=None) as batch_op:
+        batch_op.drop_index('ux_play_sessions_user_session')
+        batch_op.drop_column('session_id')
@@ -0,0 +1,36 @@
+"""
+Recherche sur IGDB les jaquettes manquantes de tout le catalogue.
+
+    python backfill_covers.py [--limit N]
+    python backfill_covers.py --thumbnails [--limit N]
+
+Même traitement que POST /admin/covers/backfill, mais exécuté au premier plan.
+--thumbnails génère les vignettes des jaquettes existantes (Pillow requis).
+"""
+import argparse
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import covers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill missing game covers from IGDB.")
+    parser.add_argument("--limit", type=int, default=None, help="maximum number of games to process")
+    parser.add_argument("--thumbnails", action="store_true", help="generate missing cover thumbnails instead")
+    args = parser.parse_args()
+
+    if args.thumbnails:
+        stats = covers.backfill_missing_thumbnails(limit=args.limit)
+        print(f"{stats['games']} games scanned, {stats['generated']} thumbnails generated, {stats['errors']} errors.")
+        return
+
+    stats = covers.backfill_missing_covers(limit=args.limit)
+    print(f"{stats['games']} games scanned, {stats['resolved']} covers found, "
+          f"{stats['attached']} attached, {stats['errors']} download errors.")
+
+
+if __name__ == "__main__":
+    main()
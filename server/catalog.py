@@ -0,0 +1,67 @@
+import hashlib
+import json
+
+from fastapi import Request, Response
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import media
+import models
+from cache import LRUCache
+
+CATALOG_VERSION_ID = 1
+
+
+async def current_version(db: AsyncSession):
+    result = await db.execute(
+        select(models.CatalogVersion.version).where(models.CatalogVersion.id == CATALOG_VERSION_ID)
+    )
+    return result.scalar() or 0
+
+
+def bump_version_statement():
+    return update(models.CatalogVersion)\
+        .where(models.CatalogVersion.id == CATALOG_VERSION_ID)\
+        .values(version=models.CatalogVersion.version + 1)
+
+
+async def bump_version(db: AsyncSession):
+    """À appeler dans la transaction qui modifie le catalogue (commit par l'appelant)."""
+    await db.execute(bump_version_statement())
+
+
+class CatalogCache:
+    """
+    Réponses JSON du catalogue déjà sérialisées, indexées par (route, version, paramètres).
+    Une modification du catalogue change la version : les anciennes entrées ne sont
+    plus jamais lues et finissent évincées par le LRU.
+    """
+
+    def __init__(self, maxsize=256):
+        self.responses = LRUCache(maxsize=maxsize)
+        self.not_modified = 0
+
+    async def respond(self, request: Request, db: AsyncSession, name, params, build):
+        """build() est une coroutine qui renvoie le corps JSON (str ou bytes) à mettre en cache."""
+        version = await current_version(db)
+        params_key = json.dumps([name, params], sort_keys=True, default=str)
+        etag = f'W/"{version}-{hashlib.sha1(params_key.encode("utf-8")).hexdigest()[:16]}"'
+        # no-cache : le client garde la réponse mais revalide toujours (304 quasi gratuit)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and media.etag_matches(if_none_match, etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        key = (version, params_key)
+        body = self.responses.get(key)
+        if body is None:
+            body = await build()
+            self.responses.set(key, body)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def stats(self):
+        stats = self.responses.stats()
+        stats["not_modified"] = self.not_modified
+        return stats
@@ -0,0 +1,183 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select, update
+
+import catalog
+import jobs
+import models
+import storage
+import thumbnails
+from database import SessionLocal
+from igdb_service import igdb, IGDB_MAX_CONCURRENCY
+
+COVER_DOWNLOAD_TIMEOUT = float(os.getenv("COVER_DOWNLOAD_TIMEOUT", "30"))
+BACKFILL_BATCH_SIZE = 200
+
+
+def download_cover(url):
+    """Télécharge une jaquette IGDB dans le stockage et renvoie sa clé."""
+    # Les URLs d'images IGDB sont immuables : leur empreinte sert de nom versionné, et un même
+    # titre sur plusieurs plateformes ne télécharge qu'une jaquette
+    key = storage.sharded_key("covers", hashlib.sha256(url.encode("utf-8")).hexdigest(), ".jpg")
+
+    if not storage.backend.exists(key):
+        response = igdb.http.get(url, timeout=COVER_DOWNLOAD_TIMEOUT)
+        response.raise_for_status()
+        storage.backend.put_bytes(response.content, key)
+
+    return key
+
+
+def attach_covers(covers):
+    """Attache {game_id: cover_path} aux jeux qui n'ont toujours pas de jaquette ; renvoie le nombre attaché."""
+    attached = 0
+    with SessionLocal() as db:
+        for game_id, cover_path in covers.items():
+            # Une jaquette envoyée entre-temps par l'utilisateur n'est jamais écrasée
+            result = db.execute(
+                update(models.Game)
+                .where(models.Game.id == game_id, models.Game.cover_path.is_(None))
+                .values(cover_path=cover_path)
+                .execution_options(synchronize_session=False)
+            )
+            if result.rowcount:
+                attached += 1
+                jobs.enqueue(db, "cover_thumbnails", {"game_id": game_id})
+        if attached:
+            db.execute(catalog.bump_version_statement())
+        db.commit()
+    if attached:
+        jobs.pool.notify()
+    return attached
+
+
+def fetch_cover(game_id, title):
+    scraped_url = igdb.search_game(title)
+    if not scraped_url:
+        print(f"[Cover] No IGDB cover for game {game_id}.")
+        return False
+
+    if attach_covers({game_id: download_cover(scraped_url)}):
+        print(f"[Cover] Cover attached to game {game_id}.")
+        return True
+    return False
+
+
+def backfill_missing_covers(limit=None, heartbeat=None):
+    """
+    Cherche une jaquette pour chaque jeu du catalogue qui n'en a pas, par paquets :
+    résolution IGDB en multiquery, téléchargements en parallèle, puis une transaction par paquet.
+    heartbeat() est appelé après chaque paquet (bail du job qui exécute le backfill).
+    """
+    stats = {"games": 0, "resolved": 0, "attached": 0, "errors": 0}
+    last_id = 0
+
+    with ThreadPoolExecutor(max_workers=IGDB_MAX_CONCURRENCY) as downloads:
+        while limit is None or stats["games"] < limit:
+            batch_size = BACKFILL_BATCH_SIZE if limit is None else min(BACKFILL_BATCH_SIZE, limit - stats["games"])
+            with SessionLocal() as db:
+                rows = db.execute(
+                    select(models.Game.id, models.Game.title)
+                    .where(models.Game.cover_path.is_(None), models.Game.id > last_id)
+                    .order_by(models.Game.id)
+                    .limit(batch_size)
+                ).all()
+            if not rows:
+                break
+
+            last_id = rows[-1].id
+            stats["games"] += len(rows)
+
+            urls = igdb.search_games_bulk([row.title for row in rows])
+            targets = [(row.id, urls[row.title]) for row in rows if urls.get(row.title)]
+            stats["resolved"] += len(targets)
+
+            def download(target):
+                game_id, url = target
+                try:
+                    return game_id, download_cover(url)
+                except Exception as e:
+                    print(f"[Cover] Download failed for game {game_id}: {e}")
+                    return game_id, None
+
+            covers = {}
+            for game_id, cover_path in downloads.map(download, targets):
+                if cover_path:
+                    covers[game_id] = cover_path
+                else:
+                    stats["errors"] += 1
+
+            stats["attached"] += attach_covers(covers)
+            print(f"[Cover] Backfill: {stats['games']} games scanned, {stats['attached']} covers attached.")
+            if heartbeat is not None:
+                heartbeat()
+
+    return stats
+
+
+def generate_thumbnails(game_id):
+    """Calcule les variantes de la jaquette actuelle du jeu et les enregistre ; renvoie False sans Pillow."""
+    if not thumbnails.available():
+        print("[Cover] Pillow not installed, thumbnails skipped.")
+        return False
+
+    with SessionLocal() as db:
+        cover_path = db.execute(select(models.Game.cover_path).where(models.Game.id == game_id)).scalar()
+    if not cover_path:
+        return False
+
+    variants = thumbnails.generate_cover_variants(cover_path)
+    with SessionLocal() as db:
+        # La jaquette a pu changer pendant le calcul : on n'écrit que si c'est toujours la même
+        result = db.execute(
+            update(models.Game)
+            .where(models.Game.id == game_id, models.Game.cover_path == cover_path)
+            .values(
+                cover_thumb_path=variants.thumb_path,
+                cover_bg_path=variants.background_path,
+                cover_placeholder=variants.placeholder
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount:
+            db.execute(catalog.bump_version_statement())
+        db.commit()
+    return result.rowcount > 0
+
+
+def backfill_missing_thumbnails(limit=None):
+    """Génère les vignettes des jeux qui ont une jaquette mais pas encore de variantes."""
+    stats = {"games": 0, "generated": 0, "errors": 0}
+    if not thumbnails.available():
+        print("[Cover] Pillow not installed, thumbnails skipped.")
+        return stats
+
+    last_id = 0
+    while limit is None or stats["games"] < limit:
+        with SessionLocal() as db:
+            game_ids = db.execute(
+                select(models.Game.id)
+                .where(
+                    models.Game.cover_path.is_not(None),
+                    models.Game.cover_thumb_path.is_(None),
+                    models.Game.id > last_id
+                )
+                .order_by(models.Game.id)
+                .limit(BACKFILL_BATCH_SIZE)
+            ).scalars().all()
+        if not game_ids:
+            break
+
+        last_id = game_ids[-1]
+        for game_id in game_ids[:None if limit is None else limit - stats["games"]]:
+            stats["games"] += 1
+            try:
+                if generate_thumbnails(game_id):
+                    stats["generated"] += 1
+            except Exception as e:
+                print(f"[Cover] Thumbnails failed for game {game_id}: {e}")
+                stats["errors"] += 1
+
+    return stats
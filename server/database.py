@@ -1,12 +1,135 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import os
+from sqlalchemy import create_engine, event, Insert, Update, Delete
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./app.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./app.db")
 
-engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
-)
+# Profil SQLite de production (surchargeable via .env)
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536"))
+SQLITE_MMAP_SIZE_MB = int(os.getenv("SQLITE_MMAP_SIZE_MB", "256"))
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+IS_SQLITE = SQLALCHEMY_DATABASE_URL.startswith("sqlite")
+
+# Driver asynchrone utilisé par l'API (l'URL synchrone reste celle d'Alembic)
+DEFAULT_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+
+def _async_url(url):
+    backend, rest = url.split("://", 1)
+    backend = backend.split("+", 1)[0]
+    driver = os.getenv("DATABASE_ASYNC_DRIVER", DEFAULT_ASYNC_DRIVERS.get(backend, ""))
+    return f"{backend}+{driver}://{rest}" if driver else url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(SQLALCHEMY_DATABASE_URL)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    # On laisse SQLAlchemy émettre les BEGIN lui-même (voir _begin_*)
+    dbapi_connection.isolation_level = None
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}")
+    cursor.execute(f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KB}")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE_MB * 1024 * 1024}")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+def _begin_deferred(conn):
+    conn.exec_driver_sql("BEGIN")
+
+
+def _begin_immediate(conn):
+    # Le verrou d'écriture est pris dès le BEGIN : pas d'upgrade lecture -> écriture
+    # qui échouerait en "database is locked" sous WAL
+    conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def _create_engine(pool_size, max_overflow, begin):
+    if not IS_SQLITE:
+        return create_engine(
+            SQLALCHEMY_DATABASE_URL,
+            pool_size=pool_size, max_overflow=max_overflow, pool_timeout=DB_POOL_TIMEOUT
+        )
+
+    sqlite_engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        pool_size=pool_size, max_overflow=max_overflow, pool_timeout=DB_POOL_TIMEOUT
+    )
+    event.listen(sqlite_engine, "connect", _apply_sqlite_pragmas)
+    event.listen(sqlite_engine, "begin", begin)
+    return sqlite_engine
+
+
+# Lectures : pool de connexions concurrentes (WAL => les lecteurs ne bloquent pas)
+engine = _create_engine(DB_POOL_SIZE, DB_MAX_OVERFLOW, _begin_deferred)
+
+# Écritures : une seule connexion, donc un seul writer à la fois dans le process ;
+# les autres attendent leur tour dans le pool au lieu de se battre pour le verrou.
+write_engine = _create_engine(1, 0, _begin_immediate) if IS_SQLITE else engine
+
+
+def _create_async_engine(pool_size, max_overflow, begin):
+    if not IS_SQLITE:
+        return create_async_engine(
+            ASYNC_DATABASE_URL,
+            pool_size=pool_size, max_overflow=max_overflow, pool_timeout=DB_POOL_TIMEOUT
+        )
+
+    sqlite_engine = create_async_engine(
+        ASYNC_DATABASE_URL,
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=pool_size, max_overflow=max_overflow, pool_timeout=DB_POOL_TIMEOUT
+    )
+    event.listen(sqlite_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    event.listen(sqlite_engine.sync_engine, "begin", begin)
+    return sqlite_engine
+
+
+async_engine = _create_async_engine(DB_POOL_SIZE, DB_MAX_OVERFLOW, _begin_deferred)
+async_write_engine = _create_async_engine(1, 0, _begin_immediate) if IS_SQLITE else async_engine
+
+
+def _routing_session_class(read_engine, writer_engine):
+    class RoutingSession(Session):
+        """
+        Envoie les flush et les INSERT/UPDATE/DELETE sur le writer, le reste sur le pool de lecture.
+        Une fois le writer engagé dans la transaction, les lectures le suivent jusqu'au commit :
+        elles seules voient les écritures pas encore commitées.
+        """
+
+        def get_bind(self, mapper=None, clause=None, **kw):
+            if self._flushing or isinstance(clause, (Insert, Update, Delete)) or self._writing():
+                return writer_engine
+            return read_engine
+
+        def _writing(self):
+            transaction = self.get_transaction()
+            return transaction is not None and writer_engine in transaction._connections
+
+    return RoutingSession
+
+
+RoutingSession = _routing_session_class(engine, write_engine)
+AsyncRoutingSession = _routing_session_class(async_engine.sync_engine, async_write_engine.sync_engine)
+
+# Sessions synchrones : Alembic, scripts et threads de fond
+SessionLocal = sessionmaker(class_=RoutingSession, autocommit=False, autoflush=False)
+
+# Sessions asynchrones : endpoints FastAPI
+AsyncSessionLocal = async_sessionmaker(sync_session_class=AsyncRoutingSession, autoflush=False, expire_on_commit=False)
 
 Base = declarative_base()
@@ -1,17 +1,143 @@
 import os
-import requests
+import re
+import threading
 import time
+import unicodedata
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+import models
+from database import SessionLocal
 
 CLIENT_ID = os.getenv("IGDB_CLIENT_ID")
 CLIENT_SECRET = os.getenv("IGDB_CLIENT_SECRET")
 
+# Surchargeables pour pointer vers un faux serveur IGDB/Twitch (tests, staging)
+TWITCH_TOKEN_URL = os.getenv("TWITCH_TOKEN_URL", "https://id.twitch.tv/oauth2/token")
+IGDB_API_URL = os.getenv("IGDB_API_URL", "https://api.igdb.com/v4").rstrip("/")
+IGDB_TIMEOUT = float(os.getenv("IGDB_TIMEOUT", "10"))
+IGDB_HTTP_POOL_SIZE = int(os.getenv("IGDB_HTTP_POOL_SIZE", "8"))
+
+# Limites de l'API IGDB : 4 requêtes/s, 8 requêtes ouvertes au plus, 10 requêtes par multiquery
+IGDB_RATE_LIMIT = float(os.getenv("IGDB_RATE_LIMIT", "4"))
+IGDB_MAX_CONCURRENCY = int(os.getenv("IGDB_MAX_CONCURRENCY", "4"))
+IGDB_MULTIQUERY_SIZE = 10
+
+# Cache des recherches : résultat trouvé gardé longtemps, "aucun résultat" moins longtemps
+IGDB_CACHE_TTL = int(os.getenv("IGDB_CACHE_TTL_DAYS", "30")) * 86400
+IGDB_NEGATIVE_CACHE_TTL = int(os.getenv("IGDB_NEGATIVE_CACHE_TTL_HOURS", "24")) * 3600
+
 if not CLIENT_ID or not CLIENT_SECRET:
     print("⚠️  ATTENTION : Les clés IGDB ne sont pas configurées dans le fichier .env")
 
+
+class IGDBUnavailable(Exception):
+    """IGDB ou Twitch injoignable / en erreur : la recherche peut être réessayée plus tard."""
+
+
+class TokenBucket:
+    """Limiteur de débit partagé entre threads : acquire() attend qu'un jeton soit disponible."""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _quote(query):
+    return query.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def _cover_url(game):
+    if "cover" in game and "url" in game["cover"]:
+        raw_url = game["cover"]["url"]
+
+        if raw_url.startswith("//"):
+            raw_url = "https:" + raw_url
+
+        return raw_url.replace("t_thumb", "t_cover_big")
+    return None
+
+
+def normalize_title(title):
+    """Clé de cache : "Pokémon - Red Version!" et "pokemon red version" donnent la même."""
+    text = unicodedata.normalize("NFKD", title)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^\w]+", " ", text.lower())
+    return " ".join(text.split())
+
+
 class IGDBService:
     def __init__(self):
         self.access_token = None
         self.token_expiry = 0
+        self._auth_lock = threading.Lock()
+
+        # Connexions TLS réutilisées entre les appels (Twitch + IGDB + téléchargement des jaquettes)
+        self.http = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=IGDB_HTTP_POOL_SIZE)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+
+        # Recherches en cours : un même titre demandé en parallèle n'est envoyé qu'une fois
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+        # Toutes les requêtes vers l'API (simples ou multiquery) passent par le même limiteur
+        self._bucket = TokenBucket(IGDB_RATE_LIMIT)
+
+    # --- Jeton OAuth partagé entre les workers via la base ---
+
+    def _load_shared_token(self):
+        with SessionLocal() as db:
+            token = db.get(models.IGDBToken, CLIENT_ID)
+            if token and token.expires_at > datetime.utcnow() + timedelta(seconds=60):
+                return token.access_token, token.expires_at
+        return None
+
+    def _store_shared_token(self, access_token, expires_at):
+        with SessionLocal() as db:
+            db.execute(
+                sqlite_insert(models.IGDBToken)
+                .values(client_id=CLIENT_ID, access_token=access_token, expires_at=expires_at)
+                .on_conflict_do_update(
+                    index_elements=[models.IGDBToken.client_id],
+                    set_={"access_token": access_token, "expires_at": expires_at}
+                )
+            )
+            db.commit()
+
+    def _invalidate_token(self, rejected_token):
+        """Oublie le jeton refusé, et seulement lui : un autre worker a pu en obtenir un neuf entre-temps."""
+        with self._auth_lock:
+            if self.access_token == rejected_token:
+                self.access_token = None
+                self.token_expiry = 0
+        with SessionLocal() as db:
+            db.execute(
+                delete(models.IGDBToken)
+                .where(models.IGDBToken.client_id == CLIENT_ID, models.IGDBToken.access_token == rejected_token)
+            )
+            db.commit()
 
     def _authenticate(self):
         if not CLIENT_ID or not CLIENT_SECRET:
@@ -20,68 +146,208 @@ class IGDBService:
         if self.access_token and time.time() < self.token_expiry:
             return
 
-        print("[IGDB] Authenticating...")
-        url = "https://id.twitch.tv/oauth2/token"
-        params = {
-            "client_id": CLIENT_ID,
-            "client_secret": CLIENT_SECRET,
-            "grant_type": "client_credentials"
-        }
-        
-        try:
-            response = requests.post(url, params=params)
-            response.raise_for_status()
-            data = response.json()
-            
+        with self._auth_lock:
+            if self.access_token and time.time() < self.token_expiry:
+                return
+
+            shared = self._load_shared_token()
+            if shared:
+                access_token, expires_at = shared
+                self.access_token = access_token
+                self.token_expiry = time.time() + (expires_at - datetime.utcnow()).total_seconds() - 60
+                return
+
+            print("[IGDB] Authenticating...")
+            params = {
+                "client_id": CLIENT_ID,
+                "client_secret": CLIENT_SECRET,
+                "grant_type": "client_credentials"
+            }
+
+            try:
+                response = self.http.post(TWITCH_TOKEN_URL, params=params, timeout=IGDB_TIMEOUT)
+                response.raise_for_status()
+                data = response.json()
+            except Exception as e:
+                print(f"[IGDB] Auth failed: {e}")
+                self.access_token = None
+                raise IGDBUnavailable(f"Twitch authentication failed: {e}")
+
             self.access_token = data["access_token"]
             self.token_expiry = time.time() + data["expires_in"] - 60
+            self._store_shared_token(self.access_token, datetime.utcnow() + timedelta(seconds=data["expires_in"]))
             print("[IGDB] Authentication successful.")
-        except Exception as e:
-            print(f"[IGDB] Auth failed: {e}")
-            self.access_token = None
+
+    # --- Cache persistant des recherches ---
+
+    def _cache_get(self, key):
+        """Renvoie (trouvé en cache, url) ; url vaut None pour un résultat négatif mis en cache."""
+        with SessionLocal() as db:
+            entry = db.execute(
+                select(models.IGDBCacheEntry).where(models.IGDBCacheEntry.query == key)
+            ).scalar_one_or_none()
+            if entry and entry.expires_at > datetime.utcnow():
+                return True, entry.cover_url
+        return False, None
+
+    def _cache_get_many(self, keys):
+        found = {}
+        now = datetime.utcnow()
+        with SessionLocal() as db:
+            # Paquets bornés : SQLite limite le nombre de paramètres d'une requête
+            for i in range(0, len(keys), 500):
+                entries = db.execute(
+                    select(models.IGDBCacheEntry).where(models.IGDBCacheEntry.query.in_(keys[i:i + 500]))
+                ).scalars()
+                for entry in entries:
+                    if entry.expires_at > now:
+                        found[entry.query] = entry.cover_url
+        return found
+
+    def _cache_set(self, key, cover_url):
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=IGDB_CACHE_TTL if cover_url else IGDB_NEGATIVE_CACHE_TTL)
+        with SessionLocal() as db:
+            db.execute(
+                sqlite_insert(models.IGDBCacheEntry)
+                .values(query=key, cover_url=cover_url, fetched_at=now, expires_at=expires_at)
+                .on_conflict_do_update(
+                    index_elements=[models.IGDBCacheEntry.query],
+                    set_={"cover_url": cover_url, "fetched_at": now, "expires_at": expires_at}
+                )
+            )
+            db.commit()
+
+    # --- Recherche ---
 
     def search_game(self, query):
         if not CLIENT_ID or not CLIENT_SECRET:
             print("[IGDB] Skipping search (Missing API Keys)")
             return None
 
+        key = normalize_title(query)
+        hit, cover_url = self._cache_get(key)
+        if hit:
+            return cover_url
+
+        with self._inflight_lock:
+            pending = self._inflight.get(key)
+            owner = pending is None
+            if owner:
+                pending = Future()
+                self._inflight[key] = pending
+
+        if not owner:
+            return pending.result()
+
+        try:
+            cover_url = self._search_remote(query)
+            self._cache_set(key, cover_url)
+            pending.set_result(cover_url)
+            return cover_url
+        except BaseException as e:
+            pending.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+
+    def _post_api(self, endpoint, body, retry_auth=True):
         self._authenticate()
-        if not self.access_token:
-            return None
+        self._bucket.acquire()
 
-        print(f"[IGDB] Searching for: {query}")
-        url = "https://api.igdb.com/v4/games"
-        
-        body = f'fields name, cover.url; search "{query}"; limit 1;'
-        
+        access_token = self.access_token
         headers = {
             "Client-ID": CLIENT_ID,
-            "Authorization": f"Bearer {self.access_token}"
+            "Authorization": f"Bearer {access_token}"
         }
 
         try:
-            response = requests.post(url, data=body, headers=headers)
-            response.raise_for_status()
-            results = response.json()
-
-            if results and len(results) > 0:
-                game = results[0]
-                if "cover" in game and "url" in game["cover"]:
-                    raw_url = game["cover"]["url"]
-                    
-                    if raw_url.startswith("//"):
-                        raw_url = "https:" + raw_url
-                    
-                    hd_url = raw_url.replace("t_thumb", "t_cover_big")
-                    
-                    print(f"[IGDB] Found cover: {hd_url}")
-                    return hd_url
-            
-            print("[IGDB] No results found.")
-            return None
-
+            response = self.http.post(f"{IGDB_API_URL}/{endpoint}", data=body, headers=headers, timeout=IGDB_TIMEOUT)
+            if response.status_code != 401 or not retry_auth:
+                response.raise_for_status()
+                return response.json()
         except Exception as e:
-            print(f"[IGDB] Search failed: {e}")
-            return None
+            print(f"[IGDB] Request to /{endpoint} failed: {e}")
+            raise IGDBUnavailable(f"IGDB request failed: {e}")
+
+        # Jeton révoqué ou expiré côté Twitch : on en redemande un et on rejoue la requête une fois
+        print("[IGDB] Token rejected, re-authenticating...")
+        self._invalidate_token(access_token)
+        return self._post_api(endpoint, body, retry_auth=False)
+
+    def _search_remote(self, query):
+        print(f"[IGDB] Searching for: {query}")
+        results = self._post_api("games", f'fields name, cover.url; search "{_quote(query)}"; limit 1;')
+
+        if results and len(results) > 0:
+            hd_url = _cover_url(results[0])
+            if hd_url:
+                print(f"[IGDB] Found cover: {hd_url}")
+                return hd_url
+
+        print("[IGDB] No results found.")
+        return None
+
+    # --- Résolution en masse (backfill) ---
+
+    def _multiquery(self, titles):
+        """Une requête multiquery pour au plus IGDB_MULTIQUERY_SIZE titres : {titre: url ou None}."""
+        body = "".join(
+            f'query games "{i}" {{ fields name, cover.url; search "{_quote(title)}"; limit 1; }};'
+            for i, title in enumerate(titles)
+        )
+        results = self._post_api("multiquery", body)
+
+        resolved = {title: None for title in titles}
+        for entry in results:
+            index = int(entry["name"])
+            matches = entry.get("result") or []
+            if matches and 0 <= index < len(titles):
+                resolved[titles[index]] = _cover_url(matches[0])
+        return resolved
+
+    def search_games_bulk(self, titles):
+        """
+        Résout une liste de titres : cache d'abord, puis multiquery par paquets de 10
+        envoyés en parallèle (IGDB_MAX_CONCURRENCY) sous le limiteur de débit.
+        Renvoie {titre: url ou None} ; les titres d'un paquet en erreur sont absents.
+        """
+        if not CLIENT_ID or not CLIENT_SECRET:
+            print("[IGDB] Skipping bulk search (Missing API Keys)")
+            return {}
+
+        by_key = {}
+        for title in titles:
+            by_key.setdefault(normalize_title(title), []).append(title)
+
+        resolved = {}
+        missing = []
+        cached = self._cache_get_many(list(by_key))
+        for key, originals in by_key.items():
+            if key in cached:
+                for title in originals:
+                    resolved[title] = cached[key]
+            else:
+                missing.append(originals[0])
+
+        batches = [missing[i:i + IGDB_MULTIQUERY_SIZE] for i in range(0, len(missing), IGDB_MULTIQUERY_SIZE)]
+
+        def run(batch):
+            try:
+                return self._multiquery(batch)
+            except IGDBUnavailable as e:
+                print(f"[IGDB] Batch of {len(batch)} titles skipped: {e}")
+                return {}
+
+        with ThreadPoolExecutor(max_workers=IGDB_MAX_CONCURRENCY) as pool:
+            for batch_result in pool.map(run, batches):
+                for title, cover_url in batch_result.items():
+                    key = normalize_title(title)
+                    self._cache_set(key, cover_url)
+                    for original in by_key[key]:
+                        resolved[original] = cover_url
+
+        return resolved
 
 igdb = IGDBService()
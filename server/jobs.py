@@ -0,0 +1,205 @@
+import os
+import random
+import threading
+import traceback
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, select, update
+
+import models
+from database import SessionLocal
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "5"))
+# Un job "running" dont le worker a disparu (crash, redémarrage) est repris après ce délai ;
+# un job plus long doit appeler heartbeat() régulièrement pour garder la main
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "600"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "30"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "3600"))
+
+_handlers = {}
+
+# Job exécuté par le thread courant (pour heartbeat)
+_current = threading.local()
+
+
+class LeaseLost(Exception):
+    """Le bail a expiré et le job a été repris par un autre worker : le handler doit s'arrêter."""
+
+
+def handler(kind):
+    """Déclare la fonction qui exécute les jobs de ce type : func(payload), lève une exception pour réessayer."""
+    def register(func):
+        _handlers[kind] = func
+        return func
+    return register
+
+
+def enqueue(db, kind, payload, max_attempts=JOB_MAX_ATTEMPTS, delay=0):
+    """Ajoute un job à la session : il est persisté par le commit de l'appelant (même transaction)."""
+    job = models.Job(
+        kind=kind,
+        payload=payload,
+        status="pending",
+        attempts=0,
+        max_attempts=max_attempts,
+        run_after=datetime.utcnow() + timedelta(seconds=delay)
+    )
+    db.add(job)
+    return job
+
+
+def schedule_once(kind, payload=None):
+    """Programme un job périodique s'il n'est pas déjà en file (au démarrage de chaque process)."""
+    with SessionLocal() as db:
+        queued = db.execute(
+            select(models.Job.id)
+            .where(models.Job.kind == kind, models.Job.status.in_(("pending", "running")))
+            .limit(1)
+        ).scalar()
+        if queued is None:
+            enqueue(db, kind, payload or {})
+            db.commit()
+
+
+def heartbeat():
+    """
+    Prolonge le bail du job en cours ; à appeler entre deux lots d'un job long.
+    Sans effet hors d'un job (script lancé à la main). Lève LeaseLost si le job a été repris.
+    """
+    job = getattr(_current, "job", None)
+    if job is None:
+        return
+    with SessionLocal() as db:
+        result = db.execute(
+            update(models.Job)
+            .where(models.Job.id == job.id, models.Job.claim_token == job.claim_token)
+            .values(locked_at=datetime.utcnow())
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    if result.rowcount == 0:
+        raise LeaseLost(f"{job.kind} #{job.id} was claimed by another worker")
+
+
+def retry_delay(attempts):
+    """Backoff exponentiel plafonné, avec jitter pour ne pas relancer tous les échecs ensemble."""
+    delay = min(JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1), JOB_RETRY_MAX_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class JobWorkerPool:
+    def __init__(self, workers=JOB_WORKERS):
+        self.workers = workers
+        self._threads = []
+        self._stop = threading.Event()
+        self._wakeup = threading.Event()
+
+    def start(self):
+        self._stop.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=10):
+        self._stop.set()
+        self._wakeup.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def notify(self):
+        """Réveille les workers sans attendre le prochain polling (job ajouté par ce process)."""
+        self._wakeup.set()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                ran = self.run_once()
+            except Exception as e:
+                print(f"[Jobs] Worker error: {e}")
+                ran = False
+
+            if not ran:
+                self._wakeup.wait(JOB_POLL_INTERVAL)
+                self._wakeup.clear()
+
+    def run_once(self):
+        job = self._claim()
+        if job is None:
+            return False
+
+        func = _handlers.get(job.kind)
+        _current.job = job
+        try:
+            if func is None:
+                raise LookupError(f"No handler for job kind '{job.kind}'")
+            func(job.payload)
+        except LeaseLost as e:
+            # Le worker qui a repris le job s'en charge : rien à enregistrer ici
+            print(f"[Jobs] {e}, abandoning")
+        except Exception as e:
+            print(f"[Jobs] {job.kind} #{job.id} failed (attempt {job.attempts}/{job.max_attempts}): {e}")
+            self._fail(job, traceback.format_exc())
+        else:
+            self._finish(job, status="done", last_error=None)
+        finally:
+            _current.job = None
+        return True
+
+    def _claim(self):
+        # Une seule instruction UPDATE ... RETURNING : deux workers (ou deux process)
+        # ne peuvent pas prendre le même job.
+        now = datetime.utcnow()
+        claimable = select(models.Job.id)\
+            .where(or_(
+                and_(models.Job.status == "pending", models.Job.run_after <= now),
+                and_(models.Job.status == "running", models.Job.locked_at < now - timedelta(seconds=JOB_LEASE_SECONDS))
+            ))\
+            .order_by(models.Job.run_after)\
+            .limit(1)\
+            .scalar_subquery()
+
+        with SessionLocal() as db:
+            result = db.execute(
+                update(models.Job)
+                .where(models.Job.id == claimable)
+                .values(status="running", attempts=models.Job.attempts + 1, locked_at=now, claim_token=uuid.uuid4().hex)
+                .returning(models.Job.id, models.Job.kind, models.Job.payload, models.Job.attempts,
+                           models.Job.max_attempts, models.Job.claim_token)
+                .execution_options(synchronize_session=False)
+            )
+            job = result.first()
+            db.commit()
+        return job
+
+    def _fail(self, job, error):
+        if job.attempts >= job.max_attempts:
+            self._finish(job, status="failed", last_error=error)
+            return
+
+        self._release(job, status="pending", last_error=error,
+                      run_after=datetime.utcnow() + timedelta(seconds=retry_delay(job.attempts)))
+
+    def _finish(self, job, status, last_error):
+        self._release(job, status=status, last_error=last_error, finished_at=datetime.utcnow())
+
+    def _release(self, job, **values):
+        # Filtré sur le jeton de prise : si le bail a expiré et qu'un autre worker a repris
+        # le job, c'est à lui d'en fixer l'issue
+        with SessionLocal() as db:
+            result = db.execute(
+                update(models.Job)
+                .where(models.Job.id == job.id, models.Job.claim_token == job.claim_token)
+                .values(locked_at=None, claim_token=None, **values)
+                .execution_options(synchronize_session=False)
+            )
+            db.commit()
+        if result.rowcount == 0:
+            print(f"[Jobs] {job.kind} #{job.id} was claimed by another worker, result discarded")
+
+
+pool = JobWorkerPool()
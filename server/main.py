@@ -3,60 +3,101 @@ from dotenv import load_dotenv
 load_dotenv()
 
 import os
-import shutil
+import math
 import uuid
-import time
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
 
 from jose import JWTError, jwt
-import requests
-from igdb_service import igdb
+from pydantic import ValidationError
 
-from fastapi import FastAPI, Depends, HTTPException, status, File, UploadFile, Form
-from fastapi.responses import FileResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi import FastAPI, Depends, HTTPException, status, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, event, func, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 import auth
+import cache
+import catalog
+import covers
+import jobs
+import media
+import pagination
+import play_stats
+import rom_store
+import search_index
+import storage
+import uploads
 
 import models
 import schemas
-from database import SessionLocal, engine
+from database import AsyncSessionLocal, SessionLocal
 
 app = FastAPI()
 
-UPLOAD_DIR = "media"
+# Les sous-dossiers ab/cd/ sont créés à la demande par le backend de stockage
+os.makedirs(storage.MEDIA_ROOT, exist_ok=True)
+os.makedirs(storage.STAGING_DIR, exist_ok=True)
 
-os.makedirs(os.path.join(UPLOAD_DIR, "roms"), exist_ok=True)
-os.makedirs(os.path.join(UPLOAD_DIR, "covers"), exist_ok=True)
-os.makedirs(os.path.join(UPLOAD_DIR, "saves"), exist_ok=True)
-os.makedirs(os.path.join(UPLOAD_DIR, "icons"), exist_ok=True)
+app.mount("/media", media.MediaFiles(directory=storage.MEDIA_ROOT), name="media")
 
-app.mount("/media", StaticFiles(directory=UPLOAD_DIR), name="media")
-
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 
-def save_upload_file(upload_file: UploadFile, subfolder: str) -> str:
-    _, ext = os.path.splitext(upload_file.filename)
-    unique_filename = f"{uuid.uuid4()}{ext}"
-    
-    folder_path = os.path.join(UPLOAD_DIR, subfolder)
-    file_path = os.path.join(folder_path, unique_filename)
-    
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
-        
-    return f"{subfolder}/{unique_filename}"
+def upload_target(subfolder: str):
+    return (subfolder, storage.STAGING_DIR)
+
+def save_upload_file(upload_file: uploads.IngestedFile, subfolder: str) -> str:
+    # Nom = empreinte du contenu : une image modifiée a une nouvelle URL, l'ancienne reste cacheable à vie
+    key = storage.sharded_key(subfolder, upload_file.sha256, upload_file.extension)
+    upload_file.publish(key)
+    return key
+
+@jobs.handler("fetch_cover")
+def fetch_cover(payload):
+    """Job : cherche la jaquette sur IGDB et l'attache au jeu s'il n'en a toujours pas."""
+    covers.fetch_cover(payload["game_id"], payload["title"])
+
+@jobs.handler("cover_thumbnails")
+def cover_thumbnails(payload):
+    covers.generate_thumbnails(payload["game_id"])
+
+@jobs.handler("compress_rom")
+def compress_rom(payload):
+    blob_path = storage.backend.local_path(payload["path"])
+    if blob_path is None:
+        # Stockage distant : les ROMs sont servies par le bucket, sans variante précompressée
+        return
+    kept = rom_store.write_sidecars(blob_path)
+    print(f"[ROM] Sidecars for {payload['path']}: {', '.join(kept) or 'none (not compressible)'}")
+
+@jobs.handler("backfill_covers")
+def backfill_covers(payload):
+    # Plusieurs minutes sur un gros catalogue : le bail du job est prolongé à chaque paquet
+    stats = covers.backfill_missing_covers(limit=payload.get("limit"), heartbeat=jobs.heartbeat)
+    print(f"[Cover] Backfill done: {stats}")
+
+async def find_rom_blob(db: AsyncSession, sha256: str) -> Optional[str]:
+    result = await db.execute(
+        select(models.Game.rom_path).where(models.Game.rom_sha256 == sha256).limit(1)
+    )
+    return result.scalar()
+
+principal_cache = cache.LRUCache(
+    maxsize=int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000")),
+    ttl=float(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+)
+
+# Réponses /games/ et /platforms/ mises en cache par version du catalogue
+catalog_cache = catalog.CatalogCache(maxsize=int(os.getenv("CATALOG_CACHE_SIZE", "256")))
 
-def get_current_user(token: str = Depends(OAuth2PasswordBearer(tokenUrl="token")), db: Session = Depends(get_db)):
+async def get_current_user(token: str = Depends(OAuth2PasswordBearer(tokenUrl="token")), db: AsyncSession = Depends(get_db)):
     try:
         payload = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
         username: str = payload.get("sub")
@@ -65,41 +106,119 @@ def get_current_user(token: str = Depends(OAuth2PasswordBearer(tokenUrl="token")
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
     
-    user = db.query(models.User).filter(models.User.username == username).first()
+    # Chemin courant : le token porte l'id, le principal est servi depuis le cache
+    user_id = payload.get("id")
+    principal = principal_cache.get(user_id) if user_id is not None else None
+    if principal is not None and principal.username == username:
+        return principal
+
+    result = await db.execute(select(models.User).where(models.User.username == username))
+    user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(status_code=401, detail="User not found")
-    return user
+
+    principal = schemas.Principal.model_validate(user)
+    principal_cache.set(user.id, principal)
+    return principal
+
+@event.listens_for(models.User, "after_update")
+@event.listens_for(models.User, "after_delete")
+def invalidate_principal(mapper, connection, target):
+    principal_cache.invalidate(target.id)
+
+# Administrateurs : liste de noms d'utilisateur séparés par des virgules
+ADMIN_USERS = {name.strip() for name in os.getenv("ADMIN_USERS", "").split(",") if name.strip()}
+
+async def get_admin_user(current_user: schemas.Principal = Depends(get_current_user)):
+    if current_user.username not in ADMIN_USERS:
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+    return current_user
+
+def password_pool_busy():
+    return HTTPException(
+        status_code=503,
+        detail="Authentication service busy, retry shortly",
+        headers={"Retry-After": "1"}
+    )
+
+@app.on_event("startup")
+def check_media_serve_mode():
+    media.check_serve_mode()
+
+@app.on_event("startup")
+def start_job_workers():
+    jobs.schedule_once("sweep_uploads")
+    jobs.pool.start()
+
+@app.on_event("shutdown")
+def shutdown_password_pool():
+    auth.shutdown_password_pool()
+
+@app.on_event("shutdown")
+def stop_job_workers():
+    jobs.pool.stop()
 
 @app.post("/register", response_model=schemas.Token)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user: schemas.UserCreate, db: AsyncSession = Depends(get_db)):
     # Vérifier si user existe déjà
-    db_user = db.query(models.User).filter(models.User.username == user.username).first()
+    result = await db.execute(select(models.User).where(models.User.username == user.username))
+    db_user = result.scalar_one_or_none()
     if db_user:
         raise HTTPException(status_code=400, detail="Username already registered")
-    
-    # Créer user
-    hashed_pwd = auth.get_password_hash(user.password)
+    # Connexion rendue au pool pendant le hachage (~100 ms) : une rafale d'inscriptions
+    # ne doit pas monopoliser les connexions dont ont besoin les autres endpoints
+    await db.rollback()
+
+    # Créer user (Argon2 dans le pool de processus dédié)
+    try:
+        hashed_pwd = await auth.get_password_hash_async(user.password)
+    except auth.PasswordPoolBusy:
+        raise password_pool_busy()
     new_user = models.User(username=user.username, hashed_password=hashed_pwd)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Inscription concurrente du même nom pendant le hachage : la contrainte unique tranche
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Username already registered")
     
     # Générer token auto-login
     access_token = auth.create_access_token(data={"sub": new_user.username, "id": new_user.id})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/token", response_model=schemas.Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
     # OAuth2PasswordRequestForm attend 'username' et 'password'
-    user = db.query(models.User).filter(models.User.username == form_data.username).first()
-    if not user or not auth.verify_password(form_data.password, user.hashed_password):
+    result = await db.execute(select(models.User).where(models.User.username == form_data.username))
+    user = result.scalar_one_or_none()
+    if not user:
         raise HTTPException(status_code=401, detail="Incorrect username or password")
-    
-    access_token = auth.create_access_token(data={"sub": user.username, "id": user.id})
+    user_id, username, hashed_password = user.id, user.username, user.hashed_password
+    # Comme pour /register : aucune connexion SQLite retenue pendant la vérification Argon2
+    await db.rollback()
+
+    try:
+        valid, new_hash = await auth.verify_and_update_password_async(form_data.password, hashed_password)
+    except auth.PasswordPoolBusy:
+        raise password_pool_busy()
+    if not valid:
+        raise HTTPException(status_code=401, detail="Incorrect username or password")
+
+    if new_hash:
+        # Paramètres Argon2 modifiés : on remplace le hash au passage
+        await db.execute(
+            update(models.User)
+            .where(models.User.id == user_id, models.User.hashed_password == hashed_password)
+            .values(hashed_password=new_hash)
+        )
+        await db.commit()
+
+    access_token = auth.create_access_token(data={"sub": username, "id": user_id})
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.get("/users/me")
-def read_users_me(token: str = Depends(OAuth2PasswordBearer(tokenUrl="token"))):
+async def read_users_me(token: str = Depends(OAuth2PasswordBearer(tokenUrl="token"))):
     try:
         payload = jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
         username: str = payload.get("sub")
@@ -110,199 +229,814 @@ def read_users_me(token: str = Depends(OAuth2PasswordBearer(tokenUrl="token"))):
         raise HTTPException(status_code=401, detail="Could not validate credentials")
 
 @app.post("/platforms/", response_model=schemas.Platform)
-def create_platform(
-    name: str = Form(...),
-    icon: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db)
-):
-    icon_path = None
-    if icon:
-        icon_path = save_upload_file(icon, "icons")
+async def create_platform(request: Request, db: AsyncSession = Depends(get_db)):
+    form = await uploads.parse_upload_form(request, {"icon": upload_target("icons")})
+    try:
+        name = form.field("name")
+        icon = form.file("icon", required=False)
+
+        icon_path = None
+        if icon:
+            icon_path = await run_in_threadpool(save_upload_file, icon, "icons")
+    finally:
+        await run_in_threadpool(form.discard)
 
     db_platform = models.Platform(name=name, icon_path=icon_path)
     db.add(db_platform)
-    db.commit()
-    db.refresh(db_platform)
+    await catalog.bump_version(db)
+    await db.commit()
     return db_platform
 
-@app.get("/platforms/", response_model=List[schemas.Platform])
-def read_platforms(skip: int = 0, limit: int = 10, db: Session = Depends(get_db)):
-    return db.query(models.Platform).offset(skip).limit(limit).all()
+@app.get("/platforms/", response_model=schemas.PlatformPage)
+async def read_platforms(request: Request, cursor: Optional[str] = None, limit: int = 100, db: AsyncSession = Depends(get_db)):
+    limit = pagination.clamp_limit(limit)
+
+    async def build():
+        page = await query_platforms(db, cursor, limit)
+        return schemas.PlatformPage.model_validate(page, from_attributes=True).model_dump_json()
+
+    return await catalog_cache.respond(request, db, "platforms", {"cursor": cursor, "limit": limit}, build)
+
+async def query_platforms(db: AsyncSession, cursor: Optional[str], limit: int):
+    query = select(models.Platform).order_by(models.Platform.id)
+
+    if cursor:
+        (last_id,) = pagination.decode_cursor(cursor, 1)
+        query = query.where(models.Platform.id > last_id)
+
+    result = await db.execute(query.limit(limit + 1))
+    items, next_cursor = pagination.split_page(result.scalars().all(), limit, lambda p: [p.id])
+    return {"items": items, "next_cursor": next_cursor}
 
 @app.get("/platforms/{platform_id}", response_model=schemas.Platform)
-def read_platform(platform_id: int, db: Session = Depends(get_db)):
-    platform = db.query(models.Platform).filter(models.Platform.id == platform_id).first()
+async def read_platform(platform_id: int, db: AsyncSession = Depends(get_db)):
+    platform = await db.get(models.Platform, platform_id)
     if platform is None:
         raise HTTPException(status_code=404, detail="Platform not found")
     return platform
 
 
 @app.post("/games/", response_model=schemas.Game)
-def create_game(
-    title: str = Form(...),
-    platform_id: int = Form(...),
-    rom: UploadFile = File(...),
-    cover: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db)
-):
-    rom_filename = f"{uuid.uuid4()}_{rom.filename}"
-    rom_path = os.path.join(UPLOAD_DIR, "roms", rom_filename)
-    
-    with open(rom_path, "wb+") as file_object:
-        shutil.copyfileobj(rom.file, file_object)
+async def create_game(request: Request, db: AsyncSession = Depends(get_db)):
+    form = await uploads.parse_upload_form(request, {
+        "rom": upload_target("roms"),
+        "cover": upload_target("covers"),
+    })
+    try:
+        title = form.field("title")
+        try:
+            platform_id = int(form.field("platform_id"))
+        except ValueError:
+            raise HTTPException(status_code=422, detail="platform_id must be an integer")
+        rom = form.file("rom")
+        cover = form.file("cover", required=False)
 
-    cover_db_path = None
+        # Backend de stockage (disque ou S3) bloquant : hors de la boucle d'événements
+        linked_path = await find_rom_blob(db, rom.sha256)
+        stored_rom = await run_in_threadpool(
+            rom_store.commit_rom, rom.tmp_path, rom.sha256, rom.size, rom.filename, linked_path=linked_path
+        )
+        rom.path = stored_rom.path
 
-    if cover:
-        cover_filename = f"{uuid.uuid4()}_{cover.filename}"
-        cover_real_path = os.path.join(UPLOAD_DIR, "covers", cover_filename)
-        
-        with open(cover_real_path, "wb+") as file_object:
-            shutil.copyfileobj(cover.file, file_object)
-        
-        cover_db_path = f"covers/{cover_filename}"
-    
-    else:
-        print("No cover provided. Attempting to scrape IGDB...")
-        scraped_url = igdb.search_game(title)
-        
-        if scraped_url:
-            try:
-                img_data = requests.get(scraped_url).content
-                
-                cover_filename = f"{uuid.uuid4()}_scraped.jpg"
-                cover_real_path = os.path.join(UPLOAD_DIR, "covers", cover_filename)
-                
-                with open(cover_real_path, "wb") as f:
-                    f.write(img_data)
-                
-                cover_db_path = f"covers/{cover_filename}"
-                print("Cover scraped and saved successfully.")
-            except Exception as e:
-                print(f"Error downloading scraped cover: {e}")
+        cover_db_path = None
+        if cover:
+            cover_db_path = await run_in_threadpool(save_upload_file, cover, "covers")
+    finally:
+        await run_in_threadpool(form.discard)
+
+    return await add_game(db, title, platform_id, stored_rom, cover_db_path)
+
+async def add_game(db: AsyncSession, title: str, platform_id: int, stored_rom: rom_store.StoredRom, cover_db_path: Optional[str]):
+    db_game = await stage_game(db, title, platform_id, stored_rom, cover_db_path)
+    await db.commit()
+    jobs.pool.notify()
+
+    return await load_game(db, db_game.id)
 
+async def stage_game(db: AsyncSession, title: str, platform_id: int, stored_rom: rom_store.StoredRom, cover_db_path: Optional[str]) -> models.Game:
+    """Ajoute le jeu et ses jobs à la transaction courante, sans la valider."""
     db_game = models.Game(
         title=title,
-        rom_path=f"roms/{rom_filename}",
+        rom_path=stored_rom.path,
+        rom_sha256=stored_rom.sha256,
+        rom_size=stored_rom.size,
         cover_path=cover_db_path,
         platform_id=platform_id
     )
     db.add(db_game)
-    db.commit()
-    db.refresh(db_game)
-    
+    await catalog.bump_version(db)
+
+    # Pas de jaquette fournie : recherche IGDB en tâche de fond, le jeu est créé tout de suite.
+    # Sinon, seules les vignettes restent à calculer.
+    await db.flush()
+    if cover_db_path:
+        jobs.enqueue(db, "cover_thumbnails", {"game_id": db_game.id})
+    else:
+        jobs.enqueue(db, "fetch_cover", {"game_id": db_game.id, "title": title})
+    if stored_rom.created:
+        # Nouveau blob : variantes précompressées calculées une seule fois, hors requête
+        jobs.enqueue(db, "compress_rom", {"path": stored_rom.path})
     return db_game
 
-@app.get("/games/", response_model=List[schemas.Game])
-def read_games(
-    skip: int = 0, 
+async def load_game(db: AsyncSession, game_id: int) -> Optional[models.Game]:
+    # Les relations sont chargées explicitement : pas de lazy-load en async
+    result = await db.execute(
+        select(models.Game)
+        .where(models.Game.id == game_id)
+        .options(selectinload(models.Game.platform))
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+@app.get("/games/", response_model=schemas.GamePage)
+async def read_games(
+    request: Request,
+    cursor: Optional[str] = None,
     limit: int = 100, 
     platform_id: Optional[int] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(models.Game)
+    limit = pagination.clamp_limit(limit)
+    search = search.strip() if search else None
+
+    async def build():
+        page = await query_games(db, cursor, limit, platform_id, search)
+        return schemas.GamePage.model_validate(page, from_attributes=True).model_dump_json()
+
+    params = {"cursor": cursor, "limit": limit, "platform_id": platform_id, "search": search}
+    return await catalog_cache.respond(request, db, "games", params, build)
+
+async def query_games(db: AsyncSession, cursor: Optional[str], limit: int, platform_id: Optional[int], search: Optional[str]):
+    if search and search_index.supports(search):
+        return await search_games(db, search, cursor, limit, platform_id)
+
+    # Projection catalogue : plateformes chargées en une requête, jamais les saves.
+    # Pagination par clé (title, id) : chaque page est un parcours d'index borné.
+    query = select(models.Game)\
+        .options(selectinload(models.Game.platform))\
+        .order_by(models.Game.title, models.Game.id)
 
     if platform_id is not None:
-        query = query.filter(models.Game.platform_id == platform_id)
+        query = query.where(models.Game.platform_id == platform_id)
 
     if search:
-        query = query.filter(models.Game.title.ilike(f"%{search}%"))
+        # Recherche trop courte pour l'index trigram
+        query = query.where(models.Game.title.ilike(f"%{search}%"))
 
-    return query.offset(skip).limit(limit).all()
+    if cursor:
+        last_title, last_id = pagination.decode_cursor(cursor, 2)
+        query = query.where(tuple_(models.Game.title, models.Game.id) > tuple_(last_title, last_id))
 
-@app.post("/games/{game_id}/save")
-def create_save(
-    game_id: int, 
-    file: UploadFile = File(...), 
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    result = await db.execute(query.limit(limit + 1))
+    items, next_cursor = pagination.split_page(result.scalars().all(), limit, lambda g: [g.title, g.id])
+    return {"items": items, "next_cursor": next_cursor}
+
+async def search_games(db: AsyncSession, search: str, cursor: Optional[str], limit: int, platform_id: Optional[int]):
+    """Recherche plein texte (FTS5 trigram) triée par pertinence, paginée sur (score, id)."""
+    matches = search_index.ranked_matches(search)
+    query = select(models.Game, matches.c.score)\
+        .join(matches, matches.c.game_id == models.Game.id)\
+        .options(selectinload(models.Game.platform))\
+        .order_by(matches.c.score, models.Game.id)
+
+    if platform_id is not None:
+        query = query.where(models.Game.platform_id == platform_id)
+
+    if cursor:
+        last_score, last_id = pagination.decode_cursor(cursor, 2)
+        query = query.where(tuple_(matches.c.score, models.Game.id) > tuple_(last_score, last_id))
+
+    result = await db.execute(query.limit(limit + 1))
+    rows, next_cursor = pagination.split_page(result.all(), limit, lambda r: [r.score, r.Game.id])
+    return {"items": [row.Game for row in rows], "next_cursor": next_cursor}
+
+TYPEAHEAD_MAX_RESULTS = 20
+
+@app.get("/games/typeahead", response_model=List[schemas.GameSuggestion])
+async def games_typeahead(
+    q: str,
+    limit: int = 8,
+    platform_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db)
 ):
-    timestamp = int(time.time())
-    filename = f"{game_id}_{current_user.id}_{timestamp}.sav"
-    file_location = os.path.join("saves", filename)
+    """Suggestions pour la barre de recherche : titres commençant par q, les plus courts d'abord."""
+    q = q.strip()
+    if not q:
+        return []
+    limit = max(1, min(limit, TYPEAHEAD_MAX_RESULTS))
+
+    query = select(models.Game.id, models.Game.title, models.Game.platform_id)
+
+    if search_index.supports(q):
+        matches = search_index.prefix_matches(q)
+        query = query.join(matches, matches.c.game_id == models.Game.id)\
+            .order_by(func.length(models.Game.title), models.Game.title)
+    else:
+        # 1-2 caractères : on parcourt l'index sur title et on s'arrête à limit
+        query = query.where(models.Game.title.ilike(f"{q}%")).order_by(models.Game.title)
+
+    if platform_id is not None:
+        query = query.where(models.Game.platform_id == platform_id)
+
+    result = await db.execute(query.limit(limit))
+    return [row._asdict() for row in result.all()]
+
+@app.get("/games/{game_id}", response_model=schemas.Game)
+async def read_game(game_id: int, db: AsyncSession = Depends(get_db)):
+    game = await load_game(db, game_id)
+    if game is None:
+        raise HTTPException(status_code=404, detail="Game not found")
+    return game
+
+# --- Upload de ROM par morceaux (reprenable) ---
+
+DEFAULT_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_UPLOAD_CHUNK_SIZE = 64 * 1024 * 1024
+# Session ouverte sans activité depuis ce délai : abandonnée, son fichier temporaire est supprimé
+UPLOAD_SESSION_TTL = int(os.getenv("UPLOAD_SESSION_TTL_HOURS", "48")) * 3600
+UPLOAD_SWEEP_INTERVAL = int(os.getenv("UPLOAD_SWEEP_INTERVAL_MINUTES", "60")) * 60
+
+def upload_tmp_path(upload_id: str) -> str:
+    return storage.staging_path(f".upload-{upload_id}.tmp")
+
+async def get_upload_session(db: AsyncSession, upload_id: str) -> models.UploadSession:
+    session = await db.get(models.UploadSession, upload_id, options=[selectinload(models.UploadSession.chunks)])
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload session not found")
+    return session
+
+def upload_session_status(session: models.UploadSession, duplicate: bool = False) -> schemas.UploadSession:
+    total_chunks = math.ceil(session.size / session.chunk_size)
+    received = sorted(chunk.index for chunk in session.chunks)
+
+    # offset = octets reçus de façon contiguë depuis le début du fichier
+    offset = 0
+    for expected_index, index in enumerate(received):
+        if index != expected_index:
+            break
+        offset = min((index + 1) * session.chunk_size, session.size)
+
+    return schemas.UploadSession(
+        id=session.id,
+        title=session.title,
+        platform_id=session.platform_id,
+        filename=session.filename,
+        size=session.size,
+        chunk_size=session.chunk_size,
+        total_chunks=total_chunks,
+        received_chunks=received,
+        offset=offset,
+        status=session.status,
+        game_id=session.game_id,
+        duplicate=duplicate
+    )
+
+@app.post("/uploads/", response_model=schemas.UploadSession)
+async def create_upload_session(payload: schemas.UploadSessionCreate, db: AsyncSession = Depends(get_db)):
+    if payload.size <= 0:
+        raise HTTPException(status_code=422, detail="size must be positive")
+    if payload.size > uploads.UPLOAD_LIMITS["roms"]:
+        raise HTTPException(status_code=413, detail="File too large")
+
+    chunk_size = payload.chunk_size or DEFAULT_UPLOAD_CHUNK_SIZE
+    if chunk_size <= 0 or chunk_size > MAX_UPLOAD_CHUNK_SIZE:
+        raise HTTPException(status_code=422, detail=f"chunk_size must be between 1 and {MAX_UPLOAD_CHUNK_SIZE}")
+
+    session = models.UploadSession(
+        id=uuid.uuid4().hex,
+        title=payload.title,
+        platform_id=payload.platform_id,
+        filename=payload.filename,
+        size=payload.size,
+        chunk_size=chunk_size,
+        expected_sha256=payload.sha256.lower() if payload.sha256 else None,
+        chunks=[]
+    )
+
+    await run_in_threadpool(uploads.preallocate, upload_tmp_path(session.id), payload.size)
+
+    db.add(session)
+    await db.commit()
+
+    # Si le store possède déjà ce contenu, le client peut finaliser sans rien envoyer
+    duplicate = bool(session.expected_sha256 and await find_rom_blob(db, session.expected_sha256))
+    return upload_session_status(session, duplicate=duplicate)
+
+@app.get("/uploads/{upload_id}", response_model=schemas.UploadSession)
+async def read_upload_session(upload_id: str, db: AsyncSession = Depends(get_db)):
+    return upload_session_status(await get_upload_session(db, upload_id))
+
+@app.put("/uploads/{upload_id}/chunks/{index}")
+async def upload_chunk(upload_id: str, index: int, request: Request, db: AsyncSession = Depends(get_db)):
+    session = await get_upload_session(db, upload_id)
+    if session.status != "open":
+        raise HTTPException(status_code=409, detail="Upload already finalized")
+
+    total_chunks = math.ceil(session.size / session.chunk_size)
+    if index < 0 or index >= total_chunks:
+        raise HTTPException(status_code=422, detail="Chunk index out of range")
+
+    offset = index * session.chunk_size
+    expected_size = min(session.chunk_size, session.size - offset)
+
+    # Le morceau n'est plus considéré comme reçu pendant qu'on réécrit ses octets :
+    # un renvoi qui échoue à la validation le laisse manquant, jamais "reçu mais corrompu"
+    await db.execute(
+        delete(models.UploadChunk)
+        .where(models.UploadChunk.upload_id == upload_id, models.UploadChunk.index == index)
+    )
+    session.updated_at = datetime.utcnow()
+    await db.commit()
+
+    sha256, size = await uploads.write_range(request.stream(), upload_tmp_path(upload_id), offset, expected_size)
+    if size != expected_size:
+        raise HTTPException(status_code=400, detail=f"Chunk {index} must be {expected_size} bytes, got {size}")
+
+    expected_sha256 = request.headers.get("x-chunk-sha256")
+    if expected_sha256 and expected_sha256.lower() != sha256:
+        raise HTTPException(status_code=400, detail=f"Chunk {index} checksum mismatch")
+
+    db.add(models.UploadChunk(upload_id=upload_id, index=index, size=size, sha256=sha256))
+    await db.commit()
+
+    return {"index": index, "size": size, "sha256": sha256}
+
+def published_rom_exists(tmp_path: str, key: str) -> bool:
+    """Fichier temporaire déjà consommé et blob présent dans le stockage : publication faite."""
+    return not os.path.exists(tmp_path) and storage.backend.exists(key)
+
+@app.post("/uploads/{upload_id}/finalize", response_model=schemas.Game)
+async def finalize_upload(upload_id: str, request: Request, db: AsyncSession = Depends(get_db)):
+    session = await get_upload_session(db, upload_id)
+    if session.status == "complete":
+        return await load_game(db, session.game_id)
+
+    cover_db_path = None
+    if request.headers.get("content-type", "").startswith("multipart/form-data"):
+        form = await uploads.parse_upload_form(request, {"cover": upload_target("covers")})
+        try:
+            cover = form.file("cover", required=False)
+            if cover:
+                cover_db_path = await run_in_threadpool(save_upload_file, cover, "covers")
+        finally:
+            await run_in_threadpool(form.discard)
 
-    with open(file_location, "wb+") as file_object:
-        shutil.copyfileobj(file.file, file_object)
+    tmp_path = upload_tmp_path(upload_id)
+    status_info = upload_session_status(session)
+    linked = await find_rom_blob(db, session.expected_sha256) if session.expected_sha256 else None
+
+    if linked:
+        # Contenu déjà présent dans le store : inutile d'attendre les morceaux manquants
+        await run_in_threadpool(uploads.remove_if_exists, tmp_path)
+        stored_rom = rom_store.StoredRom(linked, session.expected_sha256, session.size, created=False)
+    else:
+        if len(status_info.received_chunks) != status_info.total_chunks:
+            missing = sorted(set(range(status_info.total_chunks)) - set(status_info.received_chunks))
+            raise HTTPException(status_code=409, detail={"message": "Missing chunks", "missing": missing})
+
+        published_key = rom_store.rom_blob_path(session.expected_sha256, session.filename) if session.expected_sha256 else None
+        resumed = published_key is not None \
+            and await run_in_threadpool(published_rom_exists, tmp_path, published_key)
+        if resumed:
+            # Finalisation précédente interrompue après publication du blob, avant le commit
+            stored_rom = rom_store.StoredRom(published_key, session.expected_sha256, session.size, created=True)
+        else:
+            # Une relecture : empreinte du fichier et de chaque morceau, comparée à celle enregistrée
+            sha256, chunk_hashes = await run_in_threadpool(uploads.hash_chunks, tmp_path, session.chunk_size)
+            corrupted = [chunk.index for chunk in session.chunks if chunk_hashes[chunk.index] != chunk.sha256]
+            if corrupted:
+                await db.execute(
+                    delete(models.UploadChunk)
+                    .where(models.UploadChunk.upload_id == upload_id, models.UploadChunk.index.in_(corrupted))
+                )
+                await db.commit()
+                raise HTTPException(status_code=422, detail={"message": "Corrupted chunks", "missing": sorted(corrupted)})
+            if session.expected_sha256 and sha256 != session.expected_sha256:
+                raise HTTPException(status_code=422, detail="ROM checksum mismatch, re-upload the corrupted chunks")
+
+            # Empreinte vérifiée gardée sur la session : une reprise après crash retrouve le blob publié
+            session.expected_sha256 = sha256
+            await db.commit()
+
+            linked_path = await find_rom_blob(db, sha256)
+            stored_rom = await run_in_threadpool(
+                rom_store.commit_rom, tmp_path, sha256, session.size, session.filename, linked_path=linked_path
+            )
+
+    db_game = await stage_game(db, session.title, session.platform_id, stored_rom, cover_db_path)
+    await db.flush()
+
+    # Jeu et fin de session dans la même transaction ; une finalisation concurrente perd la course
+    completed = await db.execute(
+        update(models.UploadSession)
+        .where(models.UploadSession.id == upload_id, models.UploadSession.status == "open")
+        .values(status="complete", game_id=db_game.id, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    if completed.rowcount == 0:
+        await db.rollback()
+        session = await get_upload_session(db, upload_id)
+        return await load_game(db, session.game_id)
+
+    await db.execute(delete(models.UploadChunk).where(models.UploadChunk.upload_id == upload_id))
+    await db.commit()
+    jobs.pool.notify()
+    return await load_game(db, db_game.id)
+
+def sweep_upload_sessions(now: Optional[datetime] = None):
+    """Supprime les sessions ouvertes abandonnées et les fichiers de staging orphelins ; renvoie les compteurs."""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(seconds=UPLOAD_SESSION_TTL)
+    stats = {"sessions": 0, "files": 0}
+
+    with SessionLocal() as db:
+        expired = db.execute(
+            select(models.UploadSession.id)
+            .where(
+                models.UploadSession.status == "open",
+                func.coalesce(models.UploadSession.updated_at, models.UploadSession.created_at) < cutoff
+            )
+        ).scalars().all()
+        for upload_id in expired:
+            db.execute(delete(models.UploadChunk).where(models.UploadChunk.upload_id == upload_id))
+            db.execute(delete(models.UploadSession).where(models.UploadSession.id == upload_id))
+        db.commit()
+        live = set(db.execute(
+            select(models.UploadSession.id).where(models.UploadSession.status == "open")
+        ).scalars())
+    stats["sessions"] = len(expired)
+
+    # Fichiers temporaires : sessions expirées, et uploads multipart interrompus par un crash
+    live_names = {os.path.basename(upload_tmp_path(upload_id)) for upload_id in live}
+    with os.scandir(storage.STAGING_DIR) as entries:
+        for entry in entries:
+            if entry.name in live_names or not entry.is_file():
+                continue
+            if entry.stat().st_mtime < cutoff.replace(tzinfo=timezone.utc).timestamp():
+                os.remove(entry.path)
+                stats["files"] += 1
+    return stats
+
+@jobs.handler("sweep_uploads")
+def sweep_uploads(payload):
+    stats = sweep_upload_sessions()
+    if stats["sessions"] or stats["files"]:
+        print(f"[Uploads] Swept {stats['sessions']} abandoned sessions, {stats['files']} staging files.")
+    # Tâche périodique : elle se reprogramme elle-même
+    with SessionLocal() as db:
+        jobs.enqueue(db, "sweep_uploads", {}, delay=UPLOAD_SWEEP_INTERVAL)
+        db.commit()
+
+@app.delete("/uploads/{upload_id}")
+async def abort_upload(upload_id: str, db: AsyncSession = Depends(get_db)):
+    session = await get_upload_session(db, upload_id)
+    await run_in_threadpool(uploads.remove_if_exists, upload_tmp_path(upload_id))
+    await db.delete(session)
+    await db.commit()
+    return {"info": "Upload aborted"}
+
+@app.post("/games/{game_id}/save")
+async def create_save(
+    game_id: int,
+    request: Request,
+    current_user: schemas.Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    form = await uploads.parse_upload_form(request, {"file": upload_target("saves")})
+    try:
+        file = form.file("file")
+        # Une save identique à une version précédente réutilise le même objet
+        file_key = storage.sharded_key("saves", file.sha256, ".sav")
+        await run_in_threadpool(file.publish, file_key)
+    finally:
+        await run_in_threadpool(form.discard)
 
     db_save = models.Save(
-        file_path=file_location,
+        file_path=file_key,
+        sha256=file.sha256,
+        size=file.size,
         game_id=game_id,
         user_id=current_user.id,
         created_at=datetime.utcnow()
     )
     db.add(db_save)
-    db.commit()
-    db.refresh(db_save)
+    await db.flush()
+
+    # Pointeur "dernière save" mis à jour dans la même transaction
+    await db.execute(
+        sqlite_insert(models.SaveHead)
+        .values(user_id=current_user.id, game_id=game_id, latest_save_id=db_save.id)
+        .on_conflict_do_update(
+            index_elements=[models.SaveHead.user_id, models.SaveHead.game_id],
+            set_={"latest_save_id": db_save.id}
+        )
+    )
+    await db.commit()
+
+    return {"info": "Save version created", "save_id": db_save.id, "sha256": db_save.sha256}
 
-    return {"info": "Save version created", "save_id": db_save.id}
+@app.get("/games/{game_id}/saves", response_model=List[schemas.Save])
+async def read_game_saves(
+    game_id: int,
+    limit: int = 50,
+    current_user: schemas.Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    # Historique des saves de l'utilisateur courant (index user_id, game_id, created_at)
+    result = await db.execute(
+        select(models.Save)
+        .where(models.Save.user_id == current_user.id)
+        .where(models.Save.game_id == game_id)
+        .order_by(models.Save.created_at.desc())
+        .limit(min(limit, 500))
+    )
+    return result.scalars().all()
+
+async def find_latest_save(db: AsyncSession, user_id: int, game_id: int) -> Optional[models.Save]:
+    result = await db.execute(
+        select(models.Save)
+        .join(models.SaveHead, models.SaveHead.latest_save_id == models.Save.id)
+        .where(models.SaveHead.user_id == user_id)
+        .where(models.SaveHead.game_id == game_id)
+    )
+    return result.scalar_one_or_none()
+
+def hash_stored_file(key: str) -> str:
+    with storage.backend.open(key) as f:
+        return rom_store.hash_stream(f)
 
 @app.get("/games/{game_id}/save/latest")
-def get_latest_save(
-    game_id: int, 
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_latest_save(
+    game_id: int,
+    request: Request,
+    current_user: schemas.Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    latest_save = db.query(models.Save)\
-        .filter(models.Save.game_id == game_id)\
-        .filter(models.Save.user_id == current_user.id)\
-        .order_by(models.Save.created_at.desc())\
-        .first()
+    latest_save = await find_latest_save(db, current_user.id, game_id)
 
-    if not latest_save or not os.path.exists(latest_save.file_path):
+    if not latest_save or not await run_in_threadpool(storage.backend.exists, latest_save.file_path):
         raise HTTPException(status_code=404, detail="No save found for this game")
 
-    return FileResponse(
-        latest_save.file_path, 
-        filename=f"{game_id}.sav",
-        headers={"Cache-Control": "no-cache"} 
+    if latest_save.sha256 is None:
+        # Saves antérieures au calcul d'empreinte à l'upload
+        latest_save.sha256 = await run_in_threadpool(hash_stored_file, latest_save.file_path)
+        latest_save.size = await run_in_threadpool(storage.backend.size, latest_save.file_path)
+        await db.commit()
+
+    # ETag = SHA-256 du contenu : le client envoie celle de son .sav local
+    # (If-None-Match) et reçoit un 304 s'il est déjà à jour.
+    return media.storage_response(
+        latest_save.file_path,
+        request.headers,
+        etag=f'"{latest_save.sha256}"',
+        media_type="application/octet-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Content-Disposition": f'attachment; filename="{game_id}.sav"',
+            # Date de cette save : Last-Modified est celle du blob, partagé par toutes les saves identiques
+            "X-Save-Created-At": latest_save.created_at.replace(tzinfo=timezone.utc).isoformat()
+        },
+        filename=f"{game_id}.sav"
     )
 
 @app.get("/games/{game_id}/save/latest/info")
-def get_latest_save_info(
+async def get_latest_save_info(
     game_id: int, 
-    current_user: models.User = Depends(get_current_user), 
-    db: Session = Depends(get_db)
+    current_user: schemas.Principal = Depends(get_current_user), 
+    db: AsyncSession = Depends(get_db)
 ):
-    latest_save = db.query(models.Save)\
-        .filter(models.Save.game_id == game_id)\
-        .filter(models.Save.user_id == current_user.id)\
-        .order_by(models.Save.created_at.desc())\
-        .first()
+    latest_save = await find_latest_save(db, current_user.id, game_id)
 
     if not latest_save:
         raise HTTPException(status_code=404, detail="No save found")
 
     return {
         "created_at": latest_save.created_at.isoformat(),
-        "id": latest_save.id
+        "id": latest_save.id,
+        "sha256": latest_save.sha256,
+        "size": latest_save.size
     }
 
+@app.get("/users/me/saves/manifest", response_model=schemas.SaveManifest)
+async def get_save_manifest(
+    since: Optional[int] = None,
+    current_user: schemas.Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    # Une ligne par jeu via les pointeurs save_heads (clé primaire user_id, game_id)
+    query = select(models.SaveHead.game_id, models.Save)\
+        .join(models.Save, models.Save.id == models.SaveHead.latest_save_id)\
+        .where(models.SaveHead.user_id == current_user.id)
+
+    if since is not None:
+        # Curseur = id de save, pas created_at : l'horodatage est fixé avant le commit, donc une
+        # save validée un peu plus tard peut porter une date plus ancienne et ne jamais revenir.
+        # Les écritures SQLite étant sérialisées (BEGIN IMMEDIATE), les id suivent l'ordre des commits.
+        query = query.where(models.Save.id > since)
+
+    result = await db.execute(query)
+
+    entries = [
+        schemas.SaveManifestEntry(
+            game_id=game_id,
+            save_id=save.id,
+            sha256=save.sha256,
+            size=save.size,
+            created_at=save.created_at
+        )
+        for game_id, save in result.all()
+    ]
+
+    cursor = max((entry.save_id for entry in entries), default=since)
+    return schemas.SaveManifest(saves=entries, cursor=cursor)
+
+MAX_PLAYTIME_BATCH = 1000
+
+def utc_naive(moment: Optional[datetime]) -> datetime:
+    """Les dates sont stockées en UTC naïf (datetime.utcnow) : on y ramène celles du client."""
+    if moment is None:
+        return datetime.utcnow()
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc).replace(tzinfo=None)
+    return moment
+
+def playtime_upsert():
+    # Incrément fait par SQLite lui-même : pas de lecture préalable, pas d'incrément perdu
+    stmt = sqlite_insert(models.Playtime)
+    return stmt.on_conflict_do_update(
+        index_elements=[models.Playtime.user_id, models.Playtime.game_id],
+        set_={
+            "seconds": func.coalesce(models.Playtime.seconds, 0) + stmt.excluded.seconds,
+            "last_played": func.max(
+                func.coalesce(models.Playtime.last_played, stmt.excluded.last_played),
+                stmt.excluded.last_played
+            )
+        }
+    )
+
 @app.post("/games/{game_id}/playtime")
-def add_playtime(
+async def add_playtime(
     game_id: int, 
     payload: schemas.PlaytimeUpdate, 
-    current_user: models.User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: schemas.Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    # Chercher si une entrée existe déjà pour ce couple User/Game
-    stat = db.query(models.Playtime)\
-        .filter(models.Playtime.user_id == current_user.id)\
-        .filter(models.Playtime.game_id == game_id)\
-        .first()
-    
-    if not stat:
-        stat = models.Playtime(user_id=current_user.id, game_id=game_id, seconds=0)
-        db.add(stat)
-    
-    stat.seconds += payload.seconds
-    stat.last_played = datetime.utcnow()
-    
-    db.commit()
-    return {"new_total": stat.seconds}
+    ended_at = utc_naive(payload.ended_at)
+    session_id = str(payload.session_id) if payload.session_id else None
+    # Journal d'abord : une session déjà reçue (même session_id) ne compte pas deux fois
+    recorded = await play_stats.record_sessions(db, current_user.id, [(game_id, payload.seconds, ended_at, session_id)])
+    if recorded:
+        result = await db.execute(
+            playtime_upsert()
+            .values(
+                user_id=current_user.id,
+                game_id=game_id,
+                seconds=payload.seconds,
+                last_played=ended_at
+            )
+            .returning(models.Playtime.seconds)
+        )
+    else:
+        result = await db.execute(
+            select(models.Playtime.seconds)
+            .where(models.Playtime.user_id == current_user.id, models.Playtime.game_id == game_id)
+        )
+    new_total = result.scalar_one()
+    await db.commit()
+    return {"new_total": new_total}
+
+@app.post("/users/me/playtime/batch")
+async def add_playtime_batch(
+    payload: schemas.PlaytimeBatch,
+    current_user: schemas.Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Sessions mises en file par le client, envoyées en une requête et une transaction."""
+    if len(payload.sessions) > MAX_PLAYTIME_BATCH:
+        raise HTTPException(status_code=413, detail=f"Too many sessions (max {MAX_PLAYTIME_BATCH})")
+
+    accepted = []
+    rejected = []
+    for index, item in enumerate(payload.sessions):
+        try:
+            play_session = schemas.PlaytimeSession.model_validate(item)
+        except ValidationError:
+            # Durée hors bornes, horloge du client très en avance... : la renvoyer ne changerait rien
+            rejected.append(index)
+            continue
+        accepted.append((play_session.game_id, play_session.seconds, utc_naive(play_session.ended_at),
+                         str(play_session.session_id) if play_session.session_id else None))
+    if not accepted:
+        return {"accepted": 0, "games": 0, "rejected": rejected}
+
+    # Journal d'abord : les sessions d'un lot rejoué (réponse perdue côté client) sont ignorées
+    recorded = await play_stats.record_sessions(db, current_user.id, accepted)
+
+    # Une ligne par jeu : les sessions du même jeu sont additionnées avant l'upsert
+    totals = {}
+    for game_id, seconds, ended_at in recorded:
+        total, last_played = totals.get(game_id, (0, ended_at))
+        totals[game_id] = (total + seconds, max(last_played, ended_at))
+
+    if totals:
+        await db.execute(playtime_upsert(), [
+            {"user_id": current_user.id, "game_id": game_id, "seconds": seconds, "last_played": last_played}
+            for game_id, (seconds, last_played) in totals.items()
+        ])
+    await db.commit()
+
+    # accepted compte aussi les doublons : le client peut les retirer de sa file,
+    # rejected donne les positions des sessions invalides, écartées définitivement
+    return {"accepted": len(accepted), "games": len(totals), "rejected": rejected}
 
 @app.get("/users/me/stats")
-def get_my_stats(current_user: models.User = Depends(get_current_user), db: Session = Depends(get_db)):
-    stats = db.query(models.Playtime).filter(models.Playtime.user_id == current_user.id).all()
+async def get_my_stats(current_user: schemas.Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(models.Playtime).where(models.Playtime.user_id == current_user.id))
+    stats = result.scalars().all()
     # Retourne {1: 3600, 2: 120, ...}
     return {stat.game_id: stat.seconds for stat in stats}
+
+# Les stats détaillées se lisent uniquement dans les rollups journaliers :
+# chaque requête est un parcours d'index borné par la plage de jours.
+MAX_STATS_DAYS = 366
+
+@app.get("/users/me/stats/week", response_model=schemas.WeeklyPlaytime)
+async def get_my_week(current_user: schemas.Principal = Depends(get_current_user), db: AsyncSession = Depends(get_db)):
+    since = play_stats.week_start(datetime.utcnow().date())
+    result = await db.execute(
+        select(models.PlaytimeDaily.game_id, models.PlaytimeDaily.day, models.PlaytimeDaily.seconds)
+        .where(models.PlaytimeDaily.user_id == current_user.id, models.PlaytimeDaily.day >= since)
+    )
+
+    days = {}
+    games = {}
+    for game_id, day, seconds in result.all():
+        days[day] = days.get(day, 0) + seconds
+        games[game_id] = games.get(game_id, 0) + seconds
+
+    return {"since": since, "total_seconds": sum(days.values()), "days": days, "games": games}
+
+@app.get("/users/me/games/{game_id}/history", response_model=List[schemas.DailyPlaytime])
+async def get_my_game_history(
+    game_id: int,
+    days: int = 90,
+    current_user: schemas.Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    since = datetime.utcnow().date() - timedelta(days=max(1, min(days, MAX_STATS_DAYS)) - 1)
+    result = await db.execute(
+        select(models.PlaytimeDaily)
+        .where(
+            models.PlaytimeDaily.user_id == current_user.id,
+            models.PlaytimeDaily.game_id == game_id,
+            models.PlaytimeDaily.day >= since
+        )
+        .order_by(models.PlaytimeDaily.day)
+    )
+    return result.scalars().all()
+
+@app.get("/stats/most-played", response_model=List[schemas.MostPlayedGame])
+async def get_most_played(days: int = 7, limit: int = 10, db: AsyncSession = Depends(get_db)):
+    since = datetime.utcnow().date() - timedelta(days=max(1, min(days, MAX_STATS_DAYS)) - 1)
+    total_seconds = func.sum(models.GamePlaytimeDaily.seconds).label("seconds")
+    ranking = select(
+            models.GamePlaytimeDaily.game_id,
+            total_seconds,
+            func.sum(models.GamePlaytimeDaily.sessions).label("sessions")
+        )\
+        .where(models.GamePlaytimeDaily.day >= since)\
+        .group_by(models.GamePlaytimeDaily.game_id)\
+        .order_by(total_seconds.desc())\
+        .limit(max(1, min(limit, 100)))\
+        .subquery()
+
+    result = await db.execute(
+        select(ranking.c.game_id, models.Game.title, ranking.c.seconds, ranking.c.sessions)
+        .join(models.Game, models.Game.id == ranking.c.game_id)
+        .order_by(ranking.c.seconds.desc())
+    )
+    return [row._asdict() for row in result.all()]
+
+# --- Administration ---
+
+@app.post("/admin/covers/backfill", status_code=202)
+async def start_cover_backfill(
+    limit: Optional[int] = None,
+    admin: schemas.Principal = Depends(get_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Lance en tâche de fond la recherche des jaquettes manquantes de tout le catalogue."""
+    job = jobs.enqueue(db, "backfill_covers", {"limit": limit, "requested_by": admin.username}, max_attempts=3)
+    await db.commit()
+    jobs.pool.notify()
+    return {"job_id": job.id}
+
+@app.get("/metrics/jobs")
+async def get_job_metrics(db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(models.Job.status, func.count()).group_by(models.Job.status))
+    return dict(result.all())
+
+@app.get("/metrics/caches")
+async def get_cache_metrics():
+    return {"principal": principal_cache.stats(), "catalog": catalog_cache.stats()}
@@ -0,0 +1,306 @@
+import mimetypes
+import os
+import re
+import stat
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import RedirectResponse, Response
+
+import storage
+from rom_store import SIDECAR_ENCODINGS
+
+CHUNK_SIZE = 256 * 1024
+
+# Les fichiers nommés par leur SHA-256 (ROMs du store) ont une ETag dérivée du contenu
+CONTENT_HASH_NAME = re.compile(r"^([0-9a-f]{64})(\.[A-Za-z0-9]+)*$")
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# Fichiers nommés par empreinte (et leurs variantes "<sha>_grid.webp"...) : le contenu
+# d'une URL ne change jamais, le client peut les garder sans revalider
+IMMUTABLE_NAME = re.compile(r"^[0-9a-f]{64}(_[a-z]+)?(\.[A-Za-z0-9]+)*$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Qui transfère les octets une fois la requête autorisée :
+#   python     : boucle de lecture/écriture dans le worker (défaut)
+#   x-accel    : nginx via X-Accel-Redirect (location interne MEDIA_ACCEL_PREFIX -> MEDIA_ACCEL_ROOT).
+#                Mode recommandé en production : zéro copie avec uvicorn
+#   x-sendfile : Apache/lighttpd via X-Sendfile (chemin absolu)
+#   sendfile   : expérimental. Extension ASGI http.response.zerocopysend (os.sendfile côté serveur),
+#                sinon python. uvicorn ne l'annonce pas : avec lui, ce mode revient exactement à python
+MEDIA_SERVE_MODE = os.getenv("MEDIA_SERVE_MODE", "python").lower()
+MEDIA_ACCEL_PREFIX = os.getenv("MEDIA_ACCEL_PREFIX", "/_protected/")
+MEDIA_ACCEL_ROOT = os.path.abspath(os.getenv("MEDIA_ACCEL_ROOT", "."))
+
+PROXY_HEADERS = {"x-accel": "X-Accel-Redirect", "x-sendfile": "X-Sendfile"}
+ZEROCOPY_EXTENSION = "http.response.zerocopysend"
+
+# Préfixes de clés jamais servis par /media (les saves passent par leur route authentifiée)
+PRIVATE_PREFIXES = ("saves",)
+
+if MEDIA_SERVE_MODE not in ("python", "sendfile", *PROXY_HEADERS):
+    raise ValueError(f"Unknown MEDIA_SERVE_MODE '{MEDIA_SERVE_MODE}'")
+
+_zerocopy_checked = False
+
+
+def check_serve_mode():
+    """Au démarrage : signale un mode qui ne fera pas ce qu'on attend de lui."""
+    if MEDIA_SERVE_MODE == "sendfile":
+        print(f"⚠️  MEDIA_SERVE_MODE=sendfile is experimental: it needs an ASGI server advertising the "
+              f"'{ZEROCOPY_EXTENSION}' extension; uvicorn does not, so files will be streamed by Python. "
+              "In production, put nginx in front and use MEDIA_SERVE_MODE=x-accel.")
+
+
+def _has_zerocopy(scope):
+    global _zerocopy_checked
+    available = ZEROCOPY_EXTENSION in scope.get("extensions", {})
+    if not _zerocopy_checked:
+        _zerocopy_checked = True
+        print(f"[Media] sendfile mode: {ZEROCOPY_EXTENSION} "
+              f"{'available' if available else 'NOT advertised by the server, falling back to Python streaming'}")
+    return available
+
+
+def file_etag(path, stat_result):
+    match = CONTENT_HASH_NAME.match(os.path.basename(path))
+    if match:
+        return f'"{match.group(1)}"'
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def etag_matches(header_value, etag):
+    if header_value.strip() == "*":
+        return True
+    candidates = [tag.strip() for tag in header_value.split(",")]
+    # If-None-Match utilise la comparaison faible
+    weak = etag[2:] if etag.startswith("W/") else etag
+    return any((c[2:] if c.startswith("W/") else c) == weak for c in candidates)
+
+
+def _parse_http_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_range(header_value, size):
+    """Retourne (start, end) inclusifs, None si le Range est ignoré, ou "unsatisfiable"."""
+    match = RANGE_HEADER.match(header_value.strip())
+    if not match:
+        # Plusieurs plages ou syntaxe inconnue : on renvoie le fichier entier
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0:
+            return "unsatisfiable"
+        return max(size - suffix, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size or end < start:
+        return "unsatisfiable"
+    return start, min(end, size - 1)
+
+
+class FileRangeResponse(Response):
+    """Envoie tout ou partie d'un fichier par morceaux, sans le charger en mémoire."""
+
+    def __init__(self, path, start, length, status_code=200, headers=None, media_type=None):
+        super().__init__(status_code=status_code, headers=headers, media_type=media_type)
+        self.path = path
+        self.start = start
+        self.length = length
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+
+        if scope["method"].upper() == "HEAD" or self.length == 0 or self.status_code == 304:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if MEDIA_SERVE_MODE == "sendfile" and _has_zerocopy(scope):
+            # Le serveur ASGI copie fichier -> socket dans le noyau (sendfile), sans passer par Python
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": ZEROCOPY_EXTENSION,
+                    "file": f,
+                    "offset": self.start,
+                    "count": self.length,
+                    "more_body": False,
+                })
+            return
+
+        async with await anyio.open_file(self.path, "rb") as f:
+            await f.seek(self.start)
+            remaining = self.length
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def accepted_encodings(header_value):
+    """Encodages acceptés par le client (Accept-Encoding), en ignorant ceux à q=0."""
+    accepted = set()
+    for item in (header_value or "").split(","):
+        token, _, params = item.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if token:
+            accepted.add(token.strip().lower())
+    return accepted
+
+
+def find_sidecar(path, request_headers):
+    """Variante précompressée servable pour cette requête : (encodage, chemin) ou None."""
+    # Les plages d'octets portent toujours sur la variante identity
+    if "range" in request_headers:
+        return None
+    accepted = accepted_encodings(request_headers.get("accept-encoding"))
+    for encoding, suffix in SIDECAR_ENCODINGS:
+        if encoding in accepted and os.path.exists(path + suffix):
+            return encoding, path + suffix
+    return None
+
+
+def proxy_response(path, headers=None, media_type=None):
+    """Réponse vide : le reverse proxy lit lui-même le fichier (Range et If-Range compris)."""
+    if MEDIA_SERVE_MODE == "x-accel":
+        relative = os.path.relpath(os.path.abspath(path), MEDIA_ACCEL_ROOT).replace(os.sep, "/")
+        target = MEDIA_ACCEL_PREFIX.rstrip("/") + "/" + quote(relative)
+    else:
+        target = os.path.abspath(path)
+
+    response_headers = dict(headers or {})
+    response_headers[PROXY_HEADERS[MEDIA_SERVE_MODE]] = target
+    return Response(status_code=200, headers=response_headers, media_type=media_type)
+
+
+def file_response(path, request_headers, stat_result=None, etag=None, media_type=None, headers=None):
+    """
+    Réponse fichier avec validateurs forts (ETag + Last-Modified), requêtes
+    conditionnelles (If-None-Match / If-Modified-Since → 304) et plages d'octets
+    (Range / If-Range → 206, 416 si la plage est hors du fichier).
+    """
+    if stat_result is None:
+        stat_result = os.stat(path)
+    size = stat_result.st_size
+    etag = etag or file_etag(path, stat_result)
+    last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+
+    response_headers = {
+        "accept-ranges": "bytes",
+        "etag": etag,
+        "last-modified": last_modified,
+    }
+    response_headers.update(headers or {})
+
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag_matches(if_none_match, etag):
+            return FileRangeResponse(path, 0, 0, status_code=304, headers=response_headers)
+    else:
+        since = _parse_http_date(request_headers.get("if-modified-since"))
+        if since is not None and int(stat_result.st_mtime) <= since:
+            return FileRangeResponse(path, 0, 0, status_code=304, headers=response_headers)
+
+    if MEDIA_SERVE_MODE in PROXY_HEADERS:
+        # Les 304 restent décidés ici (ETag applicative), le reste est délégué au proxy
+        delegated = {k: v for k, v in response_headers.items() if k not in ("etag", "last-modified", "accept-ranges")}
+        return proxy_response(path, headers=delegated, media_type=media_type)
+
+    byte_range = None
+    range_header = request_headers.get("range")
+    if range_header:
+        if_range = request_headers.get("if-range")
+        # If-Range : la plage n'est servie que si la représentation n'a pas changé
+        if if_range is None or if_range.strip() in (etag, last_modified):
+            byte_range = _parse_range(range_header, size)
+
+    if byte_range == "unsatisfiable":
+        response_headers["content-range"] = f"bytes */{size}"
+        response_headers["content-length"] = "0"
+        return FileRangeResponse(path, 0, 0, status_code=416, headers=response_headers)
+
+    if byte_range is None:
+        response_headers["content-length"] = str(size)
+        return FileRangeResponse(path, 0, size, headers=response_headers, media_type=media_type)
+
+    start, end = byte_range
+    response_headers["content-range"] = f"bytes {start}-{end}/{size}"
+    response_headers["content-length"] = str(end - start + 1)
+    return FileRangeResponse(path, start, end - start + 1, status_code=206,
+                             headers=response_headers, media_type=media_type)
+
+
+def storage_response(key, request_headers, etag, media_type=None, headers=None, filename=None):
+    """
+    Réponse pour une clé de stockage : fichier local (voir file_response), ou pour
+    un stockage distant 304 / redirection vers une URL présignée de courte durée.
+    """
+    local_path = storage.backend.local_path(key)
+    if local_path is not None:
+        return file_response(local_path, request_headers, etag=etag, media_type=media_type, headers=headers)
+
+    response_headers = {"etag": etag}
+    response_headers.update(headers or {})
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=response_headers)
+    return RedirectResponse(storage.backend.presigned_url(key, filename), status_code=307, headers=response_headers)
+
+
+class MediaFiles(StaticFiles):
+    """StaticFiles avec support fiable des Range, ETag forts et If-Range."""
+
+    async def get_response(self, path, scope):
+        key = path.replace(os.sep, "/")
+        if key.split("/", 1)[0] in PRIVATE_PREFIXES or key.startswith("."):
+            raise HTTPException(status_code=404)
+
+        if storage.backend.local_path(key) is None:
+            # Stockage distant : le client suit la redirection (Range compris) vers le bucket
+            return RedirectResponse(storage.backend.presigned_url(key), status_code=307,
+                                    headers={"cache-control": "no-store"})
+        return await super().get_response(path, scope)
+
+    def file_response(self, full_path, stat_result, scope, status_code=200):
+        if not stat.S_ISREG(stat_result.st_mode):
+            return super().file_response(full_path, stat_result, scope, status_code)
+        media_type = mimetypes.guess_type(str(full_path))[0] or "application/octet-stream"
+        request_headers = Headers(scope=scope)
+
+        if not IMMUTABLE_NAME.match(os.path.basename(str(full_path))):
+            # Anciens noms non versionnés : réutilisables mais toujours revalidés (304)
+            return file_response(str(full_path), request_headers, stat_result=stat_result,
+                                 media_type=media_type, headers={"cache-control": "no-cache"})
+
+        # Blobs du store : variante précompressée si le client l'accepte (ROMs).
+        # Derrière un proxy, la négociation lui revient (nginx gzip_static trouve les mêmes .gz).
+        headers = {"cache-control": IMMUTABLE_CACHE_CONTROL, "vary": "Accept-Encoding"}
+        sidecar = None if MEDIA_SERVE_MODE in PROXY_HEADERS else find_sidecar(str(full_path), request_headers)
+        if sidecar is None:
+            return file_response(str(full_path), request_headers, stat_result=stat_result,
+                                 media_type=media_type, headers=headers)
+
+        encoding, sidecar_path = sidecar
+        headers["content-encoding"] = encoding
+        # ETag propre à chaque encodage : ce ne sont pas les mêmes octets
+        etag = file_etag(str(full_path), stat_result)[:-1] + f'-{encoding}"'
+        return file_response(sidecar_path, request_headers, etag=etag, media_type=media_type, headers=headers)
@@ -0,0 +1,177 @@
+"""
+Déplace les médias de l'ancien agencement (media/roms/<fichier>, saves/<fichier>...)
+vers le stockage configuré, en clés partitionnées "<type>/ab/cd/<empreinte>".
+
+    python migrate_storage.py [--dry-run] [--legacy-media media] [--limit N]
+
+Reprenable : les lignes déjà migrées sont ignorées, et un fichier source n'est
+supprimé qu'une fois la base mise à jour. À lancer serveur arrêté.
+"""
+import argparse
+import os
+import re
+import shutil
+import uuid
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from sqlalchemy import select, update
+
+import catalog
+import models
+import rom_store
+import storage
+from database import SessionLocal
+
+BATCH_SIZE = 200
+
+# (modèle, colonne, préfixe des nouvelles clés)
+COLUMNS = (
+    (models.Game, "rom_path", "roms"),
+    (models.Game, "cover_path", "covers"),
+    (models.Game, "cover_thumb_path", "covers/thumbs"),
+    (models.Game, "cover_bg_path", "covers/thumbs"),
+    (models.Platform, "icon_path", "icons"),
+    (models.Save, "file_path", "saves"),
+)
+
+HASHED_NAME = re.compile(r"^([0-9a-f]{64})(.*)$")
+
+
+def legacy_source(path, legacy_media):
+    # Les saves étaient écrites dans un dossier relatif au serveur, hors de media/
+    if os.path.isfile(path):
+        return path
+    return os.path.join(legacy_media, path)
+
+
+def target_key(prefix, path, source, known_sha256=None):
+    name = os.path.basename(path)
+    match = HASHED_NAME.match(name)
+    if match:
+        return storage.sharded_key(prefix, match.group(1), match.group(2))
+    _, ext = os.path.splitext(name)
+    digest = known_sha256 or rom_store.hash_file(source)
+    return storage.sharded_key(prefix, digest, ext.lower())
+
+
+def stage_copy(source):
+    """Copie (lien physique si possible) dans le staging : la source reste en place jusqu'au commit."""
+    tmp_path = storage.staging_path(f".{uuid.uuid4()}.tmp")
+    try:
+        os.link(source, tmp_path)
+    except OSError:
+        shutil.copyfile(source, tmp_path)
+    return tmp_path
+
+
+def publish(source, key):
+    if not storage.backend.exists(key):
+        storage.backend.put_file(stage_copy(source), key)
+    # Variantes précompressées des ROMs : elles suivent leur blob
+    for _, suffix in rom_store.SIDECAR_ENCODINGS:
+        if os.path.isfile(source + suffix) and not storage.backend.exists(key + suffix):
+            storage.backend.put_file(stage_copy(source + suffix), key + suffix)
+
+
+def migrate_column(model, column_name, prefix, legacy_media, dry_run, limit, stats):
+    column = getattr(model, column_name)
+    # Les saves connaissent déjà l'empreinte de leur contenu
+    known_hash = [models.Save.sha256] if model is models.Save else []
+    moved = {}
+    last_id = 0
+
+    while limit is None or stats["migrated"] < limit:
+        with SessionLocal() as db:
+            rows = db.execute(
+                select(model.id, column, *known_hash)
+                .where(column.is_not(None), model.id > last_id)
+                .order_by(model.id)
+                .limit(BATCH_SIZE)
+            ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        updates = {}
+        sources = {}
+        for row in rows:
+            path = row[1]
+            if storage.is_sharded(path) or (limit is not None and stats["migrated"] + len(updates) >= limit):
+                continue
+
+            if path in moved:
+                updates[row.id] = moved[path]
+                continue
+
+            source = legacy_source(path, legacy_media)
+            if not os.path.isfile(source):
+                # Déjà déplacé par une exécution interrompue après publication ?
+                match = HASHED_NAME.match(os.path.basename(path))
+                key = storage.sharded_key(prefix, match.group(1), match.group(2)) if match else None
+                if key and storage.backend.exists(key):
+                    moved[path] = updates[row.id] = key
+                else:
+                    print(f"[Storage] Missing file for {model.__tablename__}.{column_name} #{row.id}: {path}")
+                    stats["missing"] += 1
+                continue
+
+            key = target_key(prefix, path, source, row[2] if known_hash else None)
+            if not dry_run:
+                publish(source, key)
+            moved[path] = updates[row.id] = key
+            sources[path] = source
+
+        if not updates:
+            continue
+        stats["migrated"] += len(updates)
+        if dry_run:
+            continue
+
+        with SessionLocal() as db:
+            for row_id, key in updates.items():
+                db.execute(
+                    update(model)
+                    .where(model.id == row_id)
+                    .values({column_name: key})
+                    .execution_options(synchronize_session=False)
+                )
+            if model is not models.Save:
+                db.execute(catalog.bump_version_statement())
+            db.commit()
+
+            if limit is not None:
+                # Arrêt en cours de table : un fichier partagé peut encore servir à des lignes non migrées
+                still_used = set(db.execute(select(column).where(column.in_(list(sources)))).scalars())
+                sources = {path: source for path, source in sources.items() if path not in still_used}
+
+        # La base pointe vers les nouvelles clés : les anciens fichiers peuvent partir
+        for source in sources.values():
+            for path in [source] + [source + suffix for _, suffix in rom_store.SIDECAR_ENCODINGS]:
+                if os.path.isfile(path):
+                    os.remove(path)
+                    stats["removed"] += 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move media files into the sharded storage layout.")
+    parser.add_argument("--dry-run", action="store_true", help="report what would move without touching anything")
+    parser.add_argument("--legacy-media", default="media", help="directory the old paths are relative to")
+    parser.add_argument("--limit", type=int, default=None, help="maximum number of rows to migrate")
+    args = parser.parse_args()
+
+    stats = {"migrated": 0, "missing": 0, "removed": 0}
+    for model, column_name, prefix in COLUMNS:
+        before = stats["migrated"]
+        migrate_column(model, column_name, prefix, args.legacy_media, args.dry_run, args.limit, stats)
+        print(f"[Storage] {model.__tablename__}.{column_name}: {stats['migrated'] - before} rows "
+              f"{'to migrate' if args.dry_run else 'migrated'}.")
+
+    print(f"{stats['migrated']} rows {'to migrate' if args.dry_run else 'migrated'}, "
+          f"{stats['missing']} missing files, {stats['removed']} legacy files removed.")
+
+
+if __name__ == "__main__":
+    main()
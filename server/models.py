@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, BigInteger, String, Text, JSON, ForeignKey, DateTime, Date, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -30,7 +30,13 @@ class Game(Base):
     title = Column(String, index=True)
 
     cover_path = Column(String, nullable=True)
+    # Variantes légères de la jaquette (thumbnails.py), générées en tâche de fond
+    cover_thumb_path = Column(String, nullable=True)
+    cover_bg_path = Column(String, nullable=True)
+    cover_placeholder = Column(Text, nullable=True)
     rom_path = Column(String, nullable=False)
+    rom_sha256 = Column(String(64), index=True, nullable=True)
+    rom_size = Column(BigInteger, nullable=True)
 
     platform_id = Column(Integer, ForeignKey("platforms.id"))
 
@@ -38,6 +44,10 @@ class Game(Base):
     saves = relationship("Save", back_populates="game")
 
     playtimes = relationship("Playtime", back_populates="game")
+
+    __table_args__ = (
+        Index("ix_games_platform_title", "platform_id", "title"),
+    )
     
 
 class Save(Base):
@@ -45,12 +55,29 @@ class Save(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     file_path = Column(String, nullable=False)
+    sha256 = Column(String(64), nullable=True)
+    size = Column(BigInteger, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     game_id = Column(Integer, ForeignKey("games.id"))
     game = relationship("Game", back_populates="saves")
     user_id = Column(Integer, ForeignKey("users.id"))
     user = relationship("User", back_populates="saves")
 
+    __table_args__ = (
+        Index("ix_saves_user_game_created", "user_id", "game_id", "created_at"),
+    )
+
+
+class SaveHead(Base):
+    """Pointeur vers la dernière save de chaque couple User/Game (lookup par clé primaire)."""
+    __tablename__ = "save_heads"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    game_id = Column(Integer, ForeignKey("games.id"), primary_key=True)
+    latest_save_id = Column(Integer, ForeignKey("saves.id"), nullable=False)
+
+    latest_save = relationship("Save")
+
 
 class Playtime(Base):
     __tablename__ = "playtimes"
@@ -63,3 +90,127 @@ class Playtime(Base):
     
     user = relationship("User", back_populates="playtimes")
     game = relationship("Game", back_populates="playtimes")
+
+
+class PlaySession(Base):
+    """Journal des sessions de jeu (ajout seulement) ; les stats se lisent dans les rollups."""
+    __tablename__ = "play_sessions"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    game_id = Column(Integer, ForeignKey("games.id"), nullable=False)
+    seconds = Column(Integer, nullable=False)
+    started_at = Column(DateTime, nullable=False)
+    ended_at = Column(DateTime, nullable=False)
+    # Identifiant généré par le client : un envoi rejoué (timeout, crash) n'est compté qu'une fois
+    session_id = Column(String(36), nullable=True)
+
+    __table_args__ = (
+        Index("ix_play_sessions_user_ended", "user_id", "ended_at"),
+        Index("ux_play_sessions_user_session", "user_id", "session_id", unique=True),
+    )
+
+
+class PlaytimeDaily(Base):
+    """Temps de jeu par utilisateur, jeu et jour (UTC), maintenu à l'insertion des sessions."""
+    __tablename__ = "playtime_daily"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    game_id = Column(Integer, ForeignKey("games.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    seconds = Column(Integer, nullable=False, default=0)
+    sessions = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        Index("ix_playtime_daily_user_day", "user_id", "day"),
+    )
+
+
+class GamePlaytimeDaily(Base):
+    """Temps de jeu cumulé de tous les utilisateurs par jour et par jeu (classements serveur)."""
+    __tablename__ = "game_playtime_daily"
+
+    day = Column(Date, primary_key=True)
+    game_id = Column(Integer, ForeignKey("games.id"), primary_key=True)
+    seconds = Column(Integer, nullable=False, default=0)
+    sessions = Column(Integer, nullable=False, default=0)
+
+
+class UploadSession(Base):
+    __tablename__ = "upload_sessions"
+
+    id = Column(String(32), primary_key=True)
+    title = Column(String, nullable=False)
+    platform_id = Column(Integer, ForeignKey("platforms.id"))
+    filename = Column(String, nullable=False)
+    size = Column(BigInteger, nullable=False)
+    chunk_size = Column(Integer, nullable=False)
+    expected_sha256 = Column(String(64), nullable=True)
+    status = Column(String, default="open", nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    # Dernière activité (morceau reçu) : les sessions inactives sont balayées
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=True)
+    game_id = Column(Integer, ForeignKey("games.id"), nullable=True)
+
+    chunks = relationship("UploadChunk", back_populates="upload", cascade="all, delete-orphan")
+
+
+class UploadChunk(Base):
+    __tablename__ = "upload_chunks"
+
+    upload_id = Column(String(32), ForeignKey("upload_sessions.id"), primary_key=True)
+    index = Column(Integer, primary_key=True)
+    size = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=False)
+
+    upload = relationship("UploadSession", back_populates="chunks")
+
+
+class CatalogVersion(Base):
+    """Compteur incrémenté à chaque modification du catalogue (jeux, plateformes)."""
+    __tablename__ = "catalog_version"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
+
+class Job(Base):
+    """Tâche de fond persistée (survit aux redémarrages), exécutée par jobs.JobWorkerPool."""
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False, default=dict)
+    status = Column(String, nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, default=datetime.utcnow)
+    locked_at = Column(DateTime, nullable=True)
+    # Renouvelé à chaque prise : un worker dont le bail a expiré ne peut plus modifier le job
+    claim_token = Column(String(32), nullable=True)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index("ix_jobs_status_run_after", "status", "run_after"),
+    )
+
+
+class IGDBCacheEntry(Base):
+    """Résultat d'une recherche IGDB par titre normalisé (cover_url NULL = aucun résultat)."""
+    __tablename__ = "igdb_cache"
+
+    query = Column(String, primary_key=True)
+    cover_url = Column(String, nullable=True)
+    fetched_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
+
+
+class IGDBToken(Base):
+    """Jeton OAuth Twitch partagé par tous les workers uvicorn."""
+    __tablename__ = "igdb_tokens"
+
+    client_id = Column(String, primary_key=True)
+    access_token = Column(String, nullable=False)
+    expires_at = Column(DateTime, nullable=False)
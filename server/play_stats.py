@@ -0,0 +1,114 @@
+from datetime import date, datetime, time, timedelta
+
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import models
+
+
+def split_by_day(started_at: datetime, ended_at: datetime):
+    """Découpe une session en (jour, secondes) : une partie à cheval sur minuit compte sur les deux jours."""
+    pieces = []
+    cursor = started_at
+    while cursor.date() < ended_at.date():
+        midnight = datetime.combine(cursor.date() + timedelta(days=1), time.min)
+        pieces.append((cursor.date(), int((midnight - cursor).total_seconds())))
+        cursor = midnight
+    pieces.append((ended_at.date(), int((ended_at - cursor).total_seconds())))
+    return pieces
+
+
+def _rollup_upsert(model, index_elements):
+    stmt = sqlite_insert(model)
+    return stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={
+            "seconds": model.seconds + stmt.excluded.seconds,
+            "sessions": model.sessions + stmt.excluded.sessions,
+        }
+    )
+
+
+async def log_sessions(db: AsyncSession, user_id: int, sessions):
+    """
+    Insère les sessions (game_id, seconds, ended_at, session_id) au journal et renvoie
+    celles qui n'y étaient pas encore : un session_id déjà vu (envoi rejoué) est ignoré.
+    """
+    new_sessions = []
+    log_rows = []
+    seen = set()
+    for game_id, seconds, ended_at, session_id in sessions:
+        if session_id is not None:
+            if session_id in seen:
+                continue
+            seen.add(session_id)
+        log_rows.append({
+            "user_id": user_id, "game_id": game_id, "seconds": seconds,
+            "started_at": ended_at - timedelta(seconds=seconds), "ended_at": ended_at,
+            "session_id": session_id
+        })
+        new_sessions.append((game_id, seconds, ended_at, session_id))
+
+    if not log_rows:
+        return []
+
+    stmt = sqlite_insert(models.PlaySession).on_conflict_do_nothing(
+        index_elements=[models.PlaySession.user_id, models.PlaySession.session_id]
+    )
+    if seen:
+        # RETURNING ne renvoie que les lignes réellement insérées
+        result = await db.execute(stmt.returning(models.PlaySession.session_id), log_rows)
+        inserted = set(result.scalars())
+        new_sessions = [s for s in new_sessions if s[3] is None or s[3] in inserted]
+    else:
+        await db.execute(stmt, log_rows)
+    return [(game_id, seconds, ended_at) for game_id, seconds, ended_at, _ in new_sessions]
+
+
+async def record_sessions(db: AsyncSession, user_id: int, sessions):
+    """
+    Ajoute les sessions (game_id, seconds, ended_at, session_id) au journal et met à jour
+    les rollups journaliers dans la même transaction (commit par l'appelant).
+    Renvoie les sessions (game_id, seconds, ended_at) réellement ajoutées, à cumuler par l'appelant.
+    """
+    new_sessions = await log_sessions(db, user_id, sessions)
+    user_days = {}
+    game_days = {}
+
+    for game_id, seconds, ended_at in new_sessions:
+        started_at = ended_at - timedelta(seconds=seconds)
+        for day, day_seconds in split_by_day(started_at, ended_at):
+            # La session est comptée une seule fois, le jour où elle se termine
+            count = 1 if day == ended_at.date() else 0
+            for rollup, key in ((user_days, (game_id, day)), (game_days, (day, game_id))):
+                totals = rollup.setdefault(key, [0, 0])
+                totals[0] += day_seconds
+                totals[1] += count
+
+    if not new_sessions:
+        return []
+
+    await db.execute(
+        _rollup_upsert(models.PlaytimeDaily, [
+            models.PlaytimeDaily.user_id, models.PlaytimeDaily.game_id, models.PlaytimeDaily.day
+        ]),
+        [
+            {"user_id": user_id, "game_id": game_id, "day": day, "seconds": seconds, "sessions": count}
+            for (game_id, day), (seconds, count) in user_days.items()
+        ]
+    )
+    await db.execute(
+        _rollup_upsert(models.GamePlaytimeDaily, [
+            models.GamePlaytimeDaily.day, models.GamePlaytimeDaily.game_id
+        ]),
+        [
+            {"day": day, "game_id": game_id, "seconds": seconds, "sessions": count}
+            for (day, game_id), (seconds, count) in game_days.items()
+        ]
+    )
+    return new_sessions
+
+
+def week_start(today: date):
+    """Lundi de la semaine (UTC) contenant today."""
+    return today - timedelta(days=today.weekday())
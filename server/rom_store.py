@@ -0,0 +1,105 @@
+import gzip
+import hashlib
+import os
+import uuid
+
+import storage
+
+try:
+    import zstandard
+except ImportError:  # zstd est optionnel : sans lui, seul le sidecar gzip est produit
+    zstandard = None
+
+CHUNK_SIZE = 1024 * 1024
+
+# Sidecar gardé seulement s'il fait gagner au moins 10 % (ROMs déjà compressées : inutile)
+SIDECAR_MAX_RATIO = 0.9
+GZIP_LEVEL = int(os.getenv("ROM_GZIP_LEVEL", "6"))
+ZSTD_LEVEL = int(os.getenv("ROM_ZSTD_LEVEL", "12"))
+
+# Content-Encoding -> extension du sidecar, par ordre de préférence
+SIDECAR_ENCODINGS = (("zstd", ".zst"), ("gzip", ".gz"))
+
+
+class StoredRom:
+    def __init__(self, path, sha256, size, created):
+        # path est la clé de stockage (ex: "roms/ab/cd/<sha256>.sfc")
+        self.path = path
+        self.sha256 = sha256
+        self.size = size
+        self.created = created
+
+
+def rom_blob_path(sha256, filename):
+    _, ext = os.path.splitext(filename or "")
+    return storage.sharded_key("roms", sha256, ext.lower())
+
+
+def hash_file(path):
+    with open(path, "rb") as f:
+        return hash_stream(f)
+
+
+def hash_stream(fileobj):
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b""):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def commit_rom(tmp_path, sha256, size, filename, linked_path=None):
+    """
+    Publie un fichier temporaire déjà haché dans le store (ou le jette si doublon).
+    linked_path est le blob déjà référencé en base pour cette empreinte, s'il existe.
+    """
+    if linked_path and storage.backend.exists(linked_path):
+        os.remove(tmp_path)
+        return StoredRom(linked_path, sha256, size, created=False)
+
+    key = rom_blob_path(sha256, filename)
+    created = storage.backend.put_file(tmp_path, key)
+    return StoredRom(key, sha256, size, created=created)
+
+
+def _compress_gzip(source, target):
+    with gzip.GzipFile(fileobj=target, mode="wb", compresslevel=GZIP_LEVEL, mtime=0) as out:
+        for chunk in iter(lambda: source.read(CHUNK_SIZE), b""):
+            out.write(chunk)
+
+
+def _compress_zstd(source, target):
+    compressor = zstandard.ZstdCompressor(level=ZSTD_LEVEL)
+    compressor.copy_stream(source, target, read_size=CHUNK_SIZE, write_size=CHUNK_SIZE)
+
+
+def write_sidecars(blob_path):
+    """
+    Produit à côté d'un blob ses variantes précompressées (<blob>.gz, <blob>.zst),
+    servies avec Content-Encoding quand le client les accepte. Renvoie les encodages gardés.
+    """
+    compressors = {"gzip": _compress_gzip}
+    if zstandard is not None:
+        compressors["zstd"] = _compress_zstd
+
+    size = os.path.getsize(blob_path)
+    kept = []
+    for encoding, suffix in SIDECAR_ENCODINGS:
+        compress = compressors.get(encoding)
+        sidecar_path = blob_path + suffix
+        if compress is None or os.path.exists(sidecar_path):
+            continue
+
+        tmp_path = f"{sidecar_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(blob_path, "rb") as source, open(tmp_path, "wb") as target:
+                compress(source, target)
+            if os.path.getsize(tmp_path) > size * SIDECAR_MAX_RATIO:
+                os.remove(tmp_path)
+                continue
+            os.replace(tmp_path, sidecar_path)
+            kept.append(encoding)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return kept
@@ -1,11 +1,23 @@
-from pydantic import BaseModel
-from typing import Optional, List
-from datetime import datetime
+from pydantic import AfterValidator, BaseModel, Field, computed_field
+from typing import Annotated, Any, Optional, List, Dict
+from datetime import date, datetime, timedelta, timezone
+from uuid import UUID
+
+def media_url(path: Optional[str]) -> Optional[str]:
+    # Les images sont nommées par empreinte : l'URL change avec le contenu
+    return f"/media/{path}" if path else None
 
 class UserCreate(BaseModel):
     username: str
     password: str
 
+class Principal(BaseModel):
+    id: int
+    username: str
+
+    class Config:
+        from_attributes = True
+
 class Token(BaseModel):
     access_token: str
     token_type: str
@@ -19,10 +31,19 @@ class PlatformCreate(PlatformBase):
 
 class Platform(PlatformBase):
     id: int
+
+    @computed_field
+    @property
+    def icon_url(self) -> Optional[str]:
+        return media_url(self.icon_path)
     
     class Config:
         from_attributes = True
 
+class PlatformPage(BaseModel):
+    items: List[Platform]
+    next_cursor: Optional[str] = None
+
 class SaveBase(BaseModel):
     file_path: str
 
@@ -33,27 +54,143 @@ class Save(SaveBase):
     id: int
     created_at: datetime
     game_id: int
+    sha256: Optional[str] = None
+    size: Optional[int] = None
 
     class Config:
         from_attributes = True
 
+class SaveManifestEntry(BaseModel):
+    game_id: int
+    save_id: int
+    sha256: Optional[str] = None
+    size: Optional[int] = None
+    created_at: datetime
+
+class SaveManifest(BaseModel):
+    saves: List[SaveManifestEntry]
+    # Plus grand id de save vu : à renvoyer tel quel dans ?since=
+    cursor: Optional[int] = None
+
 class GameBase(BaseModel):
     title: str
     rom_path: str
     cover_path: Optional[str] = None
+    cover_thumb_path: Optional[str] = None
+    cover_bg_path: Optional[str] = None
+    cover_placeholder: Optional[str] = None
 
 class GameCreate(GameBase):
     platform_id: int
 
 class Game(GameBase):
     id: int
+    rom_sha256: Optional[str] = None
+    rom_size: Optional[int] = None
     platform_id: int
     platform: Optional[Platform] = None
-    saves: List[Save] = []
+
+    @computed_field
+    @property
+    def cover_url(self) -> Optional[str]:
+        return media_url(self.cover_path)
+
+    @computed_field
+    @property
+    def cover_thumb_url(self) -> Optional[str]:
+        return media_url(self.cover_thumb_path)
+
+    @computed_field
+    @property
+    def cover_bg_url(self) -> Optional[str]:
+        return media_url(self.cover_bg_path)
 
     class Config:
         from_attributes = True
+
+class GamePage(BaseModel):
+    items: List[Game]
+    next_cursor: Optional[str] = None
+
+class GameSuggestion(BaseModel):
+    id: int
+    title: str
+    platform_id: int
         
+# Au-delà d'une semaine, c'est un émulateur resté ouvert. La borne protège aussi les rollups :
+# une session est découpée jour par jour (play_stats.split_by_day)
+MAX_SESSION_SECONDS = 86400 * 7
+# Horloge du client en avance tolérée, et plus ancienne date de fin acceptée
+MAX_CLOCK_SKEW = timedelta(days=1)
+MIN_ENDED_AT = datetime(2000, 1, 1)
+
+def check_ended_at(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return value
+    moment = value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+    if moment > datetime.utcnow() + MAX_CLOCK_SKEW:
+        raise ValueError("ended_at is in the future")
+    if moment < MIN_ENDED_AT:
+        raise ValueError(f"ended_at is before {MIN_ENDED_AT.date()}")
+    return value
+
+SessionSeconds = Annotated[int, Field(gt=0, le=MAX_SESSION_SECONDS)]
+SessionEnd = Annotated[Optional[datetime], AfterValidator(check_ended_at)]
+
 class PlaytimeUpdate(BaseModel):
+    seconds: SessionSeconds
+    ended_at: SessionEnd = None
+    session_id: Optional[UUID] = None
+
+class PlaytimeSession(BaseModel):
+    game_id: int
+    seconds: SessionSeconds
+    ended_at: SessionEnd = None
+    session_id: Optional[UUID] = None
+
+class PlaytimeBatch(BaseModel):
+    # Chaque élément est validé comme PlaytimeSession par l'endpoint : une session
+    # hors bornes est écartée sans faire rejeter les sessions valides du même lot
+    sessions: List[Any]
+
+class WeeklyPlaytime(BaseModel):
+    since: date
+    total_seconds: int
+    days: Dict[date, int]
+    games: Dict[int, int]
+
+class DailyPlaytime(BaseModel):
+    day: date
     seconds: int
-    
\ No newline at end of file
+    sessions: int
+
+    class Config:
+        from_attributes = True
+
+class MostPlayedGame(BaseModel):
+    game_id: int
+    title: str
+    seconds: int
+    sessions: int
+
+class UploadSessionCreate(BaseModel):
+    title: str
+    platform_id: int
+    filename: str
+    size: int
+    sha256: Optional[str] = None
+    chunk_size: Optional[int] = None
+
+class UploadSession(BaseModel):
+    id: str
+    title: str
+    platform_id: int
+    filename: str
+    size: int
+    chunk_size: int
+    total_chunks: int
+    received_chunks: List[int]
+    offset: int
+    status: str
+    game_id: Optional[int] = None
+    duplicate: bool = False
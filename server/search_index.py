@@ -0,0 +1,45 @@
+from sqlalchemy import Integer, String, column, func, literal_column, select, table
+
+from database import IS_SQLITE
+
+# Le tokenizer trigram n'indexe que des séquences de 3 caractères :
+# en dessous, on retombe sur un LIKE classique.
+MIN_QUERY_LENGTH = 3
+
+# Table virtuelle FTS5 (contenu externe = games), créée et synchronisée par
+# migration + triggers. Volontairement hors de Base.metadata.
+games_fts = table(
+    "games_fts",
+    column("rowid", Integer),
+    column("title", String),
+)
+
+_fts_table = literal_column("games_fts")
+
+
+def supports(query):
+    return IS_SQLITE and len(query) >= MIN_QUERY_LENGTH
+
+
+def _phrase(query):
+    # Une seule phrase FTS5 : la saisie utilisateur n'est jamais interprétée comme syntaxe
+    return '"' + query.replace('"', '""') + '"'
+
+
+def ranked_matches(query):
+    """Sous-requête (game_id, score) des titres contenant query ; score bm25, plus petit = plus pertinent."""
+    return select(
+        games_fts.c.rowid.label("game_id"),
+        func.bm25(_fts_table).label("score")
+    ).where(_fts_table.op("MATCH")(_phrase(query))).subquery()
+
+
+def prefix_matches(query):
+    """Sous-requête des game_id dont le titre commence par query (LIKE servi par l'index trigram)."""
+    if "%" in query or "_" in query:
+        # Avec ESCAPE, FTS5 ne peut plus utiliser l'index : cas rare, on accepte le scan
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        condition = games_fts.c.title.like(f"{escaped}%", escape="\\")
+    else:
+        condition = games_fts.c.title.like(f"{query}%")
+    return select(games_fts.c.rowid.label("game_id")).where(condition).subquery()
@@ -0,0 +1,161 @@
+import os
+import re
+import shutil
+import uuid
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:  # boto3 est optionnel : seul le backend local est alors disponible
+    boto3 = None
+
+# local : fichiers sous MEDIA_ROOT ; s3 : bucket S3 (AWS, MinIO, ou tout service compatible)
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "local").lower()
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "media")
+# Fichiers en cours de réception (uploads, morceaux) : toujours sur disque local, sur le même
+# système de fichiers que MEDIA_ROOT pour que la publication locale soit un simple rename
+STAGING_DIR = os.getenv("STORAGE_STAGING_DIR", os.path.join(MEDIA_ROOT, ".staging"))
+
+S3_BUCKET = os.getenv("S3_BUCKET")
+S3_PREFIX = os.getenv("S3_PREFIX", "").strip("/")
+# Pour MinIO (ou un faux S3 local) : ex. http://localhost:9000
+S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL") or None
+S3_REGION = os.getenv("S3_REGION") or None
+S3_PRESIGNED_TTL = int(os.getenv("S3_PRESIGNED_TTL", "3600"))
+
+CHUNK_SIZE = 1024 * 1024
+
+# Clés du nouveau format : "<type>/ab/cd/<empreinte>[suffixe]"
+SHARDED_KEY = re.compile(r"^[a-z/]+/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}")
+
+
+def sharded_key(prefix, digest, suffix=""):
+    """roms + <sha256> + .sfc -> "roms/ab/cd/<sha256>.sfc" (deux niveaux de 256 dossiers)."""
+    return f"{prefix}/{digest[:2]}/{digest[2:4]}/{digest}{suffix}"
+
+
+def is_sharded(key):
+    return bool(key and SHARDED_KEY.match(key))
+
+
+def staging_path(name):
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    return os.path.join(STAGING_DIR, name)
+
+
+class LocalStorage:
+    """Clés = chemins relatifs à la racine, servis tels quels sous /media."""
+
+    def __init__(self, root):
+        self.root = root
+
+    def local_path(self, key):
+        return os.path.join(self.root, key)
+
+    def exists(self, key):
+        return os.path.isfile(self.local_path(key))
+
+    def size(self, key):
+        return os.path.getsize(self.local_path(key))
+
+    def open(self, key):
+        return open(self.local_path(key), "rb")
+
+    def put_file(self, src_path, key):
+        """
+        Publie un fichier local sous la clé donnée (le fichier source disparaît).
+        Renvoie False si la clé existait déjà : contenu adressé par empreinte, rien à écrire.
+        """
+        final_path = self.local_path(key)
+        if os.path.exists(final_path):
+            os.remove(src_path)
+            return False
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        try:
+            os.replace(src_path, final_path)
+        except OSError:
+            # Autre système de fichiers (STORAGE_STAGING_DIR ailleurs) : copie puis rename atomique
+            tmp_path = f"{final_path}.{uuid.uuid4().hex}.tmp"
+            shutil.copyfile(src_path, tmp_path)
+            os.replace(tmp_path, final_path)
+            os.remove(src_path)
+        return True
+
+    def put_bytes(self, data, key):
+        final_path = self.local_path(key)
+        os.makedirs(os.path.dirname(final_path), exist_ok=True)
+        tmp_path = f"{final_path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, final_path)
+
+    def delete(self, key):
+        if self.exists(key):
+            os.remove(self.local_path(key))
+
+
+class S3Storage:
+    """Même interface que LocalStorage ; les téléchargements passent par des URLs présignées."""
+
+    def __init__(self, bucket, prefix="", endpoint_url=None, region=None):
+        if boto3 is None:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires boto3 (pip install .[s3])")
+        if not bucket:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires S3_BUCKET")
+        self.bucket = bucket
+        self.prefix = prefix
+        # Identifiants : variables AWS_* standard (AWS_ACCESS_KEY_ID, AWS_SECRET_ACCESS_KEY...)
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+    def _object(self, key):
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def local_path(self, key):
+        return None
+
+    def exists(self, key):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def size(self, key):
+        return self.client.head_object(Bucket=self.bucket, Key=self._object(key))["ContentLength"]
+
+    def open(self, key):
+        return self.client.get_object(Bucket=self.bucket, Key=self._object(key))["Body"]
+
+    def put_file(self, src_path, key):
+        if self.exists(key):
+            os.remove(src_path)
+            return False
+        # upload_file découpe en multipart au-delà de quelques Mo (ROMs volumineuses)
+        self.client.upload_file(src_path, self.bucket, self._object(key))
+        os.remove(src_path)
+        return True
+
+    def put_bytes(self, data, key):
+        self.client.put_object(Bucket=self.bucket, Key=self._object(key), Body=data)
+
+    def delete(self, key):
+        self.client.delete_object(Bucket=self.bucket, Key=self._object(key))
+
+    def presigned_url(self, key, filename=None):
+        params = {"Bucket": self.bucket, "Key": self._object(key)}
+        if filename:
+            params["ResponseContentDisposition"] = f'attachment; filename="{filename}"'
+        return self.client.generate_presigned_url("get_object", Params=params, ExpiresIn=S3_PRESIGNED_TTL)
+
+
+def create_backend():
+    if STORAGE_BACKEND == "local":
+        return LocalStorage(MEDIA_ROOT)
+    if STORAGE_BACKEND == "s3":
+        return S3Storage(S3_BUCKET, S3_PREFIX, S3_ENDPOINT_URL, S3_REGION)
+    raise ValueError(f"Unknown STORAGE_BACKEND '{STORAGE_BACKEND}'")
+
+
+backend = create_backend()
@@ -0,0 +1,79 @@
+"""
+Base SQLite et médias dans un dossier temporaire. Les modules du serveur lisent
+l'environnement à l'import : tout est configuré ici, avant le premier import.
+"""
+import os
+import tempfile
+
+TEST_ROOT = tempfile.mkdtemp(prefix="neutron-tests-")
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_ROOT, 'test.db')}"
+os.environ["MEDIA_ROOT"] = os.path.join(TEST_ROOT, "media")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["SECRET_KEY"] = "tests"
+os.environ["IGDB_CLIENT_ID"] = ""
+os.environ["IGDB_CLIENT_SECRET"] = ""
+
+import asyncio
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import delete
+
+import auth
+import models
+from database import Base, SessionLocal, async_engine, async_write_engine
+
+# Lignes créées par les migrations elles-mêmes : conservées entre les tests
+SEEDED_TABLES = {"catalog_version"}
+
+
+def pytest_configure(config):
+    alembic_config = Config(os.path.join(SERVER_DIR, "alembic.ini"))
+    alembic_config.set_main_option("script_location", os.path.join(SERVER_DIR, "alembic"))
+    command.upgrade(alembic_config, "head")
+
+
+async def dispose_async_engines():
+    for engine in {async_engine, async_write_engine}:
+        await engine.dispose()
+
+
+@pytest.fixture(autouse=True)
+def clean_db():
+    yield
+    # Chaque test a sa propre boucle asyncio (TestClient, asyncio.run) : pools asynchrones recréés
+    asyncio.run(dispose_async_engines())
+    with SessionLocal() as db:
+        for table in reversed(Base.metadata.sorted_tables):
+            if table.name not in SEEDED_TABLES:
+                db.execute(delete(table))
+        db.commit()
+
+
+@pytest.fixture
+def client():
+    from fastapi.testclient import TestClient
+
+    import main
+    main.principal_cache.clear()
+    main.catalog_cache.responses.clear()
+    # Sans "with" : pas d'événements startup, donc ni workers de jobs ni pool Argon2
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def user():
+    with SessionLocal() as db:
+        user = models.User(username="alice", hashed_password="unused")
+        db.add(user)
+        db.commit()
+        return {"id": user.id, "username": user.username}
+
+
+@pytest.fixture
+def auth_headers(user):
+    token = auth.create_access_token(data={"sub": user["username"], "id": user["id"]})
+    return {"Authorization": f"Bearer {token}"}
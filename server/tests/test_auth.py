@@ -0,0 +1,21 @@
+import auth
+import models
+from database import SessionLocal
+
+
+def test_register_race_on_the_same_username_returns_400(client, monkeypatch):
+    async def hash_while_another_registration_commits(password):
+        # L'autre inscription insère le même nom pendant que celle-ci hache son mot de passe
+        with SessionLocal() as db:
+            db.add(models.User(username="alice", hashed_password="other"))
+            db.commit()
+        return "hashed"
+
+    monkeypatch.setattr(auth, "get_password_hash_async", hash_while_another_registration_commits)
+
+    response = client.post("/register", json={"username": "alice", "password": "secret"})
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username already registered"
+    with SessionLocal() as db:
+        assert db.query(models.User).filter_by(username="alice").one().hashed_password == "other"
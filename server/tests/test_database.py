@@ -0,0 +1,46 @@
+import asyncio
+
+from sqlalchemy import func, select
+
+import models
+from database import AsyncSessionLocal, SessionLocal
+
+
+def count_platforms(db):
+    return db.scalar(select(func.count()).select_from(models.Platform))
+
+
+def test_read_after_write_in_same_transaction_sees_the_write():
+    with SessionLocal() as db:
+        db.add(models.Platform(name="SNES"))
+        db.flush()
+        # Écriture non commitée : seule la connexion du writer la voit
+        assert count_platforms(db) == 1
+        assert db.scalar(select(models.Platform.name)) == "SNES"
+        db.rollback()
+        assert count_platforms(db) == 0
+
+
+def test_read_after_commit_sees_the_write():
+    with SessionLocal() as db:
+        # Transaction de lecture ouverte avant l'écriture, sur le pool de lecture
+        assert count_platforms(db) == 0
+        db.add(models.Platform(name="SNES"))
+        db.commit()
+        assert count_platforms(db) == 1
+
+    with SessionLocal() as other:
+        assert count_platforms(other) == 1
+
+
+def test_async_read_after_write_sees_the_write():
+    async def scenario():
+        async with AsyncSessionLocal() as db:
+            assert await db.scalar(select(func.count()).select_from(models.Platform)) == 0
+            db.add(models.Platform(name="SNES"))
+            await db.flush()
+            assert await db.scalar(select(func.count()).select_from(models.Platform)) == 1
+            await db.commit()
+            assert await db.scalar(select(func.count()).select_from(models.Platform)) == 1
+
+    asyncio.run(scenario())
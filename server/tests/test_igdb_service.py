@@ -0,0 +1,201 @@
+"""IGDBService contre un faux serveur Twitch + IGDB local (http.server dans un thread)."""
+import json
+import re
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from sqlalchemy import select, update
+
+import igdb_service
+import models
+from database import SessionLocal
+
+SEARCH = re.compile(r'search "((?:[^"\\]|\\.)*)"')
+SUBQUERY = re.compile(r'query games "(\d+)" \{([^}]*)\};')
+
+
+class FakeIGDB:
+    """Émet des jetons token-1, token-2... ; seul le dernier émis est accepté par l'API."""
+
+    def __init__(self):
+        self.covers = {}
+        self.delay = 0
+        self.tokens_issued = 0
+        self.revoked = set()
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def issue_token(self):
+        with self.lock:
+            self.tokens_issued += 1
+            return {"access_token": f"token-{self.tokens_issued}", "expires_in": 3600}
+
+    def authorized(self, header):
+        token = header.removeprefix("Bearer ")
+        return token == f"token-{self.tokens_issued}" and token not in self.revoked
+
+    def game(self, title):
+        # Recherche tolérante comme celle d'IGDB : casse et ponctuation ignorées
+        wanted = igdb_service.normalize_title(title.replace('\\"', '"'))
+        cover = next((url for name, url in self.covers.items() if igdb_service.normalize_title(name) == wanted), None)
+        return [{"id": 1, "name": title, "cover": {"url": cover}}] if cover else []
+
+    def handle(self, path, body, authorization):
+        if path.startswith("/oauth2/token"):
+            return 200, self.issue_token()
+        if not self.authorized(authorization):
+            return 401, {"message": "Authorization Failure"}
+        with self.lock:
+            self.requests.append((path, body))
+        time.sleep(self.delay)
+        if path == "/v4/games":
+            return 200, self.game(SEARCH.search(body).group(1))
+        if path == "/v4/multiquery":
+            results = [{"name": index, "result": self.game(SEARCH.search(query).group(1))}
+                       for index, query in SUBQUERY.findall(body)]
+            # IGDB ne garantit pas l'ordre des sous-requêtes : seul "name" fait foi
+            return 200, list(reversed(results))
+        return 404, {}
+
+    def searches(self, path="/v4/games"):
+        return [body for request_path, body in self.requests if request_path == path]
+
+
+@pytest.fixture
+def fake_igdb():
+    fake = FakeIGDB()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0)).decode("utf-8")
+            status, payload = fake.handle(self.path, body, self.headers.get("Authorization", ""))
+            data = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    fake.url = f"http://127.0.0.1:{server.server_address[1]}"
+    yield fake
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def service(fake_igdb, monkeypatch):
+    monkeypatch.setattr(igdb_service, "CLIENT_ID", "client")
+    monkeypatch.setattr(igdb_service, "CLIENT_SECRET", "secret")
+    monkeypatch.setattr(igdb_service, "TWITCH_TOKEN_URL", f"{fake_igdb.url}/oauth2/token")
+    monkeypatch.setattr(igdb_service, "IGDB_API_URL", f"{fake_igdb.url}/v4")
+    monkeypatch.setattr(igdb_service, "IGDB_RATE_LIMIT", 1000)
+    return igdb_service.IGDBService()
+
+
+def test_search_returns_the_big_cover(service, fake_igdb):
+    fake_igdb.covers["Super Metroid"] = "//images.igdb.com/t_thumb/metroid.jpg"
+
+    assert service.search_game("Super Metroid") == "https://images.igdb.com/t_cover_big/metroid.jpg"
+
+
+def test_revoked_token_is_replaced_and_the_request_replayed(service, fake_igdb):
+    fake_igdb.covers["Zelda"] = "//images.igdb.com/t_thumb/zelda.jpg"
+    service.search_game("Mario")
+    fake_igdb.revoked.add("token-1")
+
+    assert service.search_game("Zelda") == "https://images.igdb.com/t_cover_big/zelda.jpg"
+    assert fake_igdb.tokens_issued == 2
+    with SessionLocal() as db:
+        assert db.get(models.IGDBToken, "client").access_token == "token-2"
+
+
+def test_token_is_shared_through_the_database(service, fake_igdb):
+    service.search_game("Mario")
+    other_worker = igdb_service.IGDBService()
+    other_worker.search_game("Zelda")
+
+    assert fake_igdb.tokens_issued == 1
+
+
+def test_concurrent_searches_for_one_title_send_one_request(service, fake_igdb):
+    fake_igdb.covers["Chrono Trigger"] = "//images.igdb.com/t_thumb/chrono.jpg"
+    service.search_game("warm-up")  # jeton déjà obtenu : seule la recherche est mesurée
+    fake_igdb.delay = 0.3
+    barrier = threading.Barrier(8)
+    results = []
+
+    def search(title):
+        barrier.wait()
+        results.append(service.search_game(title))
+
+    # Même clé de cache sous des graphies différentes
+    titles = ["Chrono Trigger", "chrono trigger", "CHRONO TRIGGER!"] * 2 + ["Chrono  Trigger"] * 2
+    threads = [threading.Thread(target=search, args=(title,)) for title in titles]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["https://images.igdb.com/t_cover_big/chrono.jpg"] * 8
+    assert len(fake_igdb.searches()) == 2  # warm-up + une seule recherche partagée
+
+
+def test_negative_results_are_cached_for_the_negative_ttl(service, fake_igdb):
+    assert service.search_game("Unknown Homebrew") is None
+    assert service.search_game("Unknown Homebrew") is None
+    assert len(fake_igdb.searches()) == 1
+
+    with SessionLocal() as db:
+        entry = db.scalar(select(models.IGDBCacheEntry).where(models.IGDBCacheEntry.query == "unknown homebrew"))
+        ttl = (entry.expires_at - entry.fetched_at).total_seconds()
+        assert ttl == igdb_service.IGDB_NEGATIVE_CACHE_TTL < igdb_service.IGDB_CACHE_TTL
+        # Fin du TTL négatif : le titre est recherché à nouveau
+        db.execute(update(models.IGDBCacheEntry).values(expires_at=datetime.utcnow() - timedelta(seconds=1)))
+        db.commit()
+
+    fake_igdb.covers["Unknown Homebrew"] = "//images.igdb.com/t_thumb/homebrew.jpg"
+    assert service.search_game("Unknown Homebrew") == "https://images.igdb.com/t_cover_big/homebrew.jpg"
+    assert len(fake_igdb.searches()) == 2
+
+
+def test_bulk_search_maps_multiquery_results_by_index(service, fake_igdb):
+    titles = [f"Game {i:02d}" for i in range(25)]
+    for i in range(0, 25, 2):
+        fake_igdb.covers[f"Game {i:02d}"] = f"//images.igdb.com/t_thumb/{i:02d}.jpg"
+
+    resolved = service.search_games_bulk(titles + ['Quote "Test"'])
+
+    assert len(fake_igdb.searches("/v4/multiquery")) == 3  # 26 titres, paquets de 10
+    assert resolved['Quote "Test"'] is None
+    for i in range(25):
+        expected = f"https://images.igdb.com/t_cover_big/{i:02d}.jpg" if i % 2 == 0 else None
+        assert resolved[f"Game {i:02d}"] == expected
+
+    # Tout est en cache : aucun nouvel appel
+    assert service.search_games_bulk(titles) == {title: resolved[title] for title in titles}
+    assert len(fake_igdb.searches("/v4/multiquery")) == 3
+
+
+def test_stale_401_does_not_drop_a_fresh_shared_token(service, fake_igdb):
+    service.search_game("Mario")
+    fake_igdb.revoked.add("token-1")
+    # Un autre worker reçoit le 401 le premier et enregistre token-2 en base
+    other_worker = igdb_service.IGDBService()
+    other_worker.search_game("Zelda")
+    assert fake_igdb.tokens_issued == 2
+
+    # Le premier worker a encore token-1 en mémoire : son 401 ne doit effacer que token-1
+    service.search_game("Metroid")
+
+    assert fake_igdb.tokens_issued == 2
+    with SessionLocal() as db:
+        assert db.get(models.IGDBToken, "client").access_token == "token-2"
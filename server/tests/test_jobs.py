@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import update
+
+import jobs
+import models
+from database import SessionLocal
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    registered = {}
+    monkeypatch.setattr(jobs, "_handlers", registered)
+    return registered
+
+
+def enqueue(kind, payload=None):
+    with SessionLocal() as db:
+        job = jobs.enqueue(db, kind, payload or {})
+        db.commit()
+        return job.id
+
+
+def load(job_id):
+    with SessionLocal() as db:
+        return db.get(models.Job, job_id)
+
+
+def expire_lease(job_id):
+    with SessionLocal() as db:
+        db.execute(update(models.Job).where(models.Job.id == job_id).values(
+            locked_at=datetime.utcnow() - timedelta(seconds=jobs.JOB_LEASE_SECONDS + 1)))
+        db.commit()
+
+
+def test_job_runs_and_finishes(handlers):
+    seen = []
+    handlers["echo"] = seen.append
+    job_id = enqueue("echo", {"n": 1})
+
+    assert jobs.JobWorkerPool().run_once()
+
+    assert seen == [{"n": 1}]
+    job = load(job_id)
+    assert (job.status, job.claim_token, job.locked_at) == ("done", None, None)
+
+
+def test_stale_worker_cannot_finish_or_fail_a_reclaimed_job(handlers):
+    job_id = enqueue("slow")
+    stale, current = jobs.JobWorkerPool(), jobs.JobWorkerPool()
+    stale_claim = stale._claim()
+    expire_lease(job_id)
+    current_claim = current._claim()
+    assert current_claim.claim_token != stale_claim.claim_token
+
+    stale._finish(stale_claim, status="done", last_error=None)
+    stale._fail(stale_claim, "boom")
+    assert load(job_id).status == "running"
+
+    current._finish(current_claim, status="done", last_error=None)
+    assert load(job_id).status == "done"
+
+
+def test_heartbeat_extends_the_lease(handlers):
+    job_id = enqueue("long")
+    pool = jobs.JobWorkerPool()
+
+    def long_job(payload):
+        expire_lease(job_id)
+        jobs.heartbeat()
+        # Bail renouvelé : aucun autre worker ne peut reprendre le job
+        assert jobs.JobWorkerPool()._claim() is None
+
+    handlers["long"] = long_job
+    assert pool.run_once()
+    assert load(job_id).status == "done"
+
+
+def test_heartbeat_stops_a_job_taken_over_by_another_worker(handlers):
+    job_id = enqueue("long")
+    batches = []
+
+    def long_job(payload):
+        batches.append(1)
+        expire_lease(job_id)
+        assert jobs.JobWorkerPool()._claim().id == job_id
+        jobs.heartbeat()
+        batches.append(2)
+
+    handlers["long"] = long_job
+    jobs.JobWorkerPool().run_once()
+
+    assert batches == [1]
+    job = load(job_id)
+    # L'issue appartient au worker qui a repris le job : ni "done" ni nouvel essai
+    assert (job.status, job.attempts, job.last_error) == ("running", 2, None)
+
+
+def test_heartbeat_outside_a_job_does_nothing():
+    jobs.heartbeat()
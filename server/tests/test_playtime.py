@@ -0,0 +1,131 @@
+import asyncio
+import uuid
+
+import httpx
+import pytest
+from sqlalchemy import func, select
+
+import main
+import models
+from database import SessionLocal
+
+
+@pytest.fixture
+def game():
+    with SessionLocal() as db:
+        game = models.Game(title="Chrono Trigger", rom_path="roms/chrono.sfc")
+        db.add(game)
+        db.commit()
+        return game.id
+
+
+def run_concurrently(requests):
+    """Envoie toutes les requêtes en même temps sur l'application (un seul process, writer partagé)."""
+    async def scenario():
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(request(client) for request in requests))
+
+    responses = asyncio.run(scenario())
+    assert all(response.status_code == 200 for response in responses)
+    return responses
+
+
+def totals(user_id, game_id):
+    with SessionLocal() as db:
+        lifetime = db.scalar(select(models.Playtime.seconds).where(
+            models.Playtime.user_id == user_id, models.Playtime.game_id == game_id))
+        daily_seconds, daily_sessions = db.execute(
+            select(func.sum(models.PlaytimeDaily.seconds), func.sum(models.PlaytimeDaily.sessions))
+            .where(models.PlaytimeDaily.user_id == user_id, models.PlaytimeDaily.game_id == game_id)
+        ).one()
+        logged = db.scalar(select(func.count()).select_from(models.PlaySession))
+    return lifetime, daily_seconds, daily_sessions, logged
+
+
+def test_concurrent_sessions_are_all_counted(user, auth_headers, game):
+    def post(client):
+        return client.post(f"/games/{game}/playtime", headers=auth_headers,
+                           json={"seconds": 60, "session_id": str(uuid.uuid4())})
+
+    run_concurrently([post] * 50)
+
+    assert totals(user["id"], game) == (50 * 60, 50 * 60, 50, 50)
+
+
+def test_replayed_batches_are_counted_once(user, auth_headers, game):
+    sessions = [
+        {"game_id": game, "seconds": 120, "ended_at": "2026-10-17T12:00:00Z", "session_id": str(uuid.uuid4())}
+        for _ in range(5)
+    ]
+
+    def post(client):
+        return client.post("/users/me/playtime/batch", headers=auth_headers, json={"sessions": sessions})
+
+    # Le même lot rejoué 10 fois en parallèle (timeouts côté client) : une seule fois au compteur
+    responses = run_concurrently([post] * 10)
+
+    assert all(response.json()["accepted"] == 5 for response in responses)
+    assert totals(user["id"], game) == (5 * 120, 5 * 120, 5, 5)
+
+
+def test_replayed_single_session_returns_the_current_total(client, user, auth_headers, game):
+    payload = {"seconds": 90, "session_id": str(uuid.uuid4())}
+
+    first = client.post(f"/games/{game}/playtime", headers=auth_headers, json=payload)
+    again = client.post(f"/games/{game}/playtime", headers=auth_headers, json=payload)
+
+    assert first.json() == again.json() == {"new_total": 90}
+
+
+def test_sessions_without_id_are_still_accepted(client, user, auth_headers, game):
+    payload = {"sessions": [{"game_id": game, "seconds": 30}, {"game_id": game, "seconds": 30}]}
+
+    client.post("/users/me/playtime/batch", headers=auth_headers, json=payload)
+    client.post("/users/me/playtime/batch", headers=auth_headers, json=payload)
+
+    assert totals(user["id"], game) == (120, 120, 4, 4)
+
+
+@pytest.mark.parametrize("payload", [
+    {"seconds": 0},
+    {"seconds": -60},
+    {"seconds": 86400 * 7 + 1},
+    {"seconds": 10 ** 11},
+    {"seconds": 60, "ended_at": "2999-01-01T00:00:00Z"},
+    {"seconds": 60, "ended_at": "0001-01-01T00:00:00"},
+])
+def test_out_of_range_sessions_are_rejected(client, user, auth_headers, game, payload):
+    single = client.post(f"/games/{game}/playtime", headers=auth_headers, json=payload)
+    batch = client.post("/users/me/playtime/batch", headers=auth_headers,
+                        json={"sessions": [dict(payload, game_id=game)]})
+
+    assert single.status_code == 422
+    assert batch.status_code == 200
+    assert batch.json() == {"accepted": 0, "games": 0, "rejected": [0]}
+    assert totals(user["id"], game) == (None, None, None, 0)
+
+
+def test_invalid_sessions_do_not_sink_the_rest_of_the_batch(client, user, auth_headers, game):
+    sessions = [
+        {"game_id": game, "seconds": 60, "session_id": str(uuid.uuid4())},
+        {"game_id": game, "seconds": 60, "ended_at": "2999-01-01T00:00:00Z", "session_id": str(uuid.uuid4())},
+        {"game_id": game, "seconds": 30, "session_id": str(uuid.uuid4())},
+        {"game_id": game, "seconds": 0},
+        "not a session",
+    ]
+
+    response = client.post("/users/me/playtime/batch", headers=auth_headers, json={"sessions": sessions})
+
+    assert response.status_code == 200
+    assert response.json() == {"accepted": 2, "games": 1, "rejected": [1, 3, 4]}
+    assert totals(user["id"], game) == (90, 90, 2, 2)
+
+
+def test_week_long_session_is_split_per_day(client, user, auth_headers, game):
+    response = client.post(f"/games/{game}/playtime", headers=auth_headers,
+                           json={"seconds": 86400 * 7, "ended_at": "2026-10-17T12:00:00Z"})
+
+    assert response.status_code == 200
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count()).select_from(models.PlaytimeDaily)) == 8
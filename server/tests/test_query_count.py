@@ -0,0 +1,62 @@
+"""Nombre de requêtes SQL des endpoints de liste : constant quel que soit le nombre de lignes (pas de N+1)."""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+import main
+import models
+from database import SessionLocal, async_engine, async_write_engine
+
+
+@contextmanager
+def count_statements():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = {async_engine.sync_engine, async_write_engine.sync_engine}
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
+
+
+def seed_catalog(count, user_id):
+    with SessionLocal() as db:
+        for i in range(count):
+            platform = models.Platform(name=f"Platform {i}")
+            game = models.Game(title=f"Mario {i:03d}", rom_path=f"roms/{i}.sfc", platform=platform)
+            save = models.Save(file_path=f"saves/{i}.sav", sha256=f"{i:064x}", size=1, game=game, user_id=user_id)
+            db.add_all([platform, game, save])
+            db.flush()
+            db.add(models.SaveHead(user_id=user_id, game_id=game.id, latest_save_id=save.id))
+        db.commit()
+
+
+def statements_for(client, count, user, url, headers):
+    seed_catalog(count, user["id"])
+    # Caches vidés : on mesure la construction de la réponse, pas le cache
+    main.catalog_cache.responses.clear()
+    main.principal_cache.clear()
+    with count_statements() as statements:
+        response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return len(statements)
+
+
+@pytest.mark.parametrize("url", [
+    "/games/",
+    "/games/?search=mario",
+    "/platforms/",
+    "/users/me/saves/manifest",
+])
+def test_list_endpoints_issue_a_constant_number_of_queries(client, user, auth_headers, url):
+    small = statements_for(client, 3, user, url, auth_headers)
+    # 3 + 30 lignes : toujours sous la taille de page par défaut
+    large = statements_for(client, 30, user, url, auth_headers)
+    assert small == large
@@ -0,0 +1,82 @@
+import pytest
+import requests
+
+import storage
+
+# Backend S3 optionnel (pip install .[s3,test]) : tests ignorés sans boto3 ni moto
+boto3 = pytest.importorskip("boto3")
+mock_aws = pytest.importorskip("moto").mock_aws
+
+BUCKET = "neutron-test"
+DIGEST = "ab" * 32
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "us-east-1")
+    with mock_aws():
+        boto3.client("s3", region_name="us-east-1").create_bucket(Bucket=BUCKET)
+        yield storage.S3Storage(BUCKET, prefix="neutron", region="us-east-1")
+
+
+def staged(tmp_path, data):
+    path = tmp_path / "upload.tmp"
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_s3_put_exists_open(s3, tmp_path):
+    key = storage.sharded_key("roms", DIGEST, ".sfc")
+    assert key == f"roms/ab/ab/{DIGEST}.sfc"
+    assert not s3.exists(key)
+
+    src = staged(tmp_path, b"rom bytes")
+    assert s3.put_file(src, key) is True
+    assert not (tmp_path / "upload.tmp").exists()
+
+    assert s3.exists(key)
+    assert s3.size(key) == 9
+    assert s3.open(key).read() == b"rom bytes"
+    assert s3.local_path(key) is None
+    # Objet rangé sous le préfixe configuré
+    head = boto3.client("s3", region_name="us-east-1").head_object(Bucket=BUCKET, Key=f"neutron/{key}")
+    assert head["ContentLength"] == 9
+
+
+def test_s3_put_existing_key_is_a_no_op(s3, tmp_path):
+    key = storage.sharded_key("saves", DIGEST, ".sav")
+    s3.put_bytes(b"first", key)
+
+    assert s3.put_file(staged(tmp_path, b"second"), key) is False
+    assert not (tmp_path / "upload.tmp").exists()
+    assert s3.open(key).read() == b"first"
+
+    s3.delete(key)
+    assert not s3.exists(key)
+
+
+def test_s3_presigned_url_downloads_the_object(s3):
+    key = storage.sharded_key("saves", DIGEST, ".sav")
+    s3.put_bytes(b"save data", key)
+
+    url = s3.presigned_url(key, filename="7.sav")
+
+    assert f"neutron/{key}" in url
+    response = requests.get(url)
+    assert response.status_code == 200
+    assert response.content == b"save data"
+    assert response.headers["Content-Disposition"] == 'attachment; filename="7.sav"'
+
+
+def test_saves_round_trip_through_s3(s3, monkeypatch, client, auth_headers):
+    monkeypatch.setattr(storage, "backend", s3)
+
+    upload = client.post("/games/1/save", headers=auth_headers, files={"file": ("slot.sav", b"progress")})
+    assert upload.status_code == 200
+    assert s3.exists(storage.sharded_key("saves", upload.json()["sha256"], ".sav"))
+
+    latest = client.get("/games/1/save/latest", headers=auth_headers, follow_redirects=False)
+    assert latest.status_code == 307
+    assert requests.get(latest.headers["location"]).content == b"progress"
@@ -0,0 +1,97 @@
+import hashlib
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+import main
+import storage
+
+
+@pytest.fixture
+def platform(client):
+    response = client.post("/platforms/", data={"name": "SNES"}, files={"icon": ("snes.png", b"png bytes")})
+    assert response.status_code == 200
+    assert storage.backend.exists(response.json()["icon_path"])
+    return response.json()["id"]
+
+
+def test_create_platform_without_icon_accepts_urlencoded_form(client):
+    # Le client web envoie data=... sans fichier : requests encode alors en urlencoded
+    response = client.post("/platforms/", data={"name": "Mega Drive"})
+
+    assert response.status_code == 200
+    assert response.json()["name"] == "Mega Drive"
+    assert response.json()["icon_path"] is None
+
+
+def test_create_game_urlencoded_without_rom_is_rejected(client, platform):
+    response = client.post("/games/", data={"title": "Chrono Trigger", "platform_id": str(platform)})
+
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Missing file 'rom'"
+
+
+def test_create_game_publishes_rom_and_cover(client, platform):
+    rom = os.urandom(5000)
+    response = client.post("/games/", data={"title": "Chrono Trigger", "platform_id": str(platform)},
+                           files={"rom": ("chrono.sfc", rom), "cover": ("cover.png", b"cover bytes")})
+
+    assert response.status_code == 200
+    game = response.json()
+    digest = hashlib.sha256(rom).hexdigest()
+    assert game["rom_path"] == storage.sharded_key("roms", digest, ".sfc")
+    with storage.backend.open(game["rom_path"]) as f:
+        assert f.read() == rom
+    assert storage.backend.exists(game["cover_path"])
+
+
+def test_chunked_upload_is_finalized_once(client, platform):
+    rom = os.urandom(3000)
+    session = client.post("/uploads/", json={"title": "Earthbound", "platform_id": platform,
+                                             "filename": "earthbound.sfc", "size": 3000, "chunk_size": 1024}).json()
+    for index in range(3):
+        chunk = rom[index * 1024:(index + 1) * 1024]
+        response = client.put(f"/uploads/{session['id']}/chunks/{index}", content=chunk,
+                              headers={"x-chunk-sha256": hashlib.sha256(chunk).hexdigest()})
+        assert response.status_code == 200
+
+    first = client.post(f"/uploads/{session['id']}/finalize")
+    again = client.post(f"/uploads/{session['id']}/finalize")
+
+    assert first.status_code == again.status_code == 200
+    assert first.json()["id"] == again.json()["id"]
+    assert first.json()["rom_sha256"] == hashlib.sha256(rom).hexdigest()
+    with storage.backend.open(first.json()["rom_path"]) as f:
+        assert f.read() == rom
+
+
+def test_upload_session_preallocates_and_abort_removes_staging_file(client, platform):
+    session = client.post("/uploads/", json={"title": "Mother 3", "platform_id": platform,
+                                             "filename": "mother3.gba", "size": 4096, "chunk_size": 1024}).json()
+    tmp_path = main.upload_tmp_path(session["id"])
+    assert os.path.getsize(tmp_path) == 4096
+
+    assert client.delete(f"/uploads/{session['id']}").status_code == 200
+    assert not os.path.exists(tmp_path)
+    assert client.get(f"/uploads/{session['id']}").status_code == 404
+
+
+def test_latest_save_dates_the_save_not_the_shared_blob(client, platform, auth_headers):
+    game = client.post("/games/", data={"title": "Zelda", "platform_id": str(platform)},
+                       files={"rom": ("zelda.sfc", os.urandom(2000))}).json()
+    url = f"/games/{game['id']}/save"
+    first = client.post(url, headers=auth_headers, files={"file": ("a.sav", b"v1")}).json()
+    client.post(url, headers=auth_headers, files={"file": ("a.sav", b"v2")})
+    # Retour au contenu de v1 : même blob, mais nouvelle save
+    reverted = client.post(url, headers=auth_headers, files={"file": ("a.sav", b"v1")}).json()
+    assert reverted["sha256"] == first["sha256"]
+
+    response = client.get(f"{url}/latest", headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.content == b"v1"
+    saves = client.get(f"/games/{game['id']}/saves", headers=auth_headers).json()
+    latest = next(save for save in saves if save["id"] == reverted["save_id"])
+    assert datetime.fromisoformat(response.headers["x-save-created-at"]) == \
+        datetime.fromisoformat(latest["created_at"]).replace(tzinfo=timezone.utc)
@@ -0,0 +1,83 @@
+import base64
+import hashlib
+import io
+import os
+import re
+
+import storage
+
+try:
+    from PIL import Image, ImageFilter, ImageOps
+except ImportError:  # Pillow est optionnel : sans lui, la grille utilise la jaquette d'origine
+    Image = None
+
+# Vignette de la grille (carte ~300px, x1.5 pour les écrans HiDPI)
+GRID_SIZE = (480, 480)
+# Fond flouté derrière la vignette : le flou CSS rend inutile toute résolution
+BACKGROUND_SIZE = (64, 64)
+# Aperçu inline (data URI) affiché avant le chargement de la vignette
+PLACEHOLDER_SIZE = (16, 16)
+
+THUMBNAIL_FORMAT = os.getenv("THUMBNAIL_FORMAT", "WEBP").upper()
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "80"))
+
+_EXTENSIONS = {"WEBP": ".webp", "JPEG": ".jpg"}
+_DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+
+class CoverVariants:
+    def __init__(self, thumb_path, background_path, placeholder):
+        # Clés de stockage (ex: "covers/thumbs/ab/cd/<sha256>_grid.webp")
+        self.thumb_path = thumb_path
+        self.background_path = background_path
+        self.placeholder = placeholder
+
+
+def available():
+    return Image is not None
+
+
+def _save(image, key):
+    buffer = io.BytesIO()
+    image.save(buffer, format=THUMBNAIL_FORMAT, quality=THUMBNAIL_QUALITY)
+    storage.backend.put_bytes(buffer.getvalue(), key)
+
+
+def _placeholder(image):
+    tiny = image.copy()
+    tiny.thumbnail(PLACEHOLDER_SIZE)
+    buffer = io.BytesIO()
+    tiny.save(buffer, format="JPEG", quality=50)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode("ascii")
+
+
+def generate_cover_variants(cover_path):
+    """
+    Produit la vignette de grille, le fond flouté et l'aperçu inline d'une jaquette.
+    cover_path est une clé de stockage ; renvoie None si Pillow n'est pas installé.
+    """
+    if Image is None:
+        return None
+
+    stem = os.path.splitext(os.path.basename(cover_path))[0]
+    # Jaquettes nommées par empreinte : les variantes gardent la même, sinon on la dérive de la clé
+    digest = stem if _DIGEST.match(stem) else hashlib.sha256(cover_path.encode("utf-8")).hexdigest()
+    ext = _EXTENSIONS.get(THUMBNAIL_FORMAT, ".jpg")
+
+    with storage.backend.open(cover_path) as source_file:
+        data = io.BytesIO(source_file.read())
+    with Image.open(data) as source:
+        image = ImageOps.exif_transpose(source).convert("RGB")
+
+    thumb = image.copy()
+    thumb.thumbnail(GRID_SIZE, Image.LANCZOS)
+    thumb_path = storage.sharded_key("covers/thumbs", digest, f"_grid{ext}")
+    _save(thumb, thumb_path)
+
+    background = image.copy()
+    background.thumbnail(BACKGROUND_SIZE, Image.LANCZOS)
+    background = background.filter(ImageFilter.GaussianBlur(2))
+    background_path = storage.sharded_key("covers/thumbs", digest, f"_bg{ext}")
+    _save(background, background_path)
+
+    return CoverVariants(thumb_path, background_path, _placeholder(image))
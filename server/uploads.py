@@ -0,0 +1,287 @@
+import asyncio
+import hashlib
+import os
+import uuid
+from urllib.parse import parse_qsl
+
+import aiofiles
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from python_multipart.exceptions import ParseError
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+import storage
+
+MB = 1024 * 1024
+
+# Taille maximale acceptée par type de fichier (configurable via .env)
+UPLOAD_LIMITS = {
+    "roms": int(os.getenv("MAX_ROM_UPLOAD_MB", "16384")) * MB,
+    "covers": int(os.getenv("MAX_COVER_UPLOAD_MB", "20")) * MB,
+    "icons": int(os.getenv("MAX_ICON_UPLOAD_MB", "5")) * MB,
+    "saves": int(os.getenv("MAX_SAVE_UPLOAD_MB", "256")) * MB,
+}
+
+MAX_FIELD_SIZE = 64 * 1024
+# Corps application/x-www-form-urlencoded (formulaire sans fichier) : lu entièrement en mémoire
+MAX_URLENCODED_SIZE = 256 * 1024
+MAX_CONCURRENT_UPLOADS = int(os.getenv("MAX_CONCURRENT_UPLOADS", "32"))
+
+# Limite le nombre d'écritures disque simultanées ; les uploads en trop attendent
+# leur tour sans bloquer la boucle d'événements ni le threadpool. Le slot n'est
+# pris que le temps d'une écriture : un client lent (grosse ROM sur une petite
+# connexion) ne retient rien pendant qu'il envoie, et ne bloque pas les saves.
+upload_slots = asyncio.Semaphore(MAX_CONCURRENT_UPLOADS)
+
+
+class IngestedFile:
+    """Fichier reçu en streaming : écrit dans un .tmp du dossier de staging et haché au vol."""
+
+    def __init__(self, kind, directory, filename=None, content_type=None, max_size=None):
+        self.kind = kind
+        self.max_size = max_size or UPLOAD_LIMITS[kind]
+        self.directory = directory
+        self.filename = filename or ""
+        self.content_type = content_type
+        self.tmp_path = os.path.join(directory, f".{uuid.uuid4()}.tmp")
+        self.size = 0
+        self.path = None
+        self._digest = hashlib.sha256()
+        self._fh = None
+
+    @property
+    def sha256(self):
+        return self._digest.hexdigest()
+
+    @property
+    def extension(self):
+        _, ext = os.path.splitext(self.filename)
+        return ext.lower()
+
+    async def open(self):
+        self._fh = await aiofiles.open(self.tmp_path, "wb")
+
+    async def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            raise HTTPException(status_code=413, detail=f"File too large (max {self.max_size // MB} MB for {self.kind})")
+        self._digest.update(data)
+        async with upload_slots:
+            await self._fh.write(data)
+
+    async def close(self):
+        if self._fh is not None:
+            await self._fh.close()
+            self._fh = None
+
+    def publish(self, key):
+        """Publie le fichier temporaire dans le stockage sous cette clé ; renvoie False si elle existait."""
+        created = storage.backend.put_file(self.tmp_path, key)
+        self.path = key
+        return created
+
+    def discard(self):
+        remove_if_exists(self.tmp_path)
+
+
+def remove_if_exists(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def preallocate(path, size):
+    """Crée un fichier creux de cette taille : chaque morceau d'un upload est écrit directement à sa place."""
+    with open(path, "wb") as f:
+        f.truncate(size)
+
+
+async def write_range(chunks, path, offset, max_size):
+    """
+    Écrit un flux à une position donnée d'un fichier préalloué (upload par morceaux).
+    Les morceaux d'un même fichier peuvent ainsi arriver en parallèle sans être recopiés.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    async with aiofiles.open(path, "r+b") as fh:
+        await fh.seek(offset)
+        async for chunk in chunks:
+            if not chunk:
+                continue
+            size += len(chunk)
+            if size > max_size:
+                raise HTTPException(status_code=413, detail=f"Chunk too large (max {max_size} bytes)")
+            digest.update(chunk)
+            async with upload_slots:
+                await fh.write(chunk)
+        await fh.flush()
+    return digest.hexdigest(), size
+
+
+def hash_chunks(path, chunk_size):
+    """Relit un upload par morceaux : (SHA-256 du fichier, [SHA-256 de chaque morceau])."""
+    whole = hashlib.sha256()
+    chunk_hashes = []
+    with open(path, "rb") as f:
+        for data in iter(lambda: f.read(chunk_size), b""):
+            whole.update(data)
+            chunk_hashes.append(hashlib.sha256(data).hexdigest())
+    return whole.hexdigest(), chunk_hashes
+
+
+class UploadForm:
+    def __init__(self):
+        self.fields = {}
+        self.files = {}
+
+    def field(self, name, required=True):
+        value = self.fields.get(name)
+        if value is None and required:
+            raise HTTPException(status_code=422, detail=f"Missing form field '{name}'")
+        return value
+
+    def file(self, name, required=True):
+        ingested = self.files.get(name)
+        if ingested is None and required:
+            raise HTTPException(status_code=422, detail=f"Missing file '{name}'")
+        return ingested
+
+    def discard(self):
+        """Supprime les fichiers temporaires qui n'ont pas été publiés."""
+        for ingested in self.files.values():
+            if ingested.path is None:
+                ingested.discard()
+
+
+async def parse_urlencoded_form(request: Request):
+    body = b""
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > MAX_URLENCODED_SIZE:
+            raise HTTPException(status_code=413, detail="Form body too large")
+
+    form = UploadForm()
+    try:
+        for name, value in parse_qsl(body.decode("latin-1"), keep_blank_values=True, encoding="utf-8", errors="strict"):
+            if len(value) > MAX_FIELD_SIZE:
+                raise HTTPException(status_code=413, detail=f"Form field '{name}' too large")
+            form.fields[name] = value
+    except UnicodeDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"Malformed form body: {e}")
+    return form
+
+
+async def parse_upload_form(request: Request, file_fields):
+    """
+    Parse un multipart/form-data en streaming, sans passer par le spool de Starlette.
+
+    file_fields associe chaque champ fichier attendu à (kind, dossier de staging).
+    Les parts sont écrites sur disque au fur et à mesure que le corps de la requête
+    arrive, puis publiées dans le stockage par l'appelant (IngestedFile.publish).
+    Un formulaire urlencoded (envoyé sans aucun fichier) est aussi accepté, comme avec Form(...).
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type == b"application/x-www-form-urlencoded":
+        return await parse_urlencoded_form(request)
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=415, detail="Expected multipart/form-data")
+
+    form = UploadForm()
+    events = []
+    header = {"field": b"", "value": b""}
+    headers = []
+
+    def on_part_begin():
+        headers.clear()
+
+    def on_header_field(data, start, end):
+        header["field"] += data[start:end]
+
+    def on_header_value(data, start, end):
+        header["value"] += data[start:end]
+
+    def on_header_end():
+        headers.append((header["field"].lower(), header["value"]))
+        header["field"] = b""
+        header["value"] = b""
+
+    def on_headers_finished():
+        events.append(("headers", list(headers)))
+
+    def on_part_data(data, start, end):
+        events.append(("data", data[start:end]))
+
+    def on_part_end():
+        events.append(("end", None))
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+    })
+
+    current_name = None
+    current_file = None
+    current_value = b""
+
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            for event, payload in events:
+                if event == "headers":
+                    part_headers = dict(payload)
+                    _, options = parse_options_header(part_headers.get(b"content-disposition", b""))
+                    current_name = options.get(b"name", b"").decode("latin-1")
+                    filename = options.get(b"filename")
+                    current_value = b""
+                    current_file = None
+
+                    if filename is not None:
+                        if current_name not in file_fields:
+                            raise HTTPException(status_code=422, detail=f"Unexpected file '{current_name}'")
+                        kind, directory = file_fields[current_name]
+                        current_file = IngestedFile(
+                            kind, directory,
+                            filename=filename.decode("utf-8", errors="replace"),
+                            content_type=part_headers.get(b"content-type", b"").decode("latin-1") or None
+                        )
+                        form.files[current_name] = current_file
+                        await current_file.open()
+
+                elif event == "data":
+                    if current_file is not None:
+                        await current_file.write(payload)
+                    else:
+                        current_value += payload
+                        if len(current_value) > MAX_FIELD_SIZE:
+                            raise HTTPException(status_code=413, detail=f"Form field '{current_name}' too large")
+
+                elif event == "end":
+                    if current_file is not None:
+                        await current_file.close()
+                        # Un <input type="file"> laissé vide envoie une part sans contenu
+                        if current_file.size == 0 and not current_file.filename:
+                            await run_in_threadpool(current_file.discard)
+                            del form.files[current_name]
+                    else:
+                        form.fields[current_name] = current_value.decode("utf-8")
+                    current_file = None
+            events.clear()
+        parser.finalize()
+    except (ParseError, UnicodeDecodeError) as e:
+        # Corps multipart invalide ou champ texte non UTF-8 : erreur du client, pas du serveur
+        if current_file is not None:
+            await current_file.close()
+        await run_in_threadpool(form.discard)
+        raise HTTPException(status_code=400, detail=f"Malformed multipart body: {e}")
+    except BaseException:
+        if current_file is not None:
+            await current_file.close()
+        await run_in_threadpool(form.discard)
+        raise
+
+    return form